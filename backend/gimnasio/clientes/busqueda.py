@@ -0,0 +1,88 @@
+import re
+import unicodedata
+
+from django.db.models import Count, Q
+
+
+# ============================================
+# BÚSQUEDA DE CLIENTES
+# ============================================
+#
+# Cada cliente tiene sus tokens normalizados (minúsculas, sin acentos) en la
+# tabla TokenBusqueda. Buscar "gonza" es un LIKE 'gonza%' sobre un índice,
+# así que no hay que recorrer la tabla de clientes en cada tecla.
+
+LARGO_MAXIMO_TOKEN = 100
+MAXIMO_TERMINOS = 5
+
+
+def normalizar(texto):
+    """Pasa a minúsculas y saca acentos: 'Núñez' -> 'nunez'"""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower()
+
+
+def tokenizar(texto):
+    """Separa un texto en tokens alfanuméricos normalizados"""
+    return [t[:LARGO_MAXIMO_TOKEN] for t in re.split(r'[^a-z0-9]+', normalizar(texto)) if t]
+
+
+def tokens_cliente(cliente):
+    """Tokens indexados de un cliente: nombre, apellido, dni, email y teléfono"""
+    tokens = set()
+    for campo in (cliente.nombre, cliente.apellido, cliente.dni, cliente.email, cliente.telefono):
+        tokens.update(tokenizar(campo or ''))
+
+    # El teléfono también se indexa con todos los dígitos juntos
+    digitos = re.sub(r'\D', '', cliente.telefono or '')
+    if digitos:
+        tokens.add(digitos[:LARGO_MAXIMO_TOKEN])
+
+    return tokens
+
+
+def indexar_clientes(clientes):
+    """Reemplaza los tokens de los clientes dados (2 queries por lote)"""
+    from .models import TokenBusqueda
+
+    clientes = list(clientes)
+    if not clientes:
+        return 0
+
+    TokenBusqueda.objects.filter(cliente_id__in=[c.pk for c in clientes]).delete()
+    tokens = [
+        TokenBusqueda(cliente_id=cliente.pk, token=token)
+        for cliente in clientes
+        for token in tokens_cliente(cliente)
+    ]
+    TokenBusqueda.objects.bulk_create(tokens, batch_size=1000)
+    return len(tokens)
+
+
+def buscar_clientes(queryset, texto):
+    """
+    Filtra el queryset de clientes con búsqueda por prefijo.
+
+    Cada término tiene que coincidir con el comienzo de algún token del
+    cliente. Se anota 'relevancia' = cantidad de términos que coinciden
+    exactamente con un token, para ordenar los mejores resultados primero.
+    """
+    from .models import TokenBusqueda
+
+    terminos = tokenizar(texto)[:MAXIMO_TERMINOS]
+    if not terminos:
+        return queryset.none()
+
+    for termino in terminos:
+        queryset = queryset.filter(
+            id__in=TokenBusqueda.objects.filter(token__startswith=termino).values('cliente_id')
+        )
+
+    return queryset.annotate(
+        relevancia=Count(
+            'tokens_busqueda',
+            filter=Q(tokens_busqueda__token__in=terminos),
+            distinct=True
+        )
+    )
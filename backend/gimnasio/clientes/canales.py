@@ -0,0 +1,116 @@
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+# ============================================
+# CANALES DE ENVÍO DE RECORDATORIOS
+# ============================================
+#
+# Cada canal de Recordatorio ('whatsapp', 'email') se resuelve con el setting
+# RECORDATORIOS_CANALES (nombre -> ruta de la clase). Un canal implementa
+# enviar(recordatorio) y lanza ErrorEnvio si no pudo entregar el mensaje.
+# El despachador llama a enviar() desde varios hilos: no guardar estado
+# por mensaje en la instancia.
+
+
+class ErrorEnvio(Exception):
+    """El mensaje no se pudo entregar (se reintenta más tarde)"""
+
+
+class Canal:
+    """Base de los canales de envío"""
+
+    def enviar(self, recordatorio):
+        raise NotImplementedError
+
+
+class ConsolaCanal(Canal):
+    """Escribe el mensaje en la salida estándar (desarrollo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def enviar(self, recordatorio):
+        with self._lock:
+            sys.stdout.write(
+                f'[{recordatorio.canal}] {recordatorio.cliente}: {recordatorio.mensaje}\n'
+            )
+
+
+class ArchivoCanal(Canal):
+    """Agrega cada mensaje como una línea JSON en RECORDATORIOS_ARCHIVO (pruebas)"""
+
+    def __init__(self):
+        self.ruta = getattr(settings, 'RECORDATORIOS_ARCHIVO', 'recordatorios_enviados.jsonl')
+        self._lock = threading.Lock()
+
+    def enviar(self, recordatorio):
+        linea = json.dumps({
+            'recordatorio': recordatorio.id,
+            'cliente': recordatorio.cliente_id,
+            'canal': recordatorio.canal,
+            'mensaje': recordatorio.mensaje,
+            'fecha': timezone.now().isoformat(),
+        }, ensure_ascii=False)
+        with self._lock, open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(linea + '\n')
+
+
+class EmailCanal(Canal):
+    """Envía por email con el backend de correo de Django (EMAIL_* en settings)"""
+
+    asunto = 'Recordatorio del gimnasio'
+
+    def enviar(self, recordatorio):
+        if not recordatorio.cliente.email:
+            raise ErrorEnvio('El cliente no tiene email')
+        try:
+            send_mail(self.asunto, recordatorio.mensaje, None, [recordatorio.cliente.email])
+        except Exception as error:
+            raise ErrorEnvio(f'Error de correo: {error}') from error
+
+
+class WhatsAppCanal(Canal):
+    """
+    Envía por la API HTTP del proveedor de WhatsApp.
+
+    Settings: WHATSAPP_API_URL, WHATSAPP_API_TOKEN y opcional WHATSAPP_TIMEOUT.
+    """
+
+    def __init__(self):
+        self.url = settings.WHATSAPP_API_URL
+        self.token = settings.WHATSAPP_API_TOKEN
+        self.timeout = getattr(settings, 'WHATSAPP_TIMEOUT', 10)
+
+    def enviar(self, recordatorio):
+        if not recordatorio.cliente.telefono:
+            raise ErrorEnvio('El cliente no tiene teléfono')
+
+        cuerpo = json.dumps({
+            'to': recordatorio.cliente.telefono,
+            'type': 'text',
+            'text': {'body': recordatorio.mensaje},
+        }).encode('utf-8')
+        pedido = urllib.request.Request(self.url, data=cuerpo, method='POST', headers={
+            'Authorization': f'Bearer {self.token}',
+            'Content-Type': 'application/json',
+        })
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as respuesta:
+                respuesta.read()
+        except (urllib.error.URLError, TimeoutError) as error:
+            raise ErrorEnvio(f'Error de WhatsApp: {error}') from error
+
+
+def cargar_canales():
+    """Instancia un backend por canal configurado: {'whatsapp': ..., 'email': ...}"""
+    configurados = getattr(settings, 'RECORDATORIOS_CANALES', {})
+    return {nombre: import_string(ruta)() for nombre, ruta in configurados.items()}
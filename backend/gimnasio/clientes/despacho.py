@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .canales import cargar_canales
+from .models import Recordatorio
+
+
+# ============================================
+# DESPACHO DE RECORDATORIOS
+# ============================================
+#
+# Varios workers (en uno o varios nodos) pueden correr a la vez:
+#   1) Reserva: SELECT ... FOR UPDATE SKIP LOCKED sobre los pendientes
+#      vencidos y se marcan con reservado_hasta. La transacción es corta;
+#      los demás workers saltean las filas bloqueadas y las ya reservadas.
+#   2) Envío concurrente por canal, fuera de la transacción.
+#   3) Resultado: un solo bulk_update, solo sobre filas que siguen
+#      pendientes (si alguien canceló mientras tanto, no se pisa).
+# Si un worker muere, la reserva vence y otro retoma esas filas.
+
+TAMANO_LOTE = 100
+HILOS = 8
+DURACION_RESERVA = timedelta(minutes=5)
+MAX_INTENTOS = 3
+ESPERA_REINTENTO = timedelta(minutes=2)  # se multiplica por el número de intento
+
+
+def reservar_lote(tamano=TAMANO_LOTE, ahora=None):
+    """Toma hasta `tamano` recordatorios vencidos para este worker"""
+    ahora = ahora or timezone.now()
+
+    with transaction.atomic():
+        ids = list(
+            Recordatorio.objects
+            .select_for_update(skip_locked=True)
+            .filter(estado='pendiente', fecha_programada__lte=ahora)
+            .filter(Q(reservado_hasta__isnull=True) | Q(reservado_hasta__lt=ahora))
+            .order_by('fecha_programada')
+            .values_list('id', flat=True)[:tamano]
+        )
+        if ids:
+            Recordatorio.objects.filter(id__in=ids).update(reservado_hasta=ahora + DURACION_RESERVA)
+
+    if not ids:
+        return []
+
+    return list(
+        Recordatorio.objects
+        .filter(id__in=ids)
+        .select_related('cliente')
+        .only(
+            'id', 'cliente_id', 'canal', 'mensaje', 'intentos',
+            'cliente__nombre', 'cliente__apellido', 'cliente__email', 'cliente__telefono'
+        )
+    )
+
+
+class Despachador:
+    """Envía lotes de recordatorios con un pool de hilos"""
+
+    def __init__(self, canales=None, hilos=HILOS):
+        self.canales = cargar_canales() if canales is None else canales
+        self.hilos = hilos
+
+    def _enviar(self, recordatorio):
+        """Devuelve None si se envió, o el texto del error"""
+        canal = self.canales.get(recordatorio.canal)
+        if canal is None:
+            return f'Canal "{recordatorio.canal}" no configurado'
+        try:
+            canal.enviar(recordatorio)
+        except Exception as error:
+            return str(error) or error.__class__.__name__
+        return None
+
+    def procesar(self, recordatorios):
+        """
+        Envía un lote ya reservado y guarda los resultados.
+
+        Devuelve (enviados, fallidos).
+        """
+        if not recordatorios:
+            return 0, 0
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as executor:
+            errores = list(executor.map(self._enviar, recordatorios))
+
+        ahora = timezone.now()
+        enviados = 0
+        for recordatorio, error in zip(recordatorios, errores):
+            recordatorio.intentos += 1
+            if error is None:
+                enviados += 1
+                recordatorio.estado = 'enviado'
+                recordatorio.fecha_envio = ahora
+                recordatorio.ultimo_error = ''
+                recordatorio.reservado_hasta = None
+            elif recordatorio.intentos >= MAX_INTENTOS:
+                recordatorio.estado = 'fallido'
+                recordatorio.ultimo_error = error
+                recordatorio.reservado_hasta = None
+            else:
+                # Sigue pendiente; la reserva hace de espera antes del reintento
+                recordatorio.ultimo_error = error
+                recordatorio.reservado_hasta = ahora + ESPERA_REINTENTO * recordatorio.intentos
+
+        Recordatorio.objects.filter(estado='pendiente').bulk_update(
+            recordatorios,
+            ['estado', 'fecha_envio', 'intentos', 'ultimo_error', 'reservado_hasta']
+        )
+
+        return enviados, len(recordatorios) - enviados
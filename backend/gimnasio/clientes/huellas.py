@@ -0,0 +1,220 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from gimnasio.cache import cambios_entre, obtener_version
+
+
+# ============================================
+# ÍNDICE EN MEMORIA DE HUELLAS (1:N)
+# ============================================
+#
+# Todas las huellas activas se guardan en una matriz contigua (una fila por
+# template, en palabras de 64 bits). Identificar una huella es un XOR contra
+# toda la matriz + conteo de bits (distancia de Hamming), vectorizado con
+# NumPy: no se toca la base en cada lectura del molinete.
+#
+# Se asume que el lector entrega templates binarios de largo fijo.
+#
+# Cada worker tiene su copia. Las señales (clientes/signals.py) incrementan
+# la versión compartida 'huellas' anotando el id de la huella que cambió
+# (registro de cambios de gimnasio/cache.py). Antes de identificar se
+# compara con la versión de la copia local: si está atrasada se releen y
+# aplican sólo las huellas cambiadas (agregar/quitar); el índice entero se
+# recarga sólo si no se conocen todos los cambios.
+# QuerySet.update() y bulk_create() no disparan señales: después de uno,
+# llamar a gimnasio.cache.incrementar_version('huellas') (fuerza la recarga).
+
+NOMBRE_VERSION = 'huellas'
+
+# Puntaje mínimo (1 = idénticas) para considerar que dos huellas coinciden
+UMBRAL_COINCIDENCIA = getattr(settings, 'HUELLAS_UMBRAL_COINCIDENCIA', 0.85)
+
+# Filas por bloque al comparar: acota la memoria temporal del XOR
+FILAS_POR_BLOQUE = 8192
+
+
+class IndiceHuellas:
+    """Índice de templates activos, al día con la versión compartida"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cargado = False
+        self._version = None
+        self._largo = None
+        self._cantidad = 0
+        self._matriz = np.empty((0, 0), dtype=np.uint64)
+        self._huella_ids = np.empty(0, dtype=np.int64)
+        self._cliente_ids = np.empty(0, dtype=np.int64)
+        self._posiciones = {}  # huella_id -> fila en la matriz
+
+    @property
+    def cargado(self):
+        return self._cargado
+
+    def __len__(self):
+        return self._cantidad
+
+    def cargar(self, templates=None):
+        """
+        (Re)carga el índice completo.
+
+        templates: iterable de (huella_id, cliente_id, bytes). Si no se pasa,
+        se leen todas las huellas activas de la base.
+        """
+        if templates is None:
+            from .models import Huella
+            templates = (
+                (huella.pk, huella.cliente_id, huella.datos)
+                for huella in Huella.objects.filter(activa=True)
+                .only('id', 'cliente_id', 'huella_data', 'comprimida')
+                .iterator(chunk_size=2000)
+            )
+
+        with self._lock:
+            self._largo = None
+            self._cantidad = 0
+            self._matriz = np.empty((0, 0), dtype=np.uint64)
+            self._huella_ids = np.empty(0, dtype=np.int64)
+            self._cliente_ids = np.empty(0, dtype=np.int64)
+            self._posiciones = {}
+            for huella_id, cliente_id, datos in templates:
+                try:
+                    self._agregar(huella_id, cliente_id, datos)
+                except ValueError:
+                    # Template con otro formato/largo: no se puede comparar
+                    continue
+            self._cargado = True
+
+    def asegurar_actualizado(self):
+        """Carga el índice o le aplica los cambios hechos por cualquier proceso"""
+        version = obtener_version(NOMBRE_VERSION)
+        if self._cargado and version == self._version:
+            return
+        with self._lock:
+            if self._cargado and version == self._version:
+                return
+            # La versión se lee antes que las huellas: si cambia mientras
+            # tanto, la próxima identificación aplica lo que falte
+            cambios = cambios_entre(NOMBRE_VERSION, self._version, version) if self._cargado else None
+            if cambios is None:
+                self.cargar()
+            else:
+                self.aplicar_cambios(cambios)
+            self._version = version
+
+    def aplicar_cambios(self, huella_ids):
+        """Relee sólo `huella_ids`: las activas se agregan o reemplazan, el resto se quita"""
+        from .models import Huella
+
+        with self._lock:
+            activas = set()
+            for huella in Huella.objects.filter(pk__in=huella_ids, activa=True).only(
+                'id', 'cliente_id', 'huella_data', 'comprimida'
+            ):
+                try:
+                    self.agregar(huella.pk, huella.cliente_id, huella.datos)
+                except ValueError:
+                    # Template con otro formato/largo: no se puede comparar
+                    continue
+                activas.add(huella.pk)
+            for huella_id in set(huella_ids) - activas:
+                self.quitar(huella_id)
+
+    def agregar(self, huella_id, cliente_id, datos):
+        """Agrega o reemplaza el template de una huella"""
+        with self._lock:
+            self._agregar(huella_id, cliente_id, datos)
+
+    def quitar(self, huella_id):
+        """Saca una huella del índice (mueve la última fila a su lugar)"""
+        with self._lock:
+            fila = self._posiciones.pop(huella_id, None)
+            if fila is None:
+                return
+
+            ultima = self._cantidad - 1
+            if fila != ultima:
+                self._matriz[fila] = self._matriz[ultima]
+                self._huella_ids[fila] = self._huella_ids[ultima]
+                self._cliente_ids[fila] = self._cliente_ids[ultima]
+                self._posiciones[int(self._huella_ids[fila])] = fila
+            self._cantidad = ultima
+
+    def identificar(self, datos, umbral=None):
+        """
+        Busca el template más parecido.
+
+        Devuelve (cliente_id, huella_id, puntaje) o None si ninguno
+        supera el umbral.
+        """
+        umbral = UMBRAL_COINCIDENCIA if umbral is None else umbral
+        largo, sonda = self._como_vector(datos)
+
+        with self._lock:
+            n = self._cantidad
+            if n == 0 or largo != self._largo:
+                return None
+
+            mejor_fila = -1
+            mejor_distancia = None
+            for inicio in range(0, n, FILAS_POR_BLOQUE):
+                bloque = self._matriz[inicio:min(inicio + FILAS_POR_BLOQUE, n)]
+                distancias = np.bitwise_count(np.bitwise_xor(bloque, sonda)).sum(axis=1, dtype=np.uint32)
+                fila = int(distancias.argmin())
+                if mejor_distancia is None or distancias[fila] < mejor_distancia:
+                    mejor_distancia = int(distancias[fila])
+                    mejor_fila = inicio + fila
+
+            puntaje = 1 - mejor_distancia / (self._largo * 8)
+            if puntaje < umbral:
+                return None
+
+            return int(self._cliente_ids[mejor_fila]), int(self._huella_ids[mejor_fila]), round(puntaje, 4)
+
+    # ---- internos (llamar con el lock tomado) ----
+
+    @staticmethod
+    def _como_vector(datos):
+        """(largo en bytes, template como palabras de 64 bits rellenado con ceros)"""
+        datos = bytes(datos)
+        relleno = -len(datos) % 8
+        return len(datos), np.frombuffer(datos + b'\0' * relleno, dtype=np.uint64)
+
+    def _agregar(self, huella_id, cliente_id, datos):
+        largo, vector = self._como_vector(datos)
+        if largo == 0:
+            raise ValueError('Template vacío')
+        if self._largo is None:
+            self._largo = largo
+            self._matriz = np.empty((0, vector.size), dtype=np.uint64)
+        elif largo != self._largo:
+            raise ValueError(f'Template de {largo} bytes, se esperaban {self._largo}')
+
+        fila = self._posiciones.get(huella_id)
+        if fila is None:
+            fila = self._cantidad
+            if fila == len(self._matriz):
+                self._crecer()
+            self._cantidad += 1
+            self._posiciones[huella_id] = fila
+
+        self._matriz[fila] = vector
+        self._huella_ids[fila] = huella_id
+        self._cliente_ids[fila] = cliente_id
+
+    def _crecer(self):
+        """Duplica la capacidad: agregar de a uno queda O(1) amortizado"""
+        capacidad = max(1024, len(self._matriz) * 2)
+        matriz = np.empty((capacidad, self._matriz.shape[1]), dtype=np.uint64)
+        huella_ids = np.empty(capacidad, dtype=np.int64)
+        cliente_ids = np.empty(capacidad, dtype=np.int64)
+        matriz[:self._cantidad] = self._matriz[:self._cantidad]
+        huella_ids[:self._cantidad] = self._huella_ids[:self._cantidad]
+        cliente_ids[:self._cantidad] = self._cliente_ids[:self._cantidad]
+        self._matriz, self._huella_ids, self._cliente_ids = matriz, huella_ids, cliente_ids
+
+
+# Índice del proceso (uno por worker)
+indice_huellas = IndiceHuellas()
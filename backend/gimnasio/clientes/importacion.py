@@ -0,0 +1,193 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .busqueda import indexar_clientes
+from .models import Cliente, clave_cumpleanos
+from .serializers import ClienteCreateSerializer
+
+
+# ============================================
+# IMPORTACIÓN MASIVA DE CLIENTES
+# ============================================
+#
+# El archivo se lee como stream y se procesa de a lotes: validación de campos
+# en memoria, un solo SELECT ... IN por lote para DNI/email repetidos y un
+# bulk_create. La memoria depende del tamaño del lote, no del archivo.
+
+TAMANO_LOTE = 1000
+
+
+class ClienteImportSerializer(ClienteCreateSerializer):
+    """Mismas validaciones que ClienteCreateSerializer, sin el SELECT de unicidad por fila"""
+    class Meta(ClienteCreateSerializer.Meta):
+        extra_kwargs = {
+            'dni': {'validators': []},
+            'email': {'validators': []},
+        }
+
+
+class ErrorLectura:
+    """Lo que generan los lectores en lugar de una fila que no se pudo leer"""
+
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+
+
+def leer_csv(archivo):
+    """Genera un dict por fila de un CSV con encabezados (archivo binario)"""
+    filas = csv.DictReader(codecs.iterdecode(archivo, 'utf-8-sig'))
+    while True:
+        try:
+            yield next(filas)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # El lector sigue con la línea siguiente
+            yield ErrorLectura(f'CSV mal formado: {error}')
+        except UnicodeDecodeError:
+            # No se puede seguir decodificando: se corta acá
+            yield ErrorLectura('El archivo no está en UTF-8')
+            return
+
+
+def leer_jsonl(archivo):
+    """Genera un dict por línea de un archivo JSON lines (archivo binario)"""
+    lineas = codecs.iterdecode(archivo, 'utf-8-sig')
+    while True:
+        try:
+            linea = next(lineas).strip()
+        except StopIteration:
+            return
+        except UnicodeDecodeError:
+            yield ErrorLectura('El archivo no está en UTF-8')
+            return
+        if not linea:
+            continue
+        try:
+            yield json.loads(linea)
+        except ValueError as error:
+            yield ErrorLectura(f'JSON inválido: {error}')
+
+
+LECTORES = {
+    'csv': leer_csv,
+    'jsonl': leer_jsonl,
+}
+
+
+def _limpiar(fila):
+    """Saca espacios y columnas vacías (así aplican los defaults del modelo)"""
+    limpia = {}
+    for campo, valor in fila.items():
+        if campo is None:
+            continue
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor in ('', None):
+            continue
+        limpia[campo.strip()] = valor
+    return limpia
+
+
+def importar_clientes(filas, tamano_lote=TAMANO_LOTE):
+    """
+    Importa clientes desde un iterable de dicts.
+
+    Devuelve un reporte con la cantidad creada y los errores por fila
+    (numeradas desde 1, sin contar el encabezado).
+    """
+    reporte = {'filas': 0, 'creados': 0, 'errores': []}
+    numeradas = enumerate(filas, start=1)
+
+    while True:
+        lote = list(islice(numeradas, tamano_lote))
+        if not lote:
+            break
+        reporte['filas'] += len(lote)
+        _importar_lote(lote, reporte)
+
+    return reporte
+
+
+def _importar_lote(lote, reporte):
+    errores = reporte['errores']
+
+    # 1) Validación de campos (formato de DNI, email, fechas...) sin queries.
+    #    Se reutiliza una sola instancia: armar los campos del serializer es
+    #    lo más caro, y así se hace una vez por lote y no por fila.
+    serializer = ClienteImportSerializer()
+    validos = []
+    for numero, fila in lote:
+        if isinstance(fila, ErrorLectura):
+            errores.append({'fila': numero, 'errores': {'non_field_errors': [fila.mensaje]}})
+            continue
+        if not isinstance(fila, dict):
+            errores.append({'fila': numero, 'errores': {'non_field_errors': ['Fila inválida']}})
+            continue
+
+        try:
+            validos.append((numero, serializer.run_validation(_limpiar(fila))))
+        except serializers.ValidationError as error:
+            errores.append({'fila': numero, 'errores': error.detail})
+
+    if not validos:
+        return
+
+    # 2) Unicidad: una sola query por lote contra la base (los emails ya
+    #    vienen en minúsculas del serializer, igual que los guardados)
+    dnis = {datos['dni'] for _, datos in validos}
+    emails = {datos['email'] for _, datos in validos}
+    existentes_dni = set()
+    existentes_email = set()
+    for dni, email in Cliente.objects.filter(
+        Q(dni__in=dnis) | Q(email__in=emails)
+    ).values_list('dni', 'email'):
+        existentes_dni.add(dni)
+        existentes_email.add(email)
+
+    nuevos = []
+    for numero, datos in validos:
+        email = datos['email']
+        fila_errores = {}
+        if datos['dni'] in existentes_dni:
+            fila_errores['dni'] = ['Ya existe un cliente con este DNI']
+        if email in existentes_email:
+            fila_errores['email'] = ['Ya existe un cliente con este email']
+
+        if fila_errores:
+            errores.append({'fila': numero, 'errores': fila_errores})
+            continue
+
+        # Repetidos dentro del mismo archivo: gana la primera aparición
+        existentes_dni.add(datos['dni'])
+        existentes_email.add(email)
+
+        cliente = Cliente(**datos)
+        cliente.cumpleanos_clave = clave_cumpleanos(cliente.fecha_nacimiento)
+        nuevos.append((numero, cliente))
+
+    if not nuevos:
+        return
+
+    # 3) Inserción del lote + índice de búsqueda (bulk_create no llama a save())
+    try:
+        with transaction.atomic():
+            Cliente.objects.bulk_create([cliente for _, cliente in nuevos])
+            creados = Cliente.objects.filter(dni__in=[cliente.dni for _, cliente in nuevos])
+            indexar_clientes(creados.only('id', 'nombre', 'apellido', 'dni', 'email', 'telefono'))
+    except IntegrityError:
+        # Otro proceso cargó el mismo DNI/email entre el SELECT y el INSERT
+        for numero, _ in nuevos:
+            errores.append({
+                'fila': numero,
+                'errores': {'non_field_errors': ['Conflicto de DNI/email con otra carga, reintentar']}
+            })
+        return
+
+    reporte['creados'] += len(nuevos)
@@ -0,0 +1,96 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from clientes.models import Cliente, clave_cumpleanos
+from clientes.serializers import ClienteListSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compara nombre_completo y edad calculados en la base
+    (Cliente.objects.con_datos_calculados()) contra calcularlos en Python
+    fila por fila, y mide la serialización del listado. Verifica que los dos
+    caminos den lo mismo.
+
+    Corre contra una base descartable (la de tests: test_<NAME>), creada y
+    migrada al empezar y borrada al terminar; no toca los datos reales.
+
+    Uso: python manage.py benchmark_clientes [--clientes 50000] [--repeticiones 5]
+    """
+    help = 'Benchmark de los campos calculados de clientes (base vs Python)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=50000)
+        parser.add_argument('--repeticiones', type=int, default=5, help='Se informa la mejor')
+
+    def handle(self, *args, **options):
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.medir(options['clientes'], options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+    def medir(self, cantidad, repeticiones):
+        hoy = timezone.localdate()
+
+        # Un nacimiento por día a lo largo de ~60 años: cubre cumpleaños
+        # pasados, de hoy y por venir (y los 29 de febrero)
+        nacimientos = [date(1950, 1, 1) + timedelta(days=(i * 7) % 22000) for i in range(cantidad)]
+        Cliente.objects.bulk_create([
+            Cliente(
+                nombre='Benchmark', apellido=str(i), dni=f'99{i:06d}', email=f'benchmark{i}@example.com',
+                telefono='0', contacto_emergencia='0', fecha_nacimiento=nacimiento,
+                cumpleanos_clave=clave_cumpleanos(nacimiento)
+            )
+            for i, nacimiento in enumerate(nacimientos)
+        ], batch_size=1000)
+
+        def en_python():
+            filas = {}
+            for cliente in Cliente.objects.only('id', 'nombre', 'apellido', 'fecha_nacimiento'):
+                nacimiento = cliente.fecha_nacimiento
+                edad = hoy.year - nacimiento.year
+                if (hoy.month, hoy.day) < (nacimiento.month, nacimiento.day):
+                    edad -= 1
+                filas[cliente.id] = (f'{cliente.nombre} {cliente.apellido}', edad)
+            return filas
+
+        def en_la_base():
+            return {
+                id: (nombre_completo, edad)
+                for id, nombre_completo, edad in Cliente.objects.con_datos_calculados(hoy)
+                .values_list('id', 'nombre_completo', 'edad')
+            }
+
+        def serializar():
+            return ClienteListSerializer(Cliente.objects.con_datos_calculados(hoy), many=True).data
+
+        def mejor(funcion):
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                resultado = funcion()
+                tiempos.append(time.perf_counter() - inicio)
+            return min(tiempos), resultado
+
+        tiempo_python, esperado = mejor(en_python)
+        tiempo_base, obtenido = mejor(en_la_base)
+        tiempo_serializar, _ = mejor(serializar)
+
+        for nombre, tiempo in (
+            ('Python', tiempo_python),
+            ('base', tiempo_base),
+            ('serializar listado', tiempo_serializar),
+        ):
+            self.stdout.write(f'{nombre:>18}: {tiempo:.3f}s ({tiempo / cantidad * 1e6:.1f} us/fila)')
+
+        distintos = sum(1 for id, valores in esperado.items() if obtenido.get(id) != valores)
+        if distintos:
+            self.stderr.write(self.style.ERROR(f'{distintos} clientes con valores distintos'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{cantidad} clientes: mismos valores en la base y en Python'))
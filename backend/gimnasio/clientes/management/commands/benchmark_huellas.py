@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from clientes.huellas import IndiceHuellas
+
+
+class Command(BaseCommand):
+    """
+    Mide la identificación 1:N del índice de huellas con templates sintéticos.
+    No toca la base de datos.
+
+    Uso: python manage.py benchmark_huellas [--cantidades 5000 50000] [--largo 512]
+    """
+    help = 'Benchmark del índice en memoria de huellas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidades', type=int, nargs='+', default=[5000, 50000])
+        parser.add_argument('--largo', type=int, default=512, help='Bytes por template')
+        parser.add_argument('--consultas', type=int, default=200)
+
+    def handle(self, *args, **options):
+        generador = np.random.default_rng(42)
+        largo = options['largo']
+        consultas = options['consultas']
+
+        for cantidad in options['cantidades']:
+            templates = generador.integers(0, 256, size=(cantidad, largo), dtype=np.uint8)
+
+            indice = IndiceHuellas()
+            inicio = time.perf_counter()
+            indice.cargar((i, i, templates[i].tobytes()) for i in range(cantidad))
+            carga = time.perf_counter() - inicio
+
+            # Sondas = templates enrolados con ~5% de bits cambiados
+            elegidos = generador.integers(0, cantidad, size=consultas)
+            ruido = generador.random((consultas, largo * 8)) < 0.05
+            sondas = templates[elegidos] ^ np.packbits(ruido, axis=1)
+
+            aciertos = 0
+            inicio = time.perf_counter()
+            for elegido, sonda in zip(elegidos, sondas):
+                resultado = indice.identificar(sonda.tobytes())
+                if resultado is not None and resultado[0] == elegido:
+                    aciertos += 1
+            total = time.perf_counter() - inicio
+
+            self.stdout.write(
+                f'{cantidad:>7} templates de {largo} B: carga {carga:.2f}s, '
+                f'{total / consultas * 1000:.2f} ms por identificación, '
+                f'{aciertos}/{consultas} aciertos'
+            )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clientes.despacho import HILOS, TAMANO_LOTE, Despachador, reservar_lote
+
+
+class Command(BaseCommand):
+    """
+    Worker que envía los recordatorios pendientes cuya fecha ya pasó.
+    Se pueden correr varios a la vez (en el mismo o en distintos nodos).
+
+    Uso: python manage.py despachar_recordatorios [--lote 100] [--hilos 8] [--una-vez]
+    """
+    help = 'Envía los recordatorios pendientes vencidos por su canal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Recordatorios por reserva')
+        parser.add_argument('--hilos', type=int, default=HILOS, help='Envíos simultáneos')
+        parser.add_argument('--espera', type=float, default=5, help='Segundos entre consultas cuando no hay pendientes')
+        parser.add_argument('--una-vez', action='store_true', help='Termina cuando no quedan pendientes')
+
+    def handle(self, *args, **options):
+        despachador = Despachador(hilos=options['hilos'])
+        total_enviados = 0
+        total_fallidos = 0
+        inicio = time.perf_counter()
+
+        try:
+            while True:
+                lote = reservar_lote(options['lote'])
+                if not lote:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['espera'])
+                    continue
+
+                inicio_lote = time.perf_counter()
+                enviados, fallidos = despachador.procesar(lote)
+                duracion = time.perf_counter() - inicio_lote
+                total_enviados += enviados
+                total_fallidos += fallidos
+
+                self.stdout.write(
+                    f'Lote de {len(lote)}: {enviados} enviados, {fallidos} con error '
+                    f'({len(lote) / duracion:.1f} msg/s)'
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Interrumpido')
+
+        duracion = time.perf_counter() - inicio
+        total = total_enviados + total_fallidos
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_enviados} enviados, {total_fallidos} con error en {duracion:.1f}s '
+            f'({total / duracion if duracion else 0:.1f} msg/s)'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.importacion import LECTORES, TAMANO_LOTE, importar_clientes
+
+
+class Command(BaseCommand):
+    """
+    Importa clientes desde un CSV o JSON lines.
+
+    Uso: python manage.py importar_clientes socios.csv [--formato csv] [--lote 1000]
+    """
+    help = 'Alta masiva de clientes desde un archivo CSV o JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta al archivo a importar')
+        parser.add_argument('--formato', choices=sorted(LECTORES), help='Por defecto según la extensión')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        formato = options['formato'] or ruta.rsplit('.', 1)[-1].lower()
+        if formato not in LECTORES:
+            raise CommandError(f'Formato no soportado: {formato} (usar --formato csv o jsonl)')
+
+        try:
+            with open(ruta, 'rb') as archivo:
+                reporte = importar_clientes(LECTORES[formato](archivo), tamano_lote=options['lote'])
+        except OSError as error:
+            raise CommandError(f'No se pudo abrir el archivo: {error}')
+
+        for error in reporte['errores']:
+            detalle = '; '.join(
+                f"{campo}: {' '.join(str(m) for m in mensajes)}"
+                for campo, mensajes in error['errores'].items()
+            )
+            self.stderr.write(f"Fila {error['fila']}: {detalle}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{reporte['creados']} de {reporte['filas']} clientes importados "
+            f"({len(reporte['errores'])} con errores)"
+        ))
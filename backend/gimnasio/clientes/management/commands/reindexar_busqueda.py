@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from clientes.busqueda import indexar_clientes
+from clientes.models import Cliente, TokenBusqueda
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice de búsqueda de clientes.
+
+    Uso: python manage.py reindexar_busqueda [--lote 2000]
+    """
+    help = 'Reconstruye la tabla de tokens de búsqueda de clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Clientes por lote')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        campos = ['id', 'nombre', 'apellido', 'dni', 'email', 'telefono']
+
+        # Borra tokens huérfanos que pudieran haber quedado
+        TokenBusqueda.objects.exclude(cliente_id__in=Cliente.objects.values('id')).delete()
+
+        # Recorre por rangos de id: memoria constante sin importar el tamaño
+        ultimo_id = 0
+        total_clientes = 0
+        total_tokens = 0
+        while True:
+            clientes = list(
+                Cliente.objects.filter(id__gt=ultimo_id).order_by('id').only(*campos)[:lote]
+            )
+            if not clientes:
+                break
+
+            total_tokens += indexar_clientes(clientes)
+            total_clientes += len(clientes)
+            ultimo_id = clientes[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_clientes} clientes indexados ({total_tokens} tokens)'
+        ))
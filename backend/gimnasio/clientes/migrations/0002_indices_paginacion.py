@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(fields=['fecha_programada'], name='recordatorio_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def indexar_existentes(apps, schema_editor):
+    from clientes.busqueda import tokens_cliente
+
+    Cliente = apps.get_model('clientes', 'Cliente')
+    TokenBusqueda = apps.get_model('clientes', 'TokenBusqueda')
+    tokens = [
+        TokenBusqueda(cliente_id=cliente.pk, token=token)
+        for cliente in Cliente.objects.iterator()
+        for token in tokens_cliente(cliente)
+    ]
+    TokenBusqueda.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens_busqueda', to='clientes.cliente')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'cliente'], name='token_busqueda_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
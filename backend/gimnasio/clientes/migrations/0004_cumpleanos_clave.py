@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:54
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def calcular_claves(apps, schema_editor):
+    Cliente = apps.get_model('clientes', 'Cliente')
+    Cliente.objects.update(
+        cumpleanos_clave=ExtractMonth('fecha_nacimiento') * 100 + ExtractDay('fecha_nacimiento')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_token_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='cumpleanos_clave',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_claves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['activo', 'cumpleanos_clave'], name='cliente_cumpleanos_idx'),
+        ),
+    ]
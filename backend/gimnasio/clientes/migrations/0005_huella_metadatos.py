@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:59
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def calcular_metadatos(apps, schema_editor):
+    Huella = apps.get_model('clientes', 'Huella')
+    pendientes = []
+    for huella in Huella.objects.only('id', 'huella_data').iterator(chunk_size=500):
+        datos = bytes(huella.huella_data)
+        huella.huella_hash = hashlib.sha256(datos).hexdigest()
+        huella.tamano = len(datos)
+        pendientes.append(huella)
+        if len(pendientes) >= 500:
+            Huella.objects.bulk_update(pendientes, ['huella_hash', 'tamano'])
+            pendientes = []
+    if pendientes:
+        Huella.objects.bulk_update(pendientes, ['huella_hash', 'tamano'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_cumpleanos_clave'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='huella',
+            name='comprimida',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='huella',
+            name='huella_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='huella',
+            name='tamano',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_metadatos, migrations.RunPython.noop),
+    ]
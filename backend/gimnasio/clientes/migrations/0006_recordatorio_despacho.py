@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_huella_metadatos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatorio',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='reservado_hasta',
+            field=models.DateTimeField(blank=True, help_text='Tomado por un worker hasta esta hora', null=True),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='ultimo_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='recordatorio',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('cancelado', 'Cancelado'), ('fallido', 'Fallido')], default='pendiente', max_length=20),
+        ),
+    ]
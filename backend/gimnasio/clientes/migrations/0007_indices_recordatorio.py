@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0006_recordatorio_despacho'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(fields=['estado', 'fecha_programada'], name='recordatorio_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(fields=['cliente', 'estado'], name='recordatorio_cliente_idx'),
+        ),
+    ]
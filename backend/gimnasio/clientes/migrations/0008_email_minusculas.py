@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:10
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def pasar_a_minusculas(apps, schema_editor):
+    Cliente = apps.get_model('clientes', 'Cliente')
+    Cliente.objects.update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_indices_recordatorio'),
+    ]
+
+    operations = [
+        migrations.RunPython(pasar_a_minusculas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0008_email_minusculas'),
+        ('membresias', '0005_indice_solapamiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatorio',
+            name='membresia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recordatorios', to='membresias.membresia'),
+        ),
+        migrations.AddConstraint(
+            model_name='recordatorio',
+            constraint=models.UniqueConstraint(fields=('membresia', 'tipo'), name='recordatorio_membresia_tipo_unico'),
+        ),
+    ]
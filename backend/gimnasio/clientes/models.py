@@ -1,9 +1,78 @@
+import hashlib
+import zlib
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, CharField, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Concat, ExtractYear
+from django.utils import timezone
 from datetime import timedelta
 
 # Create your models here.
 # clientes/models.py
 
+def clave_cumpleanos(fecha):
+    """Mes y día como un entero MMDD (22/12 -> 1222), ordenable e indexable"""
+    return fecha.month * 100 + fecha.day
+
+
+class ClienteQuerySet(models.QuerySet):
+    """Campos calculados en la base en lugar de en Python, fila por fila"""
+    
+    def con_datos_calculados(self, hoy=None):
+        """Anota nombre_completo y edad (a la fecha `hoy`, por defecto la local)"""
+        hoy = hoy or timezone.localdate()
+        
+        # Resta 1 si todavía no cumplió años este año
+        no_cumplio = Case(
+            When(cumpleanos_clave__gt=clave_cumpleanos(hoy), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        
+        return self.annotate(
+            nombre_completo=Concat('nombre', Value(' '), 'apellido', output_field=CharField()),
+            edad=Value(hoy.year) - ExtractYear('fecha_nacimiento') - no_cumplio,
+        )
+    
+    def con_recordatorios_pendientes(self):
+        """Anota cantidad_recordatorios_pendientes con un COUNT agrupado"""
+        return self.annotate(
+            cantidad_recordatorios_pendientes=Count(
+                'recordatorios',
+                filter=Q(recordatorios__estado='pendiente')
+            )
+        )
+    
+    def cumplen_entre(self, desde, hasta):
+        """
+        Clientes que cumplen años entre dos fechas (inclusive).
+        
+        Es un rango sobre cumpleanos_clave, así que usa el índice. Si la
+        ventana cruza fin de año se parte en dos rangos (dic... | ...ene).
+        """
+        if (hasta - desde).days >= 365:
+            return self.all()
+        
+        inicio = clave_cumpleanos(desde)
+        fin = clave_cumpleanos(hasta)
+        if inicio <= fin:
+            return self.filter(cumpleanos_clave__gte=inicio, cumpleanos_clave__lte=fin)
+        return self.filter(Q(cumpleanos_clave__gte=inicio) | Q(cumpleanos_clave__lte=fin))
+    
+    def por_proximo_cumpleanos(self, hoy):
+        """
+        Anota orden_cumpleanos: la clave MMDD, +10000 si el cumpleaños de
+        este año ya pasó. Ordenar por ella es ordenar por días hasta el
+        próximo cumpleaños aunque la ventana cruce fin de año.
+        """
+        return self.annotate(orden_cumpleanos=Case(
+            When(cumpleanos_clave__gte=clave_cumpleanos(hoy), then=F('cumpleanos_clave')),
+            default=F('cumpleanos_clave') + Value(10000),
+            output_field=IntegerField()
+        ))
+
+
 class Cliente(models.Model):
     nombre = models.CharField(max_length=100)  #lautaro
     apellido = models.CharField(max_length=100) #piacenza
@@ -17,18 +86,100 @@ class Cliente(models.Model):
     fecha_registro = models.DateTimeField(auto_now_add=True) 
     observaciones = models.TextField(blank=True) #muy fachero
     
+    # Se calcula en save() a partir de fecha_nacimiento (MMDD)
+    cumpleanos_clave = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    objects = ClienteQuerySet.as_manager()
+    
+    # Campos que alimentan el índice de búsqueda (ver clientes/busqueda.py)
+    CAMPOS_BUSQUEDA = {'nombre', 'apellido', 'dni', 'email', 'telefono'}
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['activo', 'cumpleanos_clave'], name='cliente_cumpleanos_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
+    
+    def save(self, *args, **kwargs):
+        if self.fecha_nacimiento:
+            self.cumpleanos_clave = clave_cumpleanos(self.fecha_nacimiento)
+            if kwargs.get('update_fields') is not None and 'fecha_nacimiento' in kwargs['update_fields']:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'cumpleanos_clave'}
+        
+        super().save(*args, **kwargs)
+        
+        # Reindexar solo si cambió algún campo buscable
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.CAMPOS_BUSQUEDA.intersection(update_fields):
+            from .busqueda import indexar_clientes
+            indexar_clientes([self])
+
+
+class TokenBusqueda(models.Model):
+    """Token normalizado (sin acentos, minúsculas) para buscar clientes por prefijo"""
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='tokens_busqueda')
+    token = models.CharField(max_length=100)
+    
+    class Meta:
+        indexes = [
+            # token primero para el LIKE 'xxx%', cliente para resolver sin ir a la tabla
+            models.Index(fields=['token', 'cliente'], name='token_busqueda_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.token} -> {self.cliente_id}"
 
 
 class Huella(models.Model):
     cliente = models.OneToOneField(Cliente, on_delete=models.CASCADE, related_name='huella') #lautaro
-    huella_data = models.BinaryField()  # O TextField si usás base64 
+    huella_data = models.BinaryField()  # Usar la propiedad `datos` (puede estar comprimido)
     fecha_registro = models.DateTimeField(auto_now_add=True)
     activa = models.BooleanField(default=True)
     
+    # Metadatos del template, para no tener que leer el blob
+    huella_hash = models.CharField(max_length=64, blank=True, editable=False)  # sha256, sirve de ETag
+    tamano = models.PositiveIntegerField(default=0, editable=False)  # bytes sin comprimir
+    comprimida = models.BooleanField(default=False, editable=False)
+    
     def __str__(self):
         return f"Huella de {self.cliente}"
+    
+    @property
+    def datos(self):
+        """Template original (descomprime si hace falta)"""
+        datos = bytes(self.huella_data)
+        if self.comprimida:
+            datos = zlib.decompress(datos)
+        return datos
+    
+    @datos.setter
+    def datos(self, valor):
+        """Guarda el template, comprimido si HUELLAS_COMPRIMIR está activo"""
+        valor = bytes(valor)
+        self.huella_hash = hashlib.sha256(valor).hexdigest()
+        self.tamano = len(valor)
+        self.comprimida = getattr(settings, 'HUELLAS_COMPRIMIR', False)
+        self.huella_data = zlib.compress(valor) if self.comprimida else valor
+
+
+class RecordatorioQuerySet(models.QuerySet):
+    """Filtros de agenda pensados para el índice (estado, fecha_programada)"""
+    
+    def pendientes(self):
+        return self.filter(estado='pendiente')
+    
+    def programados_entre(self, inicio, fin):
+        """Rango semiabierto [inicio, fin) sobre fecha_programada (sin __date)"""
+        return self.filter(fecha_programada__gte=inicio, fecha_programada__lt=fin)
+    
+    def para_listado(self):
+        """Columnas de RecordatorioListSerializer, con el cliente en el mismo JOIN"""
+        return self.select_related('cliente').only(
+            'id', 'cliente_id', 'tipo', 'canal', 'estado', 'fecha_programada', 'fecha_envio',
+            'cliente__nombre', 'cliente__apellido'
+        )
 
 
 class Recordatorio(models.Model):
@@ -45,6 +196,7 @@ class Recordatorio(models.Model):
         ('pendiente', 'Pendiente'),
         ('enviado', 'Enviado'),
         ('cancelado', 'Cancelado'),
+        ('fallido', 'Fallido'),
     ]
     
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='recordatorios') #lautaro
@@ -54,6 +206,31 @@ class Recordatorio(models.Model):
     fecha_programada = models.DateTimeField() #####
     fecha_envio = models.DateTimeField(null=True, blank=True) #####
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    # Membresía que originó el aviso (los de vencimiento, ver membresias/vencimientos.py)
+    membresia = models.ForeignKey(
+        'membresias.Membresia', on_delete=models.SET_NULL, null=True, blank=True, related_name='recordatorios'
+    )
+    
+    # Despacho (ver clientes/despacho.py)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True)
+    reservado_hasta = models.DateTimeField(null=True, blank=True, help_text='Tomado por un worker hasta esta hora')
+    
+    objects = RecordatorioQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Orden de la paginación por cursor
+            models.Index(fields=['fecha_programada'], name='recordatorio_fecha_idx'),
+            # Pendientes por fecha (/pendientes/, /hoy/ y el despachador)
+            models.Index(fields=['estado', 'fecha_programada'], name='recordatorio_estado_fecha_idx'),
+            # Recordatorios de un cliente por estado
+            models.Index(fields=['cliente', 'estado'], name='recordatorio_cliente_idx'),
+        ]
+        constraints = [
+            # Un aviso de cada tipo por membresía (los NULL no chocan entre sí)
+            models.UniqueConstraint(fields=['membresia', 'tipo'], name='recordatorio_membresia_tipo_unico'),
+        ]
     
     def __str__(self):
         return f"Recordatorio {self.tipo} - {self.cliente}"
@@ -1,5 +1,9 @@
+import base64
+import binascii
+
 from rest_framework import serializers
-from .models import Cliente, Recordatorio
+from rest_framework.validators import UniqueValidator
+from .models import Cliente, Huella, Recordatorio
 
 
 # ============================================
@@ -14,9 +18,14 @@ class ClienteSerializer(serializers.ModelSerializer):
 
 
 class ClienteListSerializer(serializers.ModelSerializer):
-    """Serializer para listar clientes"""
-    nombre_completo = serializers.SerializerMethodField()
-    edad = serializers.SerializerMethodField()
+    """
+    Serializer para listar clientes.
+    
+    nombre_completo y edad vienen anotados por
+    Cliente.objects.con_datos_calculados().
+    """
+    nombre_completo = serializers.CharField(read_only=True)
+    edad = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Cliente
@@ -31,22 +40,6 @@ class ClienteListSerializer(serializers.ModelSerializer):
             'edad',
             'activo'
         ]
-    
-    def get_nombre_completo(self, obj):
-        """Nombre completo del cliente"""
-        return f"{obj.nombre} {obj.apellido}"
-    
-    def get_edad(self, obj):
-        """Calcular edad del cliente"""
-        from datetime import date
-        hoy = date.today()
-        edad = hoy.year - obj.fecha_nacimiento.year
-        
-        # Ajustar si no cumplió años todavía este año
-        if (hoy.month, hoy.day) < (obj.fecha_nacimiento.month, obj.fecha_nacimiento.day):
-            edad -= 1
-        
-        return edad
 
 
 class ClienteCreateSerializer(serializers.ModelSerializer):
@@ -65,6 +58,14 @@ class ClienteCreateSerializer(serializers.ModelSerializer):
             'activo',
             'observaciones'
         ]
+        extra_kwargs = {
+            # Sin distinguir mayúsculas, igual que el índice único en MySQL
+            'email': {'validators': [UniqueValidator(
+                queryset=Cliente.objects.all(),
+                lookup='iexact',
+                message='Ya existe un cliente con este email',
+            )]},
+        }
     
     def validate_dni(self, value):
         """Validar que el DNI tenga 8 dígitos"""
@@ -75,32 +76,84 @@ class ClienteCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El DNI solo puede contener números")
         
         return value
+    
+    def validate_email(self, value):
+        """Los emails se guardan en minúsculas (la unicidad no depende de mayúsculas)"""
+        return value.strip().lower()
 
 
 class ClienteDetalleSerializer(serializers.ModelSerializer):
-    """Serializer completo con información adicional"""
-    nombre_completo = serializers.SerializerMethodField()
-    edad = serializers.SerializerMethodField()
-    cantidad_recordatorios_pendientes = serializers.SerializerMethodField()
+    """
+    Serializer completo con información adicional.
+    
+    Los campos calculados vienen anotados por
+    con_datos_calculados() y con_recordatorios_pendientes().
+    """
+    nombre_completo = serializers.CharField(read_only=True)
+    edad = serializers.IntegerField(read_only=True)
+    cantidad_recordatorios_pendientes = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Cliente
         fields = '__all__'
+
+
+# ============================================
+# SERIALIZERS PARA HUELLA
+# ============================================
+
+class Base64BinaryField(serializers.Field):
+    """Datos binarios que viajan como texto base64 en el JSON"""
+    default_error_messages = {
+        'invalid': 'Los datos deben estar codificados en base64.',
+        'empty': 'Los datos no pueden estar vacíos.',
+    }
+    
+    def to_representation(self, value):
+        return base64.b64encode(bytes(value)).decode('ascii')
     
-    def get_nombre_completo(self, obj):
-        return f"{obj.nombre} {obj.apellido}"
+    def to_internal_value(self, data):
+        try:
+            datos = base64.b64decode(data, validate=True)
+        except (TypeError, ValueError, binascii.Error):
+            self.fail('invalid')
+        if not datos:
+            self.fail('empty')
+        return datos
+
+
+class HuellaSerializer(serializers.ModelSerializer):
+    """Serializer completo de Huella (huella_data en base64)"""
+    huella_data = Base64BinaryField(source='datos')
     
-    def get_edad(self, obj):
-        from datetime import date
-        hoy = date.today()
-        edad = hoy.year - obj.fecha_nacimiento.year
-        if (hoy.month, hoy.day) < (obj.fecha_nacimiento.month, obj.fecha_nacimiento.day):
-            edad -= 1
-        return edad
+    class Meta:
+        model = Huella
+        fields = ['id', 'cliente', 'huella_data', 'huella_hash', 'tamano', 'fecha_registro', 'activa']
+        read_only_fields = ['huella_hash', 'tamano']
     
-    def get_cantidad_recordatorios_pendientes(self, obj):
-        """Contar recordatorios pendientes"""
-        return obj.recordatorios.filter(estado='pendiente').count()
+    def validate_huella_data(self, datos):
+        """Todas las huellas activas tienen que tener el mismo largo (el índice compara bit a bit)"""
+        otras = Huella.objects.filter(activa=True)
+        if self.instance is not None:
+            otras = otras.exclude(pk=self.instance.pk)
+        tamano = otras.values_list('tamano', flat=True).first()
+        if tamano is not None and len(datos) != tamano:
+            raise serializers.ValidationError(
+                f'El template tiene {len(datos)} bytes y las huellas registradas tienen {tamano}.'
+            )
+        return datos
+
+
+class HuellaListSerializer(serializers.ModelSerializer):
+    """Para listar huellas: solo metadatos, sin el template"""
+    class Meta:
+        model = Huella
+        fields = ['id', 'cliente', 'huella_hash', 'tamano', 'fecha_registro', 'activa']
+
+
+class HuellaIdentificarSerializer(serializers.Serializer):
+    """Template leído por el lector, para buscarlo entre todas las huellas"""
+    huella_data = Base64BinaryField()
 
 
 # ============================================
@@ -112,6 +165,7 @@ class RecordatorioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recordatorio
         fields = '__all__'
+        read_only_fields = ['membresia', 'intentos', 'ultimo_error', 'reservado_hasta']
 
 
 class RecordatorioListSerializer(serializers.ModelSerializer):
@@ -172,4 +226,28 @@ class RecordatorioCreateSerializer(serializers.ModelSerializer):
                     "La fecha programada no puede ser en el pasado"
                 )
         
-        return data
\ No newline at end of file
+        return data
+
+
+class RecordatorioLoteSerializer(serializers.Serializer):
+    """
+    Selección de recordatorios para las acciones en lote:
+    una lista de ids o filtros (tipo, canal, cliente, rango de fechas).
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=10000)
+    tipo = serializers.ChoiceField(choices=Recordatorio.TIPO_CHOICES, required=False)
+    canal = serializers.ChoiceField(choices=Recordatorio.CANAL_CHOICES, required=False)
+    cliente = serializers.IntegerField(required=False)
+    fecha_desde = serializers.DateField(required=False)
+    fecha_hasta = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        """Exige ids o al menos un filtro: nunca se aplica a toda la tabla"""
+        if not data:
+            raise serializers.ValidationError("Indicar ids o al menos un filtro")
+        
+        if data.get('fecha_desde') and data.get('fecha_hasta'):
+            if data['fecha_hasta'] < data['fecha_desde']:
+                raise serializers.ValidationError("fecha_hasta no puede ser anterior a fecha_desde")
+        
+        return data
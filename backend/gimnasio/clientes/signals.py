@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gimnasio.cache import registrar_cambios_al_guardar
+from .huellas import NOMBRE_VERSION
+from .models import Huella
+
+
+# ============================================
+# SEÑALES: mantener el índice de huellas al día
+# ============================================
+# Cualquier alta, cambio o baja incrementa la versión compartida anotando
+# el id de la huella: cada worker la relee y la agrega o quita de su índice
+# en la próxima identificación (clientes/huellas.py). Se vuelve a anotar al
+# confirmar la transacción, así un worker que la releyó antes del commit
+# (todavía sin el cambio) la vuelve a leer.
+
+@receiver(post_save, sender=Huella)
+@receiver(post_delete, sender=Huella)
+def registrar_cambio_huella(sender, instance, **kwargs):
+    registrar_cambios_al_guardar(NOMBRE_VERSION, [instance.pk])
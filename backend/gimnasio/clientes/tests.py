@@ -1,3 +1,533 @@
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gimnasio.cache import obtener_version
+from gimnasio.fechas import rango_dias
+from gimnasio.testing import ConsultasConstantesMixin, PlanDeConsultaMixin, crear_cliente
+from .busqueda import tokens_cliente
+from .canales import Canal, ErrorEnvio
+from .despacho import DURACION_RESERVA, MAX_INTENTOS, Despachador, reservar_lote
+from .huellas import IndiceHuellas
+from .importacion import importar_clientes, leer_csv, leer_jsonl
+from .models import Cliente, Huella, Recordatorio, TokenBusqueda
+
+
+class RecordatorioAgendaTest(ConsultasConstantesMixin, PlanDeConsultaMixin, TestCase):
+    """Las consultas de agenda filtran por rango y usan el índice (estado, fecha_programada)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente(nombre='Lautaro', apellido='Piacenza')
+
+    def crear_recordatorio(self, fecha_programada, estado='pendiente'):
+        return Recordatorio.objects.create(
+            cliente=self.cliente,
+            tipo='deuda',
+            canal='whatsapp',
+            mensaje='Recordatorio',
+            fecha_programada=fecha_programada,
+            estado=estado,
+        )
+
+    def test_hoy_respeta_el_dia_local(self):
+        hoy = timezone.localdate()
+        inicio, fin = rango_dias(hoy, hoy)
+        de_hoy = self.crear_recordatorio(inicio)
+        self.crear_recordatorio(inicio - timedelta(microseconds=1))
+        self.crear_recordatorio(fin)
+        self.crear_recordatorio(inicio + timedelta(hours=1), estado='enviado')
+
+        respuesta = self.client.get('/api/clientes/recordatorios/hoy/')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['id'] for r in respuesta.data['results']], [de_hoy.id])
+
+    def test_agenda_no_usa_funciones_sobre_la_columna(self):
+        hoy = timezone.localdate()
+        sql = str(Recordatorio.objects.pendientes().programados_entre(*rango_dias(hoy, hoy)).query)
+
+        # La columna se compara tal cual, sin envolverla en una función
+        self.assertNotRegex(sql, r'\w+\([^()]*fecha_programada')
+
+    def test_plan_usa_indice_estado_fecha(self):
+        hoy = timezone.localdate()
+        consultas = [
+            Recordatorio.objects.pendientes().programados_entre(*rango_dias(hoy, hoy)),
+            Recordatorio.objects.pendientes().order_by('-fecha_programada', '-id'),
+        ]
+        for consulta in consultas:
+            with self.subTest(sql=str(consulta.query)):
+                self.assertUsaIndice(consulta, 'recordatorio_estado_fecha_idx')
+
+    def test_plan_usa_indice_cliente_estado(self):
+        consulta = Recordatorio.objects.filter(cliente=self.cliente, estado='pendiente')
+        self.assertUsaIndice(consulta, 'recordatorio_cliente_idx')
+
+    def test_listados_sin_consultas_por_fila(self):
+        def crear(cantidad):
+            for _ in range(cantidad):
+                self.crear_recordatorio(timezone.now())
+
+        urls = [
+            '/api/clientes/recordatorios/',
+            '/api/clientes/recordatorios/pendientes/',
+            '/api/clientes/recordatorios/hoy/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertConsultasConstantes(url, crear)
+
+
+class BusquedaPaginadaTest(TestCase):
+    """Con búsqueda, las páginas avanzan por (relevancia, id) aunque casi todos empaten"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for numero in range(70):
+            crear_cliente(nombre='Juan' if numero % 2 else 'Pedro', apellido='Gomez')
+
+    def recorrer(self, url):
+        ids = []
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            ids += [cliente['id'] for cliente in respuesta.data['results']]
+            url = respuesta.data['next']
+        return ids
+
+    def test_empates_de_relevancia_no_repiten_ni_cortan(self):
+        for url, cantidad in [
+            ('/api/clientes/cliente/?search=gomez&page_size=7', 70),
+            ('/api/clientes/cliente/?search=gomez%20juan&page_size=10', 35),
+        ]:
+            with self.subTest(url=url):
+                ids = self.recorrer(url)
+                self.assertEqual(len(ids), cantidad)
+                self.assertEqual(len(set(ids)), cantidad)
+
+
+class HuellasTest(TestCase):
+    """Alta de huellas e identificación contra el índice en memoria"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente()
+
+    def registrar(self, datos):
+        return self.client.post('/api/clientes/huellas/', {
+            'cliente': self.cliente.pk,
+            'huella_data': base64.b64encode(datos).decode('ascii'),
+        }, format='json')
+
+    def identificar(self, datos):
+        return self.client.post('/api/clientes/huellas/identificar/', {
+            'huella_data': base64.b64encode(datos).decode('ascii'),
+        }, format='json')
+
+    def test_otro_worker_ve_altas_y_bajas(self):
+        # Otro proceso con su propio índice, ya cargado antes del alta
+        otro_worker = IndiceHuellas()
+        otro_worker.asegurar_actualizado()
+        self.assertEqual(len(otro_worker), 0)
+
+        # Los cambios se aplican de a uno, sin recargar el índice entero
+        with mock.patch.object(otro_worker, 'cargar') as cargar:
+            self.assertEqual(self.registrar(bytes(range(64))).status_code, 201)
+            otro_worker.asegurar_actualizado()
+            self.assertEqual(otro_worker.identificar(bytes(range(64)))[0], self.cliente.pk)
+
+            Huella.objects.get().delete()
+            otro_worker.asegurar_actualizado()
+            self.assertIsNone(otro_worker.identificar(bytes(range(64))))
+        cargar.assert_not_called()
+
+    def test_sin_registro_de_cambios_recarga_todo(self):
+        otro_worker = IndiceHuellas()
+        otro_worker.asegurar_actualizado()
+
+        self.registrar(bytes(range(64)))
+        # El registro de la versión se perdió (desalojado del cache)
+        cache.delete(f"cambios:huellas:{obtener_version('huellas')}")
+
+        with mock.patch.object(otro_worker, 'cargar', wraps=otro_worker.cargar) as cargar:
+            otro_worker.asegurar_actualizado()
+        cargar.assert_called_once()
+        self.assertEqual(otro_worker.identificar(bytes(range(64)))[0], self.cliente.pk)
+
+    def test_identificar_despues_de_desactivar(self):
+        self.registrar(bytes(range(64)))
+        self.assertEqual(self.identificar(bytes(range(64))).status_code, 200)
+
+        huella = Huella.objects.get()
+        self.client.post(f'/api/clientes/huellas/{huella.pk}/desactivar/')
+
+        self.assertEqual(self.identificar(bytes(range(64))).status_code, 404)
+
+    def test_largo_distinto_se_rechaza(self):
+        self.registrar(bytes(range(64)))
+
+        respuesta = self.registrar(bytes(range(32)))
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('huella_data', respuesta.data)
+        self.assertEqual(Huella.objects.count(), 1)
+
+
+class RecordatorioLoteTest(TestCase):
+    """Acciones en lote sobre recordatorios pendientes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        cliente = crear_cliente()
+        self.recordatorios = [
+            Recordatorio.objects.create(
+                cliente=cliente,
+                tipo='deuda',
+                canal='email',
+                mensaje='Recordatorio',
+                fecha_programada=timezone.now(),
+                estado=estado,
+            )
+            for estado in ['pendiente', 'pendiente', 'enviado']
+        ]
+
+    def test_omitidos_son_los_no_actualizados(self):
+        ids = [recordatorio.pk for recordatorio in self.recordatorios] + [999999]
+
+        respuesta = self.client.post('/api/clientes/recordatorios/cancelar_lote/', {'ids': ids}, format='json')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['actualizados'], 2)
+        self.assertEqual(respuesta.data['omitidos'], [self.recordatorios[2].pk, 999999])
+        self.assertEqual(
+            list(Recordatorio.objects.order_by('id').values_list('estado', flat=True)),
+            ['cancelado', 'cancelado', 'enviado']
+        )
+
+
+class ImportacionClientesTest(TestCase):
+    """Alta masiva desde CSV/JSON lines: unicidad entre lotes, errores por fila e índices"""
+
+    ENCABEZADO = 'nombre,apellido,dni,email,telefono,contacto_emergencia,fecha_nacimiento\n'
+
+    def fila(self, dni, email, fecha_nacimiento='1990-03-15'):
+        return f'Ana,Pérez,{dni},{email},1155550000,Juan 1144440000,{fecha_nacimiento}\n'
+
+    def importar_csv(self, *filas, tamano_lote=2):
+        contenido = (self.ENCABEZADO + ''.join(filas)).encode('utf-8')
+        return importar_clientes(leer_csv(io.BytesIO(contenido)), tamano_lote=tamano_lote)
+
+    def errores_por_fila(self, reporte):
+        return {error['fila']: set(error['errores']) for error in reporte['errores']}
+
+    def test_repetidos_contra_la_base_en_distintos_lotes(self):
+        crear_cliente(dni='30000001', email='existente@example.com')
+
+        reporte = self.importar_csv(
+            self.fila('30000002', 'nuevo1@example.com'),
+            self.fila('30000001', 'otro@example.com'),          # DNI ya cargado
+            self.fila('30000003', 'Existente@Example.COM'),     # email ya cargado, otras mayúsculas
+            self.fila('30000002', 'nuevo2@example.com'),        # DNI del primer lote
+        )
+
+        self.assertEqual(reporte['filas'], 4)
+        self.assertEqual(reporte['creados'], 1)
+        self.assertEqual(self.errores_por_fila(reporte), {2: {'dni'}, 3: {'email'}, 4: {'dni'}})
+        self.assertEqual(Cliente.objects.count(), 2)
+
+    def test_repetidos_dentro_del_archivo_gana_el_primero(self):
+        reporte = self.importar_csv(
+            self.fila('30000001', 'ana@example.com'),
+            self.fila('30000002', 'ANA@example.com'),
+            tamano_lote=10,
+        )
+
+        self.assertEqual(reporte['creados'], 1)
+        self.assertEqual(self.errores_por_fila(reporte), {2: {'email'}})
+        self.assertEqual(Cliente.objects.get().dni, '30000001')
+
+    def test_emails_se_guardan_en_minusculas(self):
+        self.importar_csv(self.fila('30000001', 'Ana.Perez@Example.com'))
+
+        self.assertEqual(Cliente.objects.get().email, 'ana.perez@example.com')
+
+    def test_jsonl_con_linea_mal_formada_sigue_con_el_resto(self):
+        valida = {
+            'nombre': 'Ana', 'apellido': 'Pérez', 'telefono': '1155550000',
+            'contacto_emergencia': 'Juan', 'fecha_nacimiento': '1990-03-15',
+        }
+        lineas = [
+            json.dumps({**valida, 'dni': '30000001', 'email': 'a@example.com'}),
+            '{"nombre": "Roto",',
+            json.dumps({**valida, 'dni': '30000002', 'email': 'b@example.com'}),
+        ]
+
+        reporte = importar_clientes(leer_jsonl(io.BytesIO('\n'.join(lineas).encode('utf-8'))))
+
+        self.assertEqual(reporte['creados'], 2)
+        self.assertEqual(self.errores_por_fila(reporte), {2: {'non_field_errors'}})
+
+    def test_csv_con_campo_gigante_sigue_con_el_resto(self):
+        reporte = self.importar_csv(
+            self.fila('30000001', 'a@example.com'),
+            'Ana,' + 'x' * (csv.field_size_limit() + 1) + '\n',
+            self.fila('30000002', 'b@example.com'),
+        )
+
+        self.assertEqual(reporte['creados'], 2)
+        self.assertEqual(self.errores_por_fila(reporte), {2: {'non_field_errors'}})
+
+    def test_importados_quedan_indexados_y_con_clave_de_cumpleanos(self):
+        reporte = self.importar_csv(
+            self.fila('30000001', 'a@example.com', '1990-03-15'),
+            self.fila('30000002', 'b@example.com', '1985-12-31'),
+            self.fila('30000003', 'c@example.com', '2000-01-01'),
+        )
+
+        self.assertEqual(reporte['creados'], 3)
+        self.assertEqual(
+            dict(Cliente.objects.values_list('dni', 'cumpleanos_clave')),
+            {'30000001': 315, '30000002': 1231, '30000003': 101}
+        )
+        for cliente in Cliente.objects.all():
+            self.assertEqual(
+                set(TokenBusqueda.objects.filter(cliente=cliente).values_list('token', flat=True)),
+                tokens_cliente(cliente)
+            )
+
+    def test_endpoint_detecta_formato_por_extension(self):
+        archivo = io.BytesIO((self.ENCABEZADO + self.fila('30000001', 'a@example.com')).encode('utf-8'))
+        archivo.name = 'socios.csv'
+
+        respuesta = APIClient().post('/api/clientes/cliente/importar/', {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['creados'], 1)
+        self.assertEqual(respuesta.data['errores'], [])
+
+
+class ClienteEmailTest(TestCase):
+    """El email es único sin importar mayúsculas y se guarda en minúsculas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.datos = {
+            'nombre': 'Ana', 'apellido': 'Pérez', 'dni': '30000001', 'email': 'Ana@Example.com',
+            'telefono': '1155550000', 'contacto_emergencia': 'Juan', 'fecha_nacimiento': '1990-03-15',
+        }
+
+    def test_alta_guarda_en_minusculas_y_rechaza_otras_mayusculas(self):
+        respuesta = self.client.post('/api/clientes/cliente/', self.datos, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(Cliente.objects.get().email, 'ana@example.com')
+
+        respuesta = self.client.post(
+            '/api/clientes/cliente/', {**self.datos, 'dni': '30000002', 'email': 'ANA@example.com'}, format='json'
+        )
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('email', respuesta.data)
+
+
+class CanalDePrueba(Canal):
+    """Registra los envíos; falla para los mensajes que empiezan con 'falla'"""
+
+    def __init__(self):
+        self.enviados = []
+
+    def enviar(self, recordatorio):
+        if recordatorio.mensaje.startswith('falla'):
+            raise ErrorEnvio('Proveedor caído')
+        self.enviados.append(recordatorio.id)
+
+
+class DespachoRecordatoriosTest(TestCase):
+    """Reserva, envío y resultado de los recordatorios pendientes"""
+
+    def setUp(self):
+        self.cliente = crear_cliente()
+        self.canal = CanalDePrueba()
+        self.despachador = Despachador(canales={'email': self.canal, 'whatsapp': self.canal}, hilos=2)
+
+    def crear_recordatorio(self, mensaje='Hola', **campos):
+        campos.setdefault('fecha_programada', timezone.now() - timedelta(minutes=1))
+        return Recordatorio.objects.create(
+            cliente=self.cliente, tipo='deuda', canal='email', mensaje=mensaje, **campos
+        )
+
+    def despachar(self, ahora=None):
+        return self.despachador.procesar(reservar_lote(ahora=ahora))
+
+    def test_envio_exitoso_marca_enviado(self):
+        recordatorio = self.crear_recordatorio()
+        futuro = self.crear_recordatorio(fecha_programada=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(self.despachar(), (1, 0))
+
+        recordatorio.refresh_from_db()
+        self.assertEqual(recordatorio.estado, 'enviado')
+        self.assertEqual(recordatorio.intentos, 1)
+        self.assertIsNotNone(recordatorio.fecha_envio)
+        self.assertIsNone(recordatorio.reservado_hasta)
+        self.assertEqual(self.canal.enviados, [recordatorio.id])
+        futuro.refresh_from_db()
+        self.assertEqual(futuro.estado, 'pendiente')
+
+    def test_fallas_suman_intentos_y_terminan_en_fallido(self):
+        recordatorio = self.crear_recordatorio(mensaje='falla siempre')
+        ahora = timezone.now()
+
+        for intento in range(1, MAX_INTENTOS + 1):
+            self.assertEqual(self.despachar(ahora=ahora), (0, 1))
+            recordatorio.refresh_from_db()
+            self.assertEqual(recordatorio.intentos, intento)
+            self.assertEqual(recordatorio.ultimo_error, 'Proveedor caído')
+            # Mientras dura la espera del reintento no se vuelve a tomar
+            self.assertEqual(reservar_lote(ahora=ahora), [])
+            if recordatorio.reservado_hasta:
+                ahora = recordatorio.reservado_hasta + timedelta(seconds=1)
+
+        self.assertEqual(recordatorio.estado, 'fallido')
+        self.assertIsNone(recordatorio.reservado_hasta)
+        self.assertEqual(reservar_lote(ahora=ahora + timedelta(days=1)), [])
+
+    def test_canal_no_configurado_cuenta_como_falla(self):
+        recordatorio = self.crear_recordatorio()
+        self.despachador.canales = {}
+
+        self.assertEqual(self.despachar(), (0, 1))
+
+        recordatorio.refresh_from_db()
+        self.assertEqual(recordatorio.ultimo_error, 'Canal "email" no configurado')
+
+    def test_cancelado_durante_el_envio_no_se_pisa(self):
+        recordatorio = self.crear_recordatorio()
+        lote = reservar_lote()
+        Recordatorio.objects.filter(pk=recordatorio.pk).update(estado='cancelado')
+
+        self.despachador.procesar(lote)
+
+        recordatorio.refresh_from_db()
+        self.assertEqual(recordatorio.estado, 'cancelado')
+        self.assertEqual(recordatorio.intentos, 0)
+
+    def test_reserva_vencida_la_retoma_otro_worker(self):
+        recordatorio = self.crear_recordatorio()
+        ahora = timezone.now()
+
+        self.assertEqual([r.id for r in reservar_lote(ahora=ahora)], [recordatorio.id])
+        # El primer worker murió sin guardar resultados
+        self.assertEqual(reservar_lote(ahora=ahora + timedelta(minutes=1)), [])
+
+        despues = ahora + DURACION_RESERVA + timedelta(seconds=1)
+        self.assertEqual(self.despachar(ahora=despues), (1, 0))
+        recordatorio.refresh_from_db()
+        self.assertEqual(recordatorio.estado, 'enviado')
+
+    def test_comando_envia_con_archivo_canal(self):
+        enviados = [self.crear_recordatorio(mensaje=f'Mensaje {n}') for n in range(3)]
+        self.crear_recordatorio(estado='cancelado')
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'enviados.jsonl')
+            canales = {'email': 'clientes.canales.ArchivoCanal', 'whatsapp': 'clientes.canales.ArchivoCanal'}
+            salida = io.StringIO()
+            with self.settings(RECORDATORIOS_CANALES=canales, RECORDATORIOS_ARCHIVO=ruta):
+                call_command('despachar_recordatorios', '--una-vez', '--lote', '2', stdout=salida)
+
+            with open(ruta, encoding='utf-8') as archivo:
+                lineas = [json.loads(linea) for linea in archivo]
+
+        self.assertEqual(sorted(linea['recordatorio'] for linea in lineas), [r.id for r in enviados])
+        self.assertIn('3 enviados, 0 con error', salida.getvalue())
+        self.assertEqual(
+            Recordatorio.objects.filter(id__in=[r.id for r in enviados], estado='enviado').count(), 3
+        )
+
+
+class ClienteEdadTest(TestCase):
+    """edad calculada en la base alrededor del cumpleaños"""
+
+    def edad(self, cliente, hoy):
+        return Cliente.objects.con_datos_calculados(hoy).get(pk=cliente.pk).edad
+
+    def test_dia_anterior_del_y_posterior_al_cumpleanos(self):
+        cliente = crear_cliente(fecha_nacimiento=date(1990, 6, 15))
+
+        self.assertEqual(self.edad(cliente, date(2026, 6, 14)), 35)
+        self.assertEqual(self.edad(cliente, date(2026, 6, 15)), 36)
+        self.assertEqual(self.edad(cliente, date(2026, 6, 16)), 36)
+
+    def test_nacido_un_29_de_febrero(self):
+        cliente = crear_cliente(fecha_nacimiento=date(2000, 2, 29))
+
+        self.assertEqual(self.edad(cliente, date(2027, 2, 28)), 26)
+        self.assertEqual(self.edad(cliente, date(2027, 3, 1)), 27)
+        self.assertEqual(self.edad(cliente, date(2028, 2, 29)), 28)
+
+    def test_detalle_usa_la_fecha_local(self):
+        cliente = crear_cliente()
+
+        detalle = APIClient().get(f'/api/clientes/cliente/{cliente.pk}/')
+
+        self.assertEqual(detalle.status_code, 200)
+        self.assertEqual(detalle.data['edad'], self.edad(cliente, timezone.localdate()))
+        self.assertEqual(detalle.data['nombre_completo'], f'{cliente.nombre} {cliente.apellido}')
+
+
+class CumpleanosProximosTest(TestCase):
+    """Ventana de cumpleaños que cruza fin de año, ordenada por cercanía"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clientes = {
+            fecha: crear_cliente(fecha_nacimiento=fecha)
+            for fecha in [
+                date(1990, 1, 2), date(1985, 12, 30), date(2000, 12, 28),
+                date(1995, 1, 5), date(1970, 12, 29), date(1988, 12, 31),
+            ]
+        }
+        crear_cliente(fecha_nacimiento=date(1992, 12, 30), activo=False)
+
+    def pedir(self, url):
+        # "Hoy" es el 29 de diciembre en la zona horaria local
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2026, 12, 29)):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def esperados(self, *fechas):
+        return [self.clientes[fecha].id for fecha in fechas]
+
+    def test_cruza_el_31_de_diciembre_en_orden(self):
+        datos = self.pedir('/api/clientes/cliente/cumpleanos_proximos/?dias=7')
+
+        self.assertEqual(
+            [cliente['id'] for cliente in datos['results']],
+            self.esperados(date(1970, 12, 29), date(1985, 12, 30), date(1988, 12, 31), date(1990, 1, 2))
+        )
+
+    def test_paginas_siguen_el_orden(self):
+        ids = []
+        url = '/api/clientes/cliente/cumpleanos_proximos/?dias=366&page_size=2'
+        while url:
+            datos = self.pedir(url)
+            ids.extend(cliente['id'] for cliente in datos['results'])
+            url = datos['next']
 
-# Create your tests here.
+        self.assertEqual(ids, self.esperados(
+            date(1970, 12, 29), date(1985, 12, 30), date(1988, 12, 31),
+            date(1990, 1, 2), date(1995, 1, 5), date(2000, 12, 28),
+        ))
@@ -31,6 +31,8 @@ urlpatterns = [
 # DELETE /api/clientes/clientes/{id}/             -> Elimina
 # GET    /api/clientes/clientes/activos/          -> Endpoint custom (solo activos)
 # GET    /api/clientes/clientes/cumpleanos_mes/   -> Endpoint custom (cumpleaños)
+# GET    /api/clientes/clientes/cumpleanos_proximos/?dias=N -> Cumpleaños en los próximos N días
+# POST   /api/clientes/clientes/importar/         -> Alta masiva desde CSV / JSON lines
 # POST   /api/clientes/clientes/{id}/activar/     -> Endpoint custom
 # POST   /api/clientes/clientes/{id}/desactivar/  -> Endpoint custom
 # 
@@ -42,6 +44,8 @@ urlpatterns = [
 # PATCH  /api/clientes/huellas/{id}/              -> Actualiza parcial
 # DELETE /api/clientes/huellas/{id}/              -> Elimina
 # POST   /api/clientes/huellas/{id}/desactivar/   -> Endpoint custom
+# POST   /api/clientes/huellas/identificar/       -> Busca al cliente por su huella (1:N)
+# GET    /api/clientes/huellas/{id}/descargar/    -> Template en binario (con ETag)
 # 
 # RECORDATORIOS:
 # GET    /api/clientes/recordatorios/             -> Lista todos
@@ -54,6 +58,8 @@ urlpatterns = [
 # GET    /api/clientes/recordatorios/hoy/         -> Endpoint custom
 # POST   /api/clientes/recordatorios/{id}/enviar/ -> Endpoint custom
 # POST   /api/clientes/recordatorios/{id}/cancelar/ -> Endpoint custom
+# POST   /api/clientes/recordatorios/enviar_lote/  -> Endpoint custom (ids o filtros)
+# POST   /api/clientes/recordatorios/cancelar_lote/ -> Endpoint custom (ids o filtros)
 # 
 # ============================================
 
@@ -1,16 +1,31 @@
-from rest_framework import viewsets
+import io
+from django.db import transaction
+from django.http import FileResponse, HttpResponseNotModified
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from datetime import date, timedelta
+from datetime import timedelta
+from django.utils import timezone
+from gimnasio.exportacion import ExportacionMixin
+from gimnasio.fechas import inicio_dia, rango_dias
+from gimnasio.paginacion import PaginacionAccionesMixin
+from .busqueda import buscar_clientes
+from .huellas import indice_huellas
+from .importacion import LECTORES, importar_clientes
 from .models import Cliente, Huella, Recordatorio
 from .serializers import (
     ClienteSerializer,
     ClienteListSerializer,
     ClienteCreateSerializer,
     ClienteDetalleSerializer,
+    HuellaSerializer,
+    HuellaListSerializer,
+    HuellaIdentificarSerializer,
     RecordatorioSerializer,
     RecordatorioListSerializer,
-    RecordatorioCreateSerializer
+    RecordatorioCreateSerializer,
+    RecordatorioLoteSerializer
 )
 
 
@@ -18,7 +33,7 @@ from .serializers import (
 # VIEWSET PARA CLIENTES
 # ============================================
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(ExportacionMixin, PaginacionAccionesMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar clientes del gimnasio.
     
@@ -29,8 +44,29 @@ class ClienteViewSet(viewsets.ModelViewSet):
     - PUT /clientes/{id}/ -> Actualiza cliente completo
     - PATCH /clientes/{id}/ -> Actualiza cliente parcial
     - DELETE /clientes/{id}/ -> Elimina cliente (mejor usar desactivar)
+    - GET /clientes/exportar/ -> CSV/JSONL con los mismos filtros
     """
     queryset = Cliente.objects.all()
+    nombre_exportacion = 'clientes'
+    campos_exportacion = (
+        'id', 'dni', 'apellido', 'nombre', 'email', 'telefono', 'contacto_emergencia',
+        'fecha_nacimiento', 'direccion', 'activo', 'fecha_registro'
+    )
+    
+    @property
+    def ordering(self):
+        """
+        Con búsqueda se ordena por relevancia; si no, los más nuevos primero.
+        El cursor guarda (relevancia, id), así que los empates de relevancia
+        se paginan por id sin OFFSET (ver gimnasio/paginacion.py).
+        """
+        request = getattr(self, 'request', None)
+        if request is not None and request.query_params.get('search'):
+            return ('-relevancia', '-id')
+        if getattr(self, 'action', None) == 'cumpleanos_proximos':
+            # Días hasta el cumpleaños (ver ClienteQuerySet.por_proximo_cumpleanos)
+            return ('orden_cumpleanos', 'id')
+        return ('-id',)
     
     def get_serializer_class(self):
         """Elige el serializer según la acción"""
@@ -44,7 +80,10 @@ class ClienteViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Permite filtrar clientes por diferentes criterios"""
-        queryset = Cliente.objects.all()
+        queryset = Cliente.objects.con_datos_calculados()
+        
+        if self.action == 'retrieve':
+            queryset = queryset.con_recordatorios_pendientes()
         
         # Filtrar solo clientes activos
         activo = self.request.query_params.get('activo', None)
@@ -58,14 +97,10 @@ class ClienteViewSet(viewsets.ModelViewSet):
         if dni:
             queryset = queryset.filter(dni=dni)
         
-        # Buscar por nombre o apellido
+        # Buscar por nombre, apellido, DNI, email o teléfono (por prefijo)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                nombre__icontains=search
-            ) | queryset.filter(
-                apellido__icontains=search
-            )
+            queryset = buscar_clientes(queryset, search)
         
         return queryset
     
@@ -75,9 +110,8 @@ class ClienteViewSet(viewsets.ModelViewSet):
         Endpoint personalizado: /clientes/activos/
         Devuelve solo clientes activos
         """
-        clientes = Cliente.objects.filter(activo=True)
-        serializer = ClienteListSerializer(clientes, many=True)
-        return Response(serializer.data)
+        clientes = Cliente.objects.con_datos_calculados().filter(activo=True)
+        return self.listar_paginado(clientes, ClienteListSerializer)
     
     @action(detail=True, methods=['post'])
     def desactivar(self, request, pk=None):
@@ -109,16 +143,64 @@ class ClienteViewSet(viewsets.ModelViewSet):
         Endpoint personalizado: /clientes/cumpleanos_mes/
         Devuelve clientes que cumplen años este mes
         """
-        hoy = date.today()
+        hoy = timezone.localdate()
         mes_actual = hoy.month
         
-        clientes = Cliente.objects.filter(
-            fecha_nacimiento__month=mes_actual,
+        # Rango sobre la clave MMDD (indexada) en lugar de MONTH(fecha_nacimiento)
+        clientes = Cliente.objects.con_datos_calculados().filter(
+            cumpleanos_clave__gte=mes_actual * 100 + 1,
+            cumpleanos_clave__lte=mes_actual * 100 + 31,
             activo=True
         )
         
-        serializer = ClienteListSerializer(clientes, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(clientes, ClienteListSerializer)
+    
+    @action(detail=False, methods=['get'])
+    def cumpleanos_proximos(self, request):
+        """
+        Endpoint personalizado: /clientes/cumpleanos_proximos/?dias=7
+        Devuelve clientes activos que cumplen años en los próximos N días
+        (incluye hoy), del cumpleaños más cercano al más lejano. La ventana
+        puede cruzar fin de mes o de año.
+        """
+        try:
+            dias = int(request.query_params.get('dias', 7))
+        except ValueError:
+            return Response({"error": "dias debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if dias < 1 or dias > 366:
+            return Response({"error": "dias debe estar entre 1 y 366"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        hoy = timezone.localdate()
+        clientes = Cliente.objects.con_datos_calculados(hoy).cumplen_entre(
+            hoy, hoy + timedelta(days=dias - 1)
+        ).filter(activo=True).por_proximo_cumpleanos(hoy)
+        
+        return self.listar_paginado(clientes, ClienteListSerializer)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Endpoint personalizado: POST /clientes/importar/
+        Alta masiva desde un archivo CSV (con encabezados) o JSON lines.
+        
+        Campos del form: archivo, formato (csv | jsonl; por defecto según la extensión)
+        Devuelve cuántos se crearon y los errores por número de fila.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({"error": "Falta el archivo"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        formato = request.data.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        if formato not in LECTORES:
+            return Response(
+                {"error": f"Formato no soportado: {formato} (usar csv o jsonl)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Las líneas ilegibles quedan como errores en el reporte (no cortan la carga)
+        reporte = importar_clientes(LECTORES[formato](archivo))
+        return Response(reporte)
 
 
 # ============================================
@@ -132,15 +214,25 @@ class HuellaViewSet(viewsets.ModelViewSet):
     Importante: La huella es OneToOne con Cliente,
     así que cada cliente tiene máximo una huella.
     
-    NOTA: Falta crear HuellaSerializer
+    huella_data viaja en base64. Los listados y cambios de estado no
+    leen el template (defer), y /descargar/ lo devuelve con ETag.
     """
     queryset = Huella.objects.all()
-    # serializer_class = HuellaSerializer  # TODO: Crear después
+    ordering = ('-id',)
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return HuellaListSerializer
+        return HuellaSerializer
     
     def get_queryset(self):
         """Permite filtrar huellas"""
         queryset = Huella.objects.all()
         
+        # Solo el detalle y la edición necesitan el blob
+        if self.action not in ['retrieve', 'update', 'partial_update']:
+            queryset = queryset.defer('huella_data')
+        
         # Filtrar por cliente
         cliente_id = self.request.query_params.get('cliente', None)
         if cliente_id:
@@ -161,15 +253,65 @@ class HuellaViewSet(viewsets.ModelViewSet):
         """
         huella = self.get_object()
         huella.activa = False
-        huella.save()
+        huella.save(update_fields=['activa'])
         return Response({"message": f"Huella de {huella.cliente} desactivada"})
+    
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """
+        Endpoint: GET /huellas/{id}/descargar/
+        Devuelve el template en binario. Con If-None-Match igual al ETag
+        responde 304 sin leer el blob de la base.
+        """
+        huella = self.get_object()
+        etag = f'"{huella.huella_hash}"'
+        
+        if huella.huella_hash and request.headers.get('If-None-Match') == etag:
+            respuesta = HttpResponseNotModified()
+        else:
+            respuesta = FileResponse(
+                io.BytesIO(huella.datos),
+                as_attachment=True,
+                filename=f'huella_{huella.pk}.bin',
+                content_type='application/octet-stream'
+            )
+        
+        if huella.huella_hash:
+            respuesta['ETag'] = etag
+        return respuesta
+    
+    @action(detail=False, methods=['post'])
+    def identificar(self, request):
+        """
+        Endpoint: POST /huellas/identificar/
+        Recibe {"huella_data": "<base64>"} desde el molinete y devuelve
+        el cliente cuya huella activa coincide (búsqueda 1:N en memoria)
+        """
+        serializer = HuellaIdentificarSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        indice_huellas.asegurar_actualizado()
+        resultado = indice_huellas.identificar(serializer.validated_data['huella_data'])
+        if resultado is None:
+            return Response({"message": "Huella no reconocida"}, status=status.HTTP_404_NOT_FOUND)
+        
+        cliente_id, huella_id, puntaje = resultado
+        cliente = Cliente.objects.con_datos_calculados().filter(pk=cliente_id).first()
+        if cliente is None:
+            return Response({"message": "Huella no reconocida"}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            "cliente": ClienteListSerializer(cliente).data,
+            "huella": huella_id,
+            "puntaje": puntaje
+        })
 
 
 # ============================================
 # VIEWSET PARA RECORDATORIOS
 # ============================================
 
-class RecordatorioViewSet(viewsets.ModelViewSet):
+class RecordatorioViewSet(PaginacionAccionesMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar recordatorios automáticos.
     
@@ -179,6 +321,7 @@ class RecordatorioViewSet(viewsets.ModelViewSet):
     - Renovación
     """
     queryset = Recordatorio.objects.all()
+    ordering = ('-fecha_programada', '-id')
     
     def get_serializer_class(self):
         """Elige el serializer según la acción"""
@@ -192,6 +335,11 @@ class RecordatorioViewSet(viewsets.ModelViewSet):
         """Permite filtrar recordatorios"""
         queryset = Recordatorio.objects.all()
         
+        if self.action == 'list':
+            queryset = queryset.para_listado()
+        elif self.action == 'enviar':
+            queryset = queryset.select_related('cliente')
+        
         # Filtrar por cliente
         cliente_id = self.request.query_params.get('cliente', None)
         if cliente_id:
@@ -215,23 +363,22 @@ class RecordatorioViewSet(viewsets.ModelViewSet):
         Endpoint: /recordatorios/pendientes/
         Devuelve recordatorios pendientes de envío
         """
-        recordatorios = Recordatorio.objects.filter(estado='pendiente')
-        serializer = self.get_serializer(recordatorios, many=True)
-        return Response(serializer.data)
+        recordatorios = Recordatorio.objects.pendientes().para_listado()
+        return self.listar_paginado(recordatorios, RecordatorioListSerializer)
     
     @action(detail=False, methods=['get'])
     def hoy(self, request):
         """
         Endpoint: /recordatorios/hoy/
-        Devuelve recordatorios programados para hoy
+        Devuelve recordatorios programados para hoy (día local)
         """
-        hoy = date.today()
-        recordatorios = Recordatorio.objects.filter(
-            fecha_programada__date=hoy,
-            estado='pendiente'
+        hoy = timezone.localdate()
+        recordatorios = (
+            Recordatorio.objects.pendientes()
+            .programados_entre(*rango_dias(hoy, hoy))
+            .para_listado()
         )
-        serializer = self.get_serializer(recordatorios, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(recordatorios, RecordatorioListSerializer)
     
     @action(detail=True, methods=['post'])
     def enviar(self, request, pk=None):
@@ -239,11 +386,9 @@ class RecordatorioViewSet(viewsets.ModelViewSet):
         Endpoint: POST /recordatorios/{id}/enviar/
         Marca un recordatorio como enviado
         """
-        from datetime import datetime
-        
         recordatorio = self.get_object()
         recordatorio.estado = 'enviado'
-        recordatorio.fecha_envio = datetime.now()
+        recordatorio.fecha_envio = timezone.now()
         recordatorio.save()
         
         return Response({
@@ -261,4 +406,68 @@ class RecordatorioViewSet(viewsets.ModelViewSet):
         recordatorio.estado = 'cancelado'
         recordatorio.save()
         
-        return Response({"message": "Recordatorio cancelado"})
\ No newline at end of file
+        return Response({"message": "Recordatorio cancelado"})
+    
+    def _actualizar_pendientes(self, request, **cambios):
+        """
+        Aplica `cambios` con un solo UPDATE condicional (estado = 'pendiente')
+        a los recordatorios seleccionados por ids o filtros.
+        """
+        serializer = RecordatorioLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        recordatorios = Recordatorio.objects.all()
+        ids = datos.get('ids')
+        if ids is not None:
+            recordatorios = recordatorios.filter(id__in=ids)
+        if 'tipo' in datos:
+            recordatorios = recordatorios.filter(tipo=datos['tipo'])
+        if 'canal' in datos:
+            recordatorios = recordatorios.filter(canal=datos['canal'])
+        if 'cliente' in datos:
+            recordatorios = recordatorios.filter(cliente_id=datos['cliente'])
+        
+        # Rango de días locales semiabierto: [fecha_desde 00:00, fecha_hasta + 1 00:00)
+        if 'fecha_desde' in datos:
+            recordatorios = recordatorios.filter(fecha_programada__gte=inicio_dia(datos['fecha_desde']))
+        if 'fecha_hasta' in datos:
+            recordatorios = recordatorios.filter(
+                fecha_programada__lt=inicio_dia(datos['fecha_hasta'] + timedelta(days=1))
+            )
+        
+        pendientes = recordatorios.filter(estado='pendiente')
+        omitidos = []
+        if ids:
+            # Se bloquean los pendientes elegidos: ningún despacho puede
+            # cambiarlos entre el SELECT y el UPDATE, así los omitidos
+            # (no existen, no cumplen los filtros o ya no están pendientes)
+            # son exactamente los que no se actualizaron
+            with transaction.atomic():
+                bloqueados = list(pendientes.select_for_update().values_list('id', flat=True))
+                actualizados = Recordatorio.objects.filter(id__in=bloqueados).update(**cambios)
+            omitidos = sorted(set(ids) - set(bloqueados))
+        else:
+            actualizados = pendientes.update(**cambios)
+        
+        return Response({
+            "actualizados": actualizados,
+            "omitidos": omitidos
+        })
+    
+    @action(detail=False, methods=['post'])
+    def enviar_lote(self, request):
+        """
+        Endpoint: POST /recordatorios/enviar_lote/
+        Marca como enviados los recordatorios pendientes seleccionados:
+        {"ids": [1, 2, 3]} o filtros {"tipo": "deuda", "fecha_hasta": "2026-10-17"}
+        """
+        return self._actualizar_pendientes(request, estado='enviado', fecha_envio=timezone.now())
+    
+    @action(detail=False, methods=['post'])
+    def cancelar_lote(self, request):
+        """
+        Endpoint: POST /recordatorios/cancelar_lote/
+        Cancela los recordatorios pendientes seleccionados (ids o filtros)
+        """
+        return self._actualizar_pendientes(request, estado='cancelado')
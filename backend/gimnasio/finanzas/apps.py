@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FinanzasConfig(AppConfig):
     name = 'finanzas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,368 @@
+import codecs
+import csv
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from clientes.importacion import ErrorLectura
+from clientes.models import Cliente
+from gimnasio.cache import invalidar_al_guardar
+from membresias.models import Membresia
+from .cuentas import ESTADOS_CON_DEUDA, recalcular_cuentas
+from .models import EstadoCuenta, MovimientoConciliacion, Pago
+from .resumenes import sumar_pagos
+
+
+# ============================================
+# CONCILIACIÓN DE EXTRACTOS (BANCO / MERCADO PAGO)
+# ============================================
+#
+# El extracto se lee como stream y se procesa de a lotes, igual que la
+# importación de clientes. Por lote:
+#   1. Se normalizan las líneas en memoria (sólo créditos; los débitos se ignoran).
+#   2. Cinco SELECT ... IN arman índices en memoria (dicts):
+#      referencias ya cargadas (pagos y cola de revisión), DNI -> cliente,
+#      (cliente, monto) -> membresía abierta y monto -> clientes que deben eso.
+#   3. Cada línea se resuelve contra esos índices sin más queries.
+#   4. Pagos confirmados: bulk_create + resúmenes diarios agrupados +
+#      recálculo de las cuentas del lote. Dudosos: bulk_create en la cola
+#      MovimientoConciliacion para revisar a mano.
+#
+# Una línea se confirma sola sólo si trae el DNI (o CUIT) de un único
+# cliente y el monto coincide con una de sus membresías abiertas. El DNI
+# sale de la columna dedicada o de un CUIT/CUIL en la descripción (un
+# número suelto de 7-8 dígitos puede ser cualquier cosa: CBU, nº de cuenta).
+# La referencia (nº de operación) evita cargar dos veces la misma línea.
+# Las líneas que no se pueden leer o interpretar quedan como errores en el
+# reporte; nunca cortan la conciliación (los lotes anteriores ya se guardaron).
+
+TAMANO_LOTE = 1000
+
+METODOS_CONCILIABLES = ['transferencia', 'mercadopago']
+
+# Encabezados aceptados en el CSV (en minúsculas) para cada campo
+COLUMNAS_CSV = {
+    'fecha': ['fecha', 'fecha de operación', 'fecha de operacion', 'date', 'transaction_date'],
+    'monto': ['monto', 'importe', 'crédito', 'credito', 'amount', 'net_credit_amount'],
+    'referencia': ['referencia', 'nro. operación', 'nro operacion', 'id de operación', 'operation_id', 'source_id'],
+    'descripcion': ['descripcion', 'descripción', 'concepto', 'detalle', 'description'],
+    'dni': ['dni', 'cuit', 'cuil', 'documento'],
+}
+
+ETIQUETAS_OFX = {
+    'DTPOSTED': 'fecha',
+    'TRNAMT': 'monto',
+    'FITID': 'referencia',
+    'NAME': 'descripcion',
+    'MEMO': 'memo',
+}
+
+PATRON_OFX = re.compile(r'<(/?)(\w+)>([^<\r\n]*)')
+# CUIT/CUIL de persona: 20-38280942-3 -> 38280942
+PATRON_CUIT = re.compile(r'\b(?:20|23|24|27)-?(\d{8})-?\d\b')
+# Columna DNI: 38280942, 38.280.942 o 38 280 942
+PATRON_DNI = re.compile(r'\d{1,2}[. ]?\d{3}[. ]?\d{3}')
+# Importe con separador decimal: el último . o , seguido de exactamente dos dígitos
+PATRON_DECIMALES = re.compile(r'(.*)([.,])(\d{2})')
+# Parte entera con separador de miles (uno solo, en grupos de tres)
+PATRON_MILES = re.compile(r'\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*')
+
+
+def leer_csv(archivo):
+    """
+    Genera un dict por fila del CSV con las columnas de COLUMNAS_CSV, o un
+    ErrorLectura (clientes/importacion.py) por cada línea que no se pudo leer.
+    """
+    lector = csv.DictReader(codecs.iterdecode(archivo, 'utf-8-sig'))
+    try:
+        encabezados = lector.fieldnames or []
+    except (csv.Error, UnicodeDecodeError) as error:
+        yield ErrorLectura(f'No se pudo leer el encabezado: {error}')
+        return
+
+    columnas = {}
+    for encabezado in encabezados:
+        for campo, alias in COLUMNAS_CSV.items():
+            if encabezado and encabezado.strip().lower() in alias:
+                columnas.setdefault(campo, encabezado)
+
+    while True:
+        try:
+            fila = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # El lector sigue con la línea siguiente
+            yield ErrorLectura(f'CSV mal formado: {error}')
+            continue
+        except UnicodeDecodeError:
+            # No se puede seguir decodificando: se corta acá
+            yield ErrorLectura('El archivo no está en UTF-8')
+            return
+        yield {campo: fila.get(encabezado) or '' for campo, encabezado in columnas.items()}
+
+
+def leer_ofx(archivo):
+    """
+    Genera un dict por <STMTTRN> de un OFX (SGML o XML).
+    Se lee línea a línea, sin cargar el archivo entero.
+    """
+    movimiento = None
+    for linea in codecs.iterdecode(archivo, 'utf-8-sig', errors='replace'):
+        for cierre, etiqueta, valor in PATRON_OFX.findall(linea):
+            etiqueta = etiqueta.upper()
+            if etiqueta == 'STMTTRN':
+                if cierre and movimiento is not None:
+                    movimiento['descripcion'] = ' '.join(
+                        filter(None, [movimiento.get('descripcion'), movimiento.pop('memo', None)])
+                    )
+                    yield movimiento
+                movimiento = None if cierre else {}
+            elif movimiento is not None and not cierre and etiqueta in ETIQUETAS_OFX:
+                movimiento[ETIQUETAS_OFX[etiqueta]] = valor.strip()
+                if etiqueta == 'TRNAMT':
+                    movimiento['monto'] = _monto_ofx(valor)
+
+
+LECTORES = {
+    'csv': leer_csv,
+    'ofx': leer_ofx,
+}
+
+
+def _fecha(valor):
+    valor = (valor or '').strip()
+    if re.fullmatch(r'\d{8}.*', valor):
+        # OFX: AAAAMMDD[HHMMSS[.XXX][zona]]
+        return date(int(valor[:4]), int(valor[4:6]), int(valor[6:8]))
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y'):
+        try:
+            return datetime.strptime(valor[:10], formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Fecha inválida: {valor!r}')
+
+
+def _monto(valor):
+    """
+    Importe de un CSV: 1234.56, 1.234,56, 1,234.56, 1234,56 o 15.000 (miles).
+
+    El separador decimal es el último . o , seguido de exactamente dos
+    dígitos; los demás separadores tienen que agrupar de a tres. Cualquier
+    otra cosa (1.5, 1234.567, 1.234.56) es ambigua y se rechaza.
+    """
+    if isinstance(valor, Decimal):
+        return valor.quantize(Decimal('0.01'))
+
+    texto = (valor or '').strip().replace('$', '').replace(' ', '')
+    signo = ''
+    if texto[:1] in ('-', '+'):
+        signo, texto = texto[0], texto[1:]
+
+    entero, decimales = texto, '00'
+    coincidencia = PATRON_DECIMALES.fullmatch(texto)
+    if coincidencia:
+        entero, separador, decimales = coincidencia.groups()
+        if separador in entero:
+            raise ValueError(f'Monto ambiguo: {valor!r}')
+
+    if not entero.isdigit():
+        if not PATRON_MILES.fullmatch(entero):
+            raise ValueError(f'Monto inválido o ambiguo: {valor!r}')
+        entero = entero.replace('.', '').replace(',', '')
+    if not entero.isascii():
+        raise ValueError(f'Monto inválido: {valor!r}')
+    return Decimal(f'{signo}{entero}.{decimales}')
+
+
+def _monto_ofx(valor):
+    """TRNAMT de un OFX: siempre con separador decimal y sin miles (1500.00, -20,5)"""
+    try:
+        return Decimal(valor.strip().replace(',', '.'))
+    except InvalidOperation:
+        # Queda el texto: _monto lo rechaza como error de la línea
+        return valor.strip()
+
+
+def _dni(valor):
+    """Normaliza un DNI (sin puntos ni ceros a la izquierda, como en Cliente.dni)"""
+    return str(int(re.sub(r'\D', '', valor)))
+
+
+def dnis_en(columna_dni, descripcion):
+    """
+    DNIs de una línea: el de la columna dedicada (suelto, con puntos o
+    como CUIT/CUIL) y los de CUIT/CUIL que aparezcan en la descripción.
+    """
+    columna_dni = (columna_dni or '').strip()
+    encontrados = {_dni(dni) for dni in PATRON_CUIT.findall(f'{columna_dni} {descripcion}')}
+    if not encontrados and PATRON_DNI.fullmatch(columna_dni):
+        encontrados.add(_dni(columna_dni))
+    return encontrados
+
+
+def _normalizar(fila):
+    if isinstance(fila, ErrorLectura):
+        raise ValueError(fila.mensaje)
+    referencia = (fila.get('referencia') or '').strip()
+    if not referencia:
+        raise ValueError('Falta la referencia (nº de operación)')
+    descripcion = (fila.get('descripcion') or '').strip()
+    return {
+        'fecha': _fecha(fila.get('fecha')),
+        'monto': _monto(fila.get('monto')),
+        'referencia': referencia[:100],
+        'descripcion': descripcion[:300],
+        'dnis': dnis_en(fila.get('dni'), descripcion),
+    }
+
+
+def conciliar(filas, metodo_pago, tamano_lote=TAMANO_LOTE):
+    """
+    Concilia las líneas de un extracto (iterable de dicts de LECTORES).
+
+    Devuelve un reporte con cuántas líneas se cargaron como pago, cuántas
+    quedaron para revisar, cuántas ya estaban cargadas, cuántas se ignoraron
+    (débitos) y los errores por línea (numeradas desde 1).
+    """
+    reporte = {'lineas': 0, 'pagos': 0, 'a_revisar': 0, 'duplicados': 0, 'ignorados': 0, 'errores': []}
+    vistas = set()
+    numeradas = enumerate(filas, start=1)
+
+    while True:
+        lote = list(islice(numeradas, tamano_lote))
+        if not lote:
+            break
+        reporte['lineas'] += len(lote)
+        _conciliar_lote(lote, metodo_pago, vistas, reporte)
+
+    if reporte['pagos']:
+        # bulk_create no dispara las señales que invalidan los reportes
+        invalidar_al_guardar('finanzas')
+    return reporte
+
+
+def _conciliar_lote(lote, metodo_pago, vistas, reporte):
+    # 1) Normalización sin queries
+    lineas = []
+    for numero, fila in lote:
+        try:
+            linea = _normalizar(fila)
+        except ValueError as error:
+            reporte['errores'].append({'linea': numero, 'error': str(error)})
+            continue
+        if linea['monto'] <= 0:
+            reporte['ignorados'] += 1
+        elif linea['referencia'] in vistas:
+            reporte['duplicados'] += 1
+        else:
+            vistas.add(linea['referencia'])
+            lineas.append((numero, linea))
+
+    if not lineas:
+        return
+
+    # 2) Índices en memoria: una query por cada uno
+    referencias = [linea['referencia'] for _, linea in lineas]
+    cargadas = set(
+        Pago.objects.filter(metodo_pago=metodo_pago, referencia__in=referencias).values_list('referencia', flat=True)
+    )
+    cargadas.update(
+        MovimientoConciliacion.objects.filter(metodo_pago=metodo_pago, referencia__in=referencias)
+        .values_list('referencia', flat=True)
+    )
+
+    dnis = set().union(*(linea['dnis'] for _, linea in lineas))
+    cliente_por_dni = dict(Cliente.objects.filter(dni__in=dnis).values_list('dni', 'id'))
+
+    membresia_por_monto = {}
+    for membresia_id, cliente_id, precio in (
+        Membresia.objects.filter(cliente_id__in=set(cliente_por_dni.values()), estado__in=ESTADOS_CON_DEUDA)
+        .order_by('-fecha_inicio', '-id')
+        .values_list('id', 'cliente_id', 'precio_contratado')
+    ):
+        # La más reciente gana si hay dos con el mismo precio
+        membresia_por_monto.setdefault((cliente_id, precio), membresia_id)
+
+    deudores_por_monto = {}
+    for cliente_id, saldo in EstadoCuenta.objects.filter(
+        estado='debe',
+        saldo_pendiente__in={linea['monto'] for _, linea in lineas}
+    ).values_list('cliente_id', 'saldo_pendiente'):
+        deudores_por_monto.setdefault(saldo, []).append(cliente_id)
+
+    # 3) Resolución de cada línea contra los índices
+    pagos = []
+    a_revisar = []
+    for numero, linea in lineas:
+        if linea['referencia'] in cargadas:
+            reporte['duplicados'] += 1
+            continue
+
+        clientes = sorted({cliente_por_dni[dni] for dni in linea['dnis'] if dni in cliente_por_dni})
+        membresia_id = membresia_por_monto.get((clientes[0], linea['monto'])) if len(clientes) == 1 else None
+
+        if membresia_id:
+            pagos.append((numero, Pago(
+                cliente_id=clientes[0],
+                membresia_id=membresia_id,
+                fecha_pago=linea['fecha'],
+                monto=linea['monto'],
+                metodo_pago=metodo_pago,
+                concepto='membresia',
+                referencia=linea['referencia'],
+                observaciones=linea['descripcion'],
+            )))
+            continue
+
+        if len(clientes) > 1:
+            motivo = 'varios_clientes'
+        elif clientes:
+            motivo = 'monto_distinto'
+        else:
+            motivo = 'sin_cliente'
+            clientes = deudores_por_monto.get(linea['monto'], [])[:10]
+
+        a_revisar.append(MovimientoConciliacion(
+            metodo_pago=metodo_pago,
+            referencia=linea['referencia'],
+            fecha=linea['fecha'],
+            monto=linea['monto'],
+            descripcion=linea['descripcion'],
+            motivo=motivo,
+            candidatos=clientes,
+        ))
+
+    # 4) Inserción del lote (bulk_create no llama a Pago.save(): resúmenes y cuentas van acá)
+    if pagos:
+        nuevos = [pago for _, pago in pagos]
+        try:
+            with transaction.atomic():
+                Pago.objects.bulk_create(nuevos)
+                sumar_pagos(nuevos)
+                recalcular_cuentas(clientes={pago.cliente_id for pago in nuevos})
+        except IntegrityError:
+            # Otra conciliación cargó alguna de estas referencias entre el SELECT y el INSERT
+            for numero, _ in pagos:
+                reporte['errores'].append({'linea': numero, 'error': 'Conflicto con otra conciliación, reintentar'})
+        else:
+            reporte['pagos'] += len(nuevos)
+
+    if a_revisar:
+        try:
+            with transaction.atomic():
+                MovimientoConciliacion.objects.bulk_create(a_revisar)
+            reporte['a_revisar'] += len(a_revisar)
+        except IntegrityError:
+            # Otra conciliación encoló alguna referencia entre el SELECT y el
+            # INSERT: se insertan de a una para contar exactamente las que entraron
+            for movimiento in a_revisar:
+                try:
+                    with transaction.atomic():
+                        movimiento.save()
+                    reporte['a_revisar'] += 1
+                except IntegrityError:
+                    reporte['duplicados'] += 1
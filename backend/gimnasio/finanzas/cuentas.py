@@ -0,0 +1,164 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from membresias.models import Membresia
+from .models import EstadoCuenta, Pago
+
+
+# ============================================
+# ESTADOS DE CUENTA DERIVADOS
+# ============================================
+#
+# saldo_pendiente = precio contratado de las membresías (salvo canceladas)
+#                   - pagos de concepto membresía
+# (negativo = saldo a favor). estado: 'debe' si el saldo es positivo,
+# 'al_dia' si no; 'suspendido' lo pone recepción y no se toca.
+#
+# Dos caminos:
+#   - Incremental: cada alta/edición/baja de Pago o Membresia aplica su
+#     diferencia con UPDATE ... SET saldo = saldo + delta en la misma
+#     transacción. El UPDATE bloquea la fila de la cuenta, así que dos
+#     cajas a la vez no pisan sus cambios.
+#   - Por lotes (recalcular_cuentas): un UPDATE con subconsultas agregadas
+#     por cliente, para la carga inicial o después de cargas masivas.
+
+ESTADOS_CON_DEUDA = ['activa', 'suspendida', 'vencida']
+CONCEPTOS_CUENTA = ['membresia']
+
+CAMPOS_PAGO_CUENTA = ('cliente_id', 'monto', 'concepto')
+CAMPOS_MEMBRESIA_CUENTA = ('cliente_id', 'precio_contratado', 'estado')
+
+TAMANO_LOTE = 1000
+
+
+def _estado_sql(saldo):
+    """'debe' si el saldo es positivo, 'al_dia' si no; 'suspendido' se respeta"""
+    return Case(
+        When(estado='suspendido', then=Value('suspendido')),
+        When(GreaterThan(saldo, 0), then=Value('debe')),
+        default=Value('al_dia'),
+        output_field=CharField()
+    )
+
+
+def _ultimo_pago(cliente_id):
+    """Fecha del último pago del cliente (acepta OuterRef)"""
+    return Subquery(
+        Pago.objects.filter(cliente_id=cliente_id)
+        .order_by('-fecha_pago')
+        .values('fecha_pago')[:1]
+    )
+
+
+def aplicar_delta(cliente_id, delta, recalcular_ultimo_pago=False):
+    """Suma `delta` al saldo del cliente y ajusta el estado (crea la cuenta si falta)"""
+    saldo = F('saldo_pendiente') + delta
+    cambios = {
+        'saldo_pendiente': saldo,
+        'estado': _estado_sql(saldo),
+        'fecha_actualizacion': timezone.now(),
+    }
+    if recalcular_ultimo_pago:
+        cambios['ultimo_pago'] = _ultimo_pago(cliente_id)
+
+    if not EstadoCuenta.objects.filter(cliente_id=cliente_id).update(**cambios):
+        # Primera novedad del cliente: se calcula la cuenta completa
+        recalcular_cuentas(clientes=[cliente_id])
+
+
+def aporte_pago(valores):
+    """Cuánto mueve el saldo un pago (negativo: lo reduce)"""
+    return -valores['monto'] if valores['concepto'] in CONCEPTOS_CUENTA else 0
+
+
+def aporte_membresia(valores):
+    """Cuánto suma una membresía al saldo"""
+    return valores['precio_contratado'] if valores['estado'] in ESTADOS_CON_DEUDA else 0
+
+
+def aplicar_cambio(anterior, actual, aporte, recalcular_ultimo_pago=False):
+    """
+    Aplica la diferencia entre dos versiones de un Pago/Membresia
+    (anterior None = alta, actual None = baja). Si cambió el cliente,
+    se resta de una cuenta y se suma a la otra.
+    """
+    deltas = {}
+    if anterior:
+        deltas[anterior['cliente_id']] = deltas.get(anterior['cliente_id'], 0) - aporte(anterior)
+    if actual:
+        deltas[actual['cliente_id']] = deltas.get(actual['cliente_id'], 0) + aporte(actual)
+
+    for cliente_id, delta in deltas.items():
+        if delta or recalcular_ultimo_pago:
+            aplicar_delta(cliente_id, delta, recalcular_ultimo_pago)
+
+
+def _total(queryset, campo):
+    """SUM(campo) del cliente de la fila exterior, 0 si no hay filas"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(cliente_id=OuterRef('cliente_id'))
+            .order_by().values('cliente_id')
+            .annotate(total=Sum(campo)).values('total')
+        ),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def recalcular_cuentas(clientes=None):
+    """
+    Recalcula saldo, último pago y estado de todas las cuentas (o de `clientes`).
+
+    Crea las cuentas que falten y después corre un solo UPDATE con
+    subconsultas agregadas por cliente (índices de cliente en Membresia y
+    Pago), tocando sólo las filas cuyo resultado cambió.
+
+    Devuelve (cuentas creadas, cuentas actualizadas).
+    """
+    membresias = Membresia.objects.filter(estado__in=ESTADOS_CON_DEUDA)
+    pagos = Pago.objects.all()
+    cuentas = EstadoCuenta.objects.all()
+    if clientes is not None:
+        membresias = membresias.filter(cliente_id__in=clientes)
+        pagos = pagos.filter(cliente_id__in=clientes)
+        cuentas = cuentas.filter(cliente_id__in=clientes)
+
+    with transaction.atomic():
+        # Cuentas que faltan para clientes con movimientos
+        con_movimientos = (
+            set(membresias.values_list('cliente_id', flat=True).distinct())
+            | set(pagos.values_list('cliente_id', flat=True).distinct())
+        )
+        faltantes = con_movimientos - set(cuentas.values_list('cliente_id', flat=True))
+        EstadoCuenta.objects.bulk_create(
+            [EstadoCuenta(cliente_id=cliente_id) for cliente_id in faltantes],
+            batch_size=TAMANO_LOTE,
+            ignore_conflicts=True
+        )
+
+        saldo = _total(membresias, 'precio_contratado') - _total(
+            pagos.filter(concepto__in=CONCEPTOS_CUENTA), 'monto'
+        )
+        ultimo = _ultimo_pago(OuterRef('cliente_id'))
+        actualizadas = (
+            cuentas.alias(nuevo_saldo=saldo, nuevo_ultimo=ultimo, nuevo_estado=_estado_sql(saldo))
+            .exclude(
+                Q(saldo_pendiente=F('nuevo_saldo')),
+                Q(estado=F('nuevo_estado')),
+                Q(ultimo_pago=F('nuevo_ultimo')) | Q(ultimo_pago__isnull=True, nuevo_ultimo__isnull=True)
+            )
+            .update(
+                saldo_pendiente=saldo,
+                ultimo_pago=ultimo,
+                estado=_estado_sql(saldo),
+                fecha_actualizacion=timezone.now()
+            )
+        )
+
+    return len(faltantes), actualizadas
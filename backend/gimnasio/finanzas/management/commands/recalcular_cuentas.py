@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finanzas.cuentas import recalcular_cuentas
+
+
+class Command(BaseCommand):
+    """
+    Recalcula saldo pendiente, último pago y estado de todos los estados
+    de cuenta desde pagos y membresías. Usar para la carga inicial o después
+    de cargas masivas (bulk_create/update no pasan por save ni señales).
+
+    Uso: python manage.py recalcular_cuentas
+    """
+    help = 'Recalcula los EstadoCuenta derivados de pagos y membresías'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        creadas, actualizadas = recalcular_cuentas()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{creadas} cuentas creadas y {actualizadas} actualizadas en {duracion:.2f}s'
+        ))
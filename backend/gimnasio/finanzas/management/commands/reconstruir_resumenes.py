@@ -0,0 +1,29 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from finanzas.resumenes import reconstruir
+
+
+class Command(BaseCommand):
+    """
+    Recalcula los resúmenes diarios de pagos y egresos desde los movimientos.
+    Usar después de cargas masivas (bulk_create/update no los actualizan).
+
+    Uso: python manage.py reconstruir_resumenes [--desde 2026-01-01] [--hasta 2026-12-31]
+    """
+    help = 'Reconstruye ResumenDiarioPago y ResumenDiarioEgreso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, default=None)
+        parser.add_argument('--hasta', type=date.fromisoformat, default=None)
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas_pago, filas_egreso = reconstruir(options['desde'], options['hasta'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{filas_pago} filas de pagos y {filas_egreso} de egresos en {duracion:.2f}s'
+        ))
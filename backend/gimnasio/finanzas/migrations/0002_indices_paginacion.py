@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+        ('finanzas', '0001_initial'),
+        ('membresias', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='egreso',
+            index=models.Index(fields=['fecha'], name='egreso_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago'], name='pago_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:12
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def cargar_resumenes(apps, schema_editor):
+    Pago = apps.get_model('finanzas', 'Pago')
+    Egreso = apps.get_model('finanzas', 'Egreso')
+    ResumenDiarioPago = apps.get_model('finanzas', 'ResumenDiarioPago')
+    ResumenDiarioEgreso = apps.get_model('finanzas', 'ResumenDiarioEgreso')
+
+    ResumenDiarioPago.objects.bulk_create([
+        ResumenDiarioPago(dia=fila['fecha_pago'], metodo_pago=fila['metodo_pago'], concepto=fila['concepto'],
+                          cantidad=fila['cantidad'], total=fila['total'])
+        for fila in Pago.objects.order_by().values('fecha_pago', 'metodo_pago', 'concepto')
+        .annotate(cantidad=Count('id'), total=Sum('monto'))
+    ], batch_size=1000)
+    ResumenDiarioEgreso.objects.bulk_create([
+        ResumenDiarioEgreso(dia=fila['fecha'], categoria=fila['categoria'],
+                            cantidad=fila['cantidad'], total=fila['total'])
+        for fila in Egreso.objects.order_by().values('fecha', 'categoria')
+        .annotate(cantidad=Count('id'), total=Sum('monto'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioEgreso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('categoria', models.CharField(choices=[('equipamiento', 'Equipamiento'), ('mantenimiento', 'Mantenimiento'), ('reparaciones', 'Reparaciones'), ('insumos', 'Insumos de Limpieza'), ('marketing', 'Marketing/Publicidad'), ('suplementos', 'Suplementos/Productos'), ('servicios_profesionales', 'Servicios Profesionales'), ('otro', 'Otro')], max_length=30)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Egresos',
+                'verbose_name_plural': 'Resúmenes Diarios de Egresos',
+                'unique_together': {('dia', 'categoria')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('metodo_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('tarjeta_debito', 'Tarjeta de Débito'), ('tarjeta_credito', 'Tarjeta de Crédito'), ('mercadopago', 'Mercado Pago')], max_length=20)),
+                ('concepto', models.CharField(choices=[('membresia', 'Membresía'), ('inscripcion', 'Inscripción'), ('clase_particular', 'Clase Particular'), ('producto', 'Venta de Producto'), ('otro', 'Otro')], max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Pagos',
+                'verbose_name_plural': 'Resúmenes Diarios de Pagos',
+                'unique_together': {('dia', 'metodo_pago', 'concepto')},
+            },
+        ),
+        migrations.RunPython(cargar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_indices_recordatorio'),
+        ('finanzas', '0003_resumenes_diarios'),
+        ('membresias', '0005_indice_solapamiento'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='egreso',
+            name='egreso_fecha_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pago',
+            name='pago_fecha_idx',
+        ),
+        migrations.AddIndex(
+            model_name='egreso',
+            index=models.Index(fields=['fecha', 'categoria'], name='egreso_fecha_categoria_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago', 'metodo_pago'], name='pago_fecha_metodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['cliente', 'fecha_pago'], name='pago_cliente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_indices_recordatorio'),
+        ('finanzas', '0004_indices_fechas'),
+        ('membresias', '0005_indice_solapamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoConciliacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('tarjeta_debito', 'Tarjeta de Débito'), ('tarjeta_credito', 'Tarjeta de Crédito'), ('mercadopago', 'Mercado Pago')], max_length=20)),
+                ('referencia', models.CharField(max_length=100)),
+                ('fecha', models.DateField()),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('descripcion', models.CharField(blank=True, max_length=300)),
+                ('motivo', models.CharField(choices=[('sin_cliente', 'No se encontró el cliente'), ('varios_clientes', 'Coincide con varios clientes'), ('monto_distinto', 'El monto no coincide con ninguna membresía')], max_length=20)),
+                ('candidatos', models.JSONField(blank=True, default=list)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('confirmado', 'Confirmado'), ('descartado', 'Descartado')], default='pendiente', max_length=20)),
+                ('fecha_importacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Movimiento a Conciliar',
+                'verbose_name_plural': 'Movimientos a Conciliar',
+                'ordering': ['fecha', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='referencia',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='pago',
+            constraint=models.UniqueConstraint(fields=('referencia', 'metodo_pago'), name='pago_referencia_unica'),
+        ),
+        migrations.AddField(
+            model_name='movimientoconciliacion',
+            name='pago',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimiento_conciliacion', to='finanzas.pago'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoconciliacion',
+            index=models.Index(fields=['estado', 'fecha'], name='conciliacion_estado_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimientoconciliacion',
+            constraint=models.UniqueConstraint(fields=('referencia', 'metodo_pago'), name='conciliacion_referencia_unica'),
+        ),
+    ]
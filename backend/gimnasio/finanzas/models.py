@@ -1,11 +1,78 @@
-from django.db import models
+from django.db import models, transaction
 
 # Create your models here.
-from django.db import models
 from clientes.models import Cliente
 from membresias.models import Membresia
 
 
+def _actualizar_y_reconstruir(queryset, cambios, campo_fecha, campos_resumen, con_cuentas=False):
+    """
+    QuerySet.update() no pasa por save(): si `cambios` toca algún campo de
+    los resúmenes diarios (o de la cuenta), se reconstruyen los días
+    afectados, antes y después del cambio (y se recalculan las cuentas de
+    los clientes afectados), en la misma transacción.
+    """
+    from .cuentas import recalcular_cuentas
+    from .resumenes import reconstruir
+    
+    meta = queryset.model._meta
+    if not {meta.get_field(campo).attname for campo in cambios} & set(campos_resumen):
+        return models.QuerySet.update(queryset, **cambios)
+    
+    campos = (campo_fecha, 'cliente_id') if con_cuentas else (campo_fecha,)
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True))
+        afectadas = queryset.model.objects.filter(pk__in=ids)
+        antes = list(afectadas.values_list(*campos))
+        filas = models.QuerySet.update(queryset, **cambios)
+        filas_afectadas = antes + list(afectadas.values_list(*campos))
+        
+        if filas_afectadas:
+            fechas = [fila[0] for fila in filas_afectadas]
+            reconstruir(min(fechas), max(fechas))
+            if con_cuentas:
+                recalcular_cuentas(clientes={fila[1] for fila in filas_afectadas})
+    return filas
+
+
+class PagoQuerySet(models.QuerySet):
+    
+    def update(self, **cambios):
+        """Como QuerySet.update(), manteniendo resúmenes diarios y cuentas"""
+        from .cuentas import CAMPOS_PAGO_CUENTA
+        from .resumenes import CAMPOS_PAGO
+        
+        return _actualizar_y_reconstruir(
+            self, cambios, 'fecha_pago', CAMPOS_PAGO + CAMPOS_PAGO_CUENTA, con_cuentas=True
+        )
+    
+    def para_listado(self):
+        """Columnas de PagoListSerializer, con el cliente en el mismo JOIN"""
+        return self.select_related('cliente').only(
+            'id', 'cliente_id', 'fecha_pago', 'monto', 'metodo_pago', 'concepto',
+            'cliente__nombre', 'cliente__apellido'
+        )
+
+
+class EgresoQuerySet(models.QuerySet):
+    
+    def update(self, **cambios):
+        """Como QuerySet.update(), manteniendo los resúmenes diarios"""
+        from .resumenes import CAMPOS_EGRESO
+        
+        return _actualizar_y_reconstruir(self, cambios, 'fecha', CAMPOS_EGRESO)
+
+
+class EstadoCuentaQuerySet(models.QuerySet):
+    
+    def para_listado(self):
+        """Columnas de EstadoCuentaListSerializer, con el cliente en el mismo JOIN"""
+        return self.select_related('cliente').only(
+            'id', 'cliente_id', 'saldo_pendiente', 'ultimo_pago', 'proximo_vencimiento', 'estado',
+            'cliente__nombre', 'cliente__apellido'
+        )
+
+
 class Pago(models.Model):
     """Registro de pagos realizados por clientes"""
     METODO_PAGO_CHOICES = [
@@ -31,17 +98,53 @@ class Pago(models.Model):
     monto = models.DecimalField(max_digits=10, decimal_places=2)
     metodo_pago = models.CharField(max_length=20, choices=METODO_PAGO_CHOICES)
     concepto = models.CharField(max_length=20, choices=CONCEPTO_CHOICES, default='membresia')
+    # Nº de operación del banco / Mercado Pago (conciliación, ver finanzas/conciliacion.py)
+    referencia = models.CharField(max_length=100, null=True, blank=True)
     
     observaciones = models.TextField(blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
     
+    objects = PagoQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-fecha_pago']
+        indexes = [
+            # Rangos de fecha (mes_actual, fecha_desde/hasta, paginación por
+            # cursor), opcionalmente con metodo_pago
+            models.Index(fields=['fecha_pago', 'metodo_pago'], name='pago_fecha_metodo_idx'),
+            # Pagos de un cliente por fecha (listado ?cliente=, último pago)
+            models.Index(fields=['cliente', 'fecha_pago'], name='pago_cliente_fecha_idx'),
+        ]
+        constraints = [
+            # Una operación del extracto no se carga dos veces (NULL = carga manual)
+            models.UniqueConstraint(fields=['referencia', 'metodo_pago'], name='pago_referencia_unica'),
+        ]
         verbose_name = 'Pago'
         verbose_name_plural = 'Pagos'
     
     def __str__(self):
         return f"{self.cliente} - ${self.monto} - {self.fecha_pago}"
+    
+    def save(self, *args, **kwargs):
+        # Mantiene ResumenDiarioPago (finanzas/resumenes.py) y el EstadoCuenta
+        # del cliente (finanzas/cuentas.py) en la misma transacción.
+        # Las bajas se restan con la señal post_delete (finanzas/signals.py).
+        from .cuentas import CAMPOS_PAGO_CUENTA, aplicar_cambio, aporte_pago
+        from .resumenes import CAMPOS_PAGO, sumar_pago, valores_actuales
+        
+        campos = tuple(dict.fromkeys(CAMPOS_PAGO + CAMPOS_PAGO_CUENTA))
+        with transaction.atomic():
+            anterior = None
+            if self.pk:
+                anterior = Pago.objects.select_for_update().filter(pk=self.pk).values(*campos).first()
+            super().save(*args, **kwargs)
+            
+            actual = valores_actuales(self, campos)
+            if anterior != actual:
+                if anterior:
+                    sumar_pago(anterior, -1)
+                sumar_pago(actual)
+                aplicar_cambio(anterior, actual, aporte_pago, recalcular_ultimo_pago=True)
 
 
 class GastoFijo(models.Model):
@@ -107,13 +210,35 @@ class Egreso(models.Model):
     observaciones = models.TextField(blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
     
+    objects = EgresoQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-fecha']
+        indexes = [
+            # Rangos de fecha, opcionalmente con categoria
+            models.Index(fields=['fecha', 'categoria'], name='egreso_fecha_categoria_idx'),
+        ]
         verbose_name = 'Egreso'
         verbose_name_plural = 'Egresos'
     
     def __str__(self):
         return f"{self.descripcion} - ${self.monto} - {self.fecha}"
+    
+    def save(self, *args, **kwargs):
+        # Mantiene ResumenDiarioEgreso en la misma transacción (finanzas/resumenes.py)
+        from .resumenes import CAMPOS_EGRESO, sumar_egreso, valores_actuales
+        
+        with transaction.atomic():
+            anterior = None
+            if self.pk:
+                anterior = Egreso.objects.select_for_update().filter(pk=self.pk).values(*CAMPOS_EGRESO).first()
+            super().save(*args, **kwargs)
+            
+            actual = valores_actuales(self, CAMPOS_EGRESO)
+            if anterior != actual:
+                if anterior:
+                    sumar_egreso(anterior, -1)
+                sumar_egreso(actual)
 
 
 class EstadoCuenta(models.Model):
@@ -141,9 +266,94 @@ class EstadoCuenta(models.Model):
     observaciones = models.TextField(blank=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = EstadoCuentaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Estado de Cuenta'
         verbose_name_plural = 'Estados de Cuenta'
     
     def __str__(self):
-        return f"{self.cliente} - {self.estado} - Saldo: ${self.saldo_pendiente}"
\ No newline at end of file
+        return f"{self.cliente} - {self.estado} - Saldo: ${self.saldo_pendiente}"
+
+# ============================================
+# RESÚMENES DIARIOS (ver finanzas/resumenes.py)
+# ============================================
+
+class ResumenDiarioPago(models.Model):
+    """Total cobrado por día, método de pago y concepto"""
+    dia = models.DateField()
+    metodo_pago = models.CharField(max_length=20, choices=Pago.METODO_PAGO_CHOICES)
+    concepto = models.CharField(max_length=20, choices=Pago.CONCEPTO_CHOICES)
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['dia', 'metodo_pago', 'concepto']
+        verbose_name = 'Resumen Diario de Pagos'
+        verbose_name_plural = 'Resúmenes Diarios de Pagos'
+    
+    def __str__(self):
+        return f"{self.dia} {self.metodo_pago}/{self.concepto}: ${self.total}"
+
+
+class ResumenDiarioEgreso(models.Model):
+    """Total gastado por día y categoría"""
+    dia = models.DateField()
+    categoria = models.CharField(max_length=30, choices=Egreso.CATEGORIA_CHOICES)
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['dia', 'categoria']
+        verbose_name = 'Resumen Diario de Egresos'
+        verbose_name_plural = 'Resúmenes Diarios de Egresos'
+    
+    def __str__(self):
+        return f"{self.dia} {self.categoria}: ${self.total}"
+
+
+# ============================================
+# CONCILIACIÓN (ver finanzas/conciliacion.py)
+# ============================================
+
+class MovimientoConciliacion(models.Model):
+    """Línea de un extracto que no se pudo asignar sola: queda para revisar a mano"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('confirmado', 'Confirmado'),
+        ('descartado', 'Descartado'),
+    ]
+    
+    MOTIVO_CHOICES = [
+        ('sin_cliente', 'No se encontró el cliente'),
+        ('varios_clientes', 'Coincide con varios clientes'),
+        ('monto_distinto', 'El monto no coincide con ninguna membresía'),
+    ]
+    
+    metodo_pago = models.CharField(max_length=20, choices=Pago.METODO_PAGO_CHOICES)
+    referencia = models.CharField(max_length=100)
+    fecha = models.DateField()
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    descripcion = models.CharField(max_length=300, blank=True)
+    
+    motivo = models.CharField(max_length=20, choices=MOTIVO_CHOICES)
+    # ids de clientes posibles (por DNI o por saldo igual al monto)
+    candidatos = models.JSONField(default=list, blank=True)
+    
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    pago = models.OneToOneField(Pago, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimiento_conciliacion')
+    fecha_importacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['fecha', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['referencia', 'metodo_pago'], name='conciliacion_referencia_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['estado', 'fecha'], name='conciliacion_estado_idx'),
+        ]
+        verbose_name = 'Movimiento a Conciliar'
+        verbose_name_plural = 'Movimientos a Conciliar'
+    
+    def __str__(self):
+        return f"{self.fecha} {self.referencia} ${self.monto} ({self.estado})"
@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Sum
+
+from gimnasio.fechas import rango_mes
+from membresias.models import Membresia
+from .models import GastoFijo, ResumenDiarioEgreso, ResumenDiarioPago
+from .reportes import meses_entre
+
+
+# ============================================
+# PROYECCIÓN DE FLUJO DE CAJA
+# ============================================
+#
+# Ingresos y egresos esperados día por día para los próximos meses:
+#   - Renovaciones: cada membresía activa se renueva al vencer con
+#     probabilidad `renovacion`, al precio actual del plan y con la misma
+#     duración; la k-ésima renovación pesa renovacion ** k.
+#   - Gastos fijos activos: monto_mensual el dia_vencimiento de cada mes
+#     (el último día si el mes es más corto).
+#   - Otros ingresos (conceptos distintos de membresía) y egresos: el
+#     promedio diario de los últimos DIAS_HISTORIAL días, de los resúmenes.
+#
+# Los datos se leen con pocas consultas values_list y la proyección se arma
+# con arrays de NumPy: una matriz (membresías x renovaciones) de días y
+# montos que np.bincount suma por día, sin recorrer membresías en Python.
+
+DIAS_HISTORIAL = 90
+MAX_MESES = 36
+RENOVACION_POR_DEFECTO = 0.8
+# Acota la cantidad de renovaciones por membresía si hay datos raros (fin = inicio)
+DURACION_MINIMA = 7
+
+
+def _renovaciones(hoy, dias, tasas):
+    """Matriz (escenarios x días) con el ingreso esperado por renovaciones"""
+    filas = list(
+        Membresia.objects.filter(estado='activa')
+        .values_list('fecha_inicio', 'fecha_fin', 'plan__precio')
+    )
+    resultado = np.zeros((len(tasas), dias))
+    if not filas:
+        return resultado
+
+    inicios, fines, precios = zip(*filas)
+    inicios = np.array(inicios, dtype='datetime64[D]')
+    fines = np.array(fines, dtype='datetime64[D]')
+    precios = np.array([float(precio) for precio in precios])
+
+    # Día (desde hoy) de la primera renovación, el del vencimiento (la nueva
+    # membresía arranca ese día), y duración de cada período
+    primera = np.maximum((fines - np.datetime64(hoy, 'D')).astype(np.int64), 0)
+    duracion = np.maximum((fines - inicios).astype(np.int64), DURACION_MINIMA)
+
+    # Renovaciones k = 0..K-1 que pueden caer dentro del horizonte
+    cantidad = int(np.ceil(dias / duracion.min())) + 1
+    k = np.arange(cantidad)
+    dia = primera[:, None] + k[None, :] * duracion[:, None]
+    dentro = dia < dias
+
+    for fila, tasa in enumerate(tasas):
+        montos = precios[:, None] * tasa ** (k[None, :] + 1)
+        resultado[fila] = np.bincount(dia[dentro], weights=montos[dentro], minlength=dias)
+    return resultado
+
+
+def _gastos_fijos(meses, hoy, dias):
+    """Vector por día con los vencimientos de los gastos fijos activos"""
+    filas = list(GastoFijo.objects.filter(activo=True).values_list('dia_vencimiento', 'monto_mensual'))
+    if not filas:
+        return np.zeros(dias)
+
+    vencimientos, montos = zip(*filas)
+    vencimientos = np.array(vencimientos, dtype=np.int64)
+    montos = np.array([float(monto) for monto in montos])
+
+    inicios = np.array(meses, dtype='datetime64[D]')
+    largos = np.array([(rango_mes(mes)[1] - mes).days for mes in meses])
+    desplazamiento = (inicios - np.datetime64(hoy, 'D')).astype(np.int64)
+
+    # (meses x gastos): día del vencimiento, acotado al largo del mes
+    dia = desplazamiento[:, None] + np.minimum(vencimientos[None, :], largos[:, None]) - 1
+    dentro = (dia >= 0) & (dia < dias)
+    pesos = np.broadcast_to(montos, dia.shape)
+    return np.bincount(dia[dentro], weights=pesos[dentro], minlength=dias)
+
+
+def _promedio_diario(resumenes, hoy):
+    """Total diario promedio de los últimos DIAS_HISTORIAL días"""
+    total = resumenes.filter(
+        dia__gte=hoy - timedelta(days=DIAS_HISTORIAL),
+        dia__lt=hoy
+    ).aggregate(total=Sum('total'))['total'] or 0
+    return float(total) / DIAS_HISTORIAL
+
+
+def proyectar_flujo(hoy, meses=12, tasas=(RENOVACION_POR_DEFECTO,)):
+    """
+    Flujo de caja esperado desde `hoy` hasta el fin del mes número `meses`
+    (contando el actual), un escenario por cada tasa de renovación.
+    """
+    lista_meses = meses_entre(hoy, hoy + timedelta(days=31 * (meses - 1)))[:meses]
+    fin = rango_mes(lista_meses[-1])[1]
+    dias = (fin - hoy).days
+
+    renovaciones = _renovaciones(hoy, dias, tasas)
+    otros_ingresos = _promedio_diario(ResumenDiarioPago.objects.exclude(concepto='membresia'), hoy)
+    egresos = _gastos_fijos(lista_meses, hoy, dias) + _promedio_diario(ResumenDiarioEgreso.objects.all(), hoy)
+
+    # Índice del primer día de cada mes dentro del horizonte (el primero es hoy)
+    cortes = np.array([0] + [(mes - hoy).days for mes in lista_meses[1:]])
+    egresos_por_mes = np.add.reduceat(egresos, cortes)
+
+    fechas = [(hoy + timedelta(days=dia)).isoformat() for dia in range(dias)]
+    egresos_diarios = np.round(egresos, 2).tolist()
+
+    escenarios = []
+    for tasa, ingresos_renovacion in zip(tasas, renovaciones):
+        ingresos = ingresos_renovacion + otros_ingresos
+        ingresos_por_mes = np.add.reduceat(ingresos, cortes)
+        neto = ingresos_por_mes - egresos_por_mes
+        acumulado = np.cumsum(neto)
+        acumulado_diario = np.cumsum(ingresos - egresos)
+        escenarios.append({
+            'renovacion': tasa,
+            'meses': [
+                {
+                    'mes': f'{mes:%Y-%m}',
+                    'ingresos': round(float(ingresos_por_mes[i]), 2),
+                    'egresos': round(float(egresos_por_mes[i]), 2),
+                    'neto': round(float(neto[i]), 2),
+                    'acumulado': round(float(acumulado[i]), 2),
+                }
+                for i, mes in enumerate(lista_meses)
+            ],
+            'total_ingresos': round(float(ingresos.sum()), 2),
+            'total_egresos': round(float(egresos.sum()), 2),
+            'resultado': round(float(acumulado[-1]), 2),
+            # Día con la caja acumulada más baja (para planificar compras)
+            'dia_minimo': fechas[int(np.argmin(acumulado_diario))],
+            # Serie diaria para graficar (las listas se arman en NumPy, no por día)
+            'dias': [
+                {'dia': fecha, 'ingresos': ingreso, 'egresos': egreso, 'acumulado': saldo}
+                for fecha, ingreso, egreso, saldo in zip(
+                    fechas,
+                    np.round(ingresos, 2).tolist(),
+                    egresos_diarios,
+                    np.round(acumulado_diario, 2).tolist(),
+                )
+            ],
+        })
+
+    return {
+        'desde': hoy.isoformat(),
+        'hasta': (fin - timedelta(days=1)).isoformat(),
+        'supuestos': {
+            'dias_historial': DIAS_HISTORIAL,
+            'otros_ingresos_diarios': round(otros_ingresos, 2),
+        },
+        'escenarios': escenarios,
+    }
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from gimnasio.cache import obtener_version
+from gimnasio.fechas import rango_mes
+from .models import GastoFijo, ResumenDiarioEgreso, ResumenDiarioPago
+
+
+# ============================================
+# ESTADO DE RESULTADOS (INGRESOS - EGRESOS - GASTOS FIJOS)
+# ============================================
+#
+# Una query agrupada por fuente para todo el rango (no una por mes):
+# ingresos y egresos salen de los resúmenes diarios agrupados con
+# TruncMonth; los gastos fijos activos se proyectan igual en cada mes.
+# El resultado se guarda en el cache con la versión 'finanzas', que se
+# incrementa con cada cambio en Pago, Egreso o GastoFijo. Tanto el reporte
+# como la versión viven en el cache compartido (CACHES, chequeo
+# gimnasio.E001), así que un cambio en un worker invalida a todos.
+# La duración es corta a propósito: acota lo que puede durar un reporte
+# viejo si algún cambio no pasa por las señales (QuerySet.update(), SQL a mano).
+
+DURACION_CACHE = 5 * 60
+
+
+def meses_entre(desde, hasta):
+    """Primer día de cada mes entre `desde` y `hasta` (inclusive)"""
+    meses = []
+    mes = desde.replace(day=1)
+    while mes <= hasta:
+        meses.append(mes)
+        mes = rango_mes(mes)[1]
+    return meses
+
+
+def _por_mes(resumenes, campo):
+    """{mes: {valor de campo: total}} con una sola query agrupada"""
+    totales = defaultdict(dict)
+    filas = (
+        resumenes.annotate(mes=TruncMonth('dia'))
+        .order_by()
+        .values('mes', campo)
+        .annotate(subtotal=Sum('total'))
+    )
+    for fila in filas:
+        totales[fila['mes']][fila[campo]] = float(fila['subtotal'])
+    return totales
+
+
+def estado_resultados(desde, hasta):
+    """
+    Reporte mes a mes entre los meses de `desde` y `hasta` (fechas cualquiera
+    dentro del mes). Usa el cache mientras no cambien los movimientos.
+    """
+    meses = meses_entre(desde, hasta)
+    version = obtener_version('finanzas')
+    clave = f'estado_resultados:{version}:{meses[0]:%Y-%m}:{meses[-1]:%Y-%m}'
+
+    reporte = cache.get(clave)
+    if reporte is None:
+        reporte = _calcular(meses)
+        cache.set(clave, reporte, DURACION_CACHE)
+    return reporte
+
+
+def _calcular(meses):
+    inicio, fin = meses[0], rango_mes(meses[-1])[1]
+
+    ingresos = _por_mes(ResumenDiarioPago.objects.filter(dia__gte=inicio, dia__lt=fin), 'concepto')
+    egresos = _por_mes(ResumenDiarioEgreso.objects.filter(dia__gte=inicio, dia__lt=fin), 'categoria')
+    gastos_fijos = {
+        fila['categoria']: float(fila['subtotal'])
+        for fila in GastoFijo.objects.filter(activo=True).order_by()
+        .values('categoria').annotate(subtotal=Sum('monto_mensual'))
+    }
+    total_fijos = sum(gastos_fijos.values())
+
+    filas = []
+    for mes in meses:
+        total_ingresos = sum(ingresos[mes].values())
+        total_egresos = sum(egresos[mes].values())
+        filas.append({
+            'mes': f'{mes:%Y-%m}',
+            'ingresos': ingresos[mes],
+            'total_ingresos': round(total_ingresos, 2),
+            'egresos': egresos[mes],
+            'total_egresos': round(total_egresos, 2),
+            'gastos_fijos': gastos_fijos,
+            'total_gastos_fijos': round(total_fijos, 2),
+            'resultado': round(total_ingresos - total_egresos - total_fijos, 2),
+        })
+
+    return {
+        'desde': f'{meses[0]:%Y-%m}',
+        'hasta': f'{meses[-1]:%Y-%m}',
+        'meses': filas,
+        'total_ingresos': round(sum(fila['total_ingresos'] for fila in filas), 2),
+        'total_egresos': round(sum(fila['total_egresos'] for fila in filas), 2),
+        'total_gastos_fijos': round(total_fijos * len(filas), 2),
+        'resultado': round(sum(fila['resultado'] for fila in filas), 2),
+    }
@@ -0,0 +1,136 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from gimnasio.cache import incrementar_version
+
+from .models import Egreso, Pago, ResumenDiarioEgreso, ResumenDiarioPago
+
+
+# ============================================
+# RESÚMENES DIARIOS (ROLLUPS) DE PAGOS Y EGRESOS
+# ============================================
+#
+# Cada alta, edición o baja de un Pago/Egreso suma o resta su monto en la
+# fila del día (y método/concepto o categoría) con un UPDATE ... SET
+# total = total + x, dentro de la misma transacción que el cambio.
+# Los totales de un día, mes o año se leen de estas filas en lugar de
+# recorrer el historial.
+#   - QuerySet.delete(): Django borra de a objeto y manda post_delete por
+#     cada uno, así que se restan igual (finanzas/signals.py).
+#   - QuerySet.update(): PagoQuerySet/EgresoQuerySet.update() reconstruyen
+#     los días afectados si cambia un campo de los resúmenes.
+#   - bulk_create() y SQL a mano no pasan por acá: usar sumar_pagos() o,
+#     después de cargas masivas, `manage.py reconstruir_resumenes`.
+
+CAMPOS_PAGO = ('fecha_pago', 'metodo_pago', 'concepto', 'monto')
+CAMPOS_EGRESO = ('fecha', 'categoria', 'monto')
+
+
+def _sumar(modelo, clave, monto, cantidad):
+    """Aplica el delta a la fila `clave` (la crea si todavía no existe)"""
+    fila = modelo.objects.filter(**clave)
+    cambios = {'total': F('total') + monto, 'cantidad': F('cantidad') + cantidad}
+    if not fila.update(**cambios):
+        modelo.objects.bulk_create([modelo(**clave)], ignore_conflicts=True)
+        fila.update(**cambios)
+
+
+def valores_actuales(instancia, campos):
+    """Valores de `campos` ya convertidos (fechas y Decimal aunque se hayan asignado como texto)"""
+    return {
+        campo: instancia._meta.get_field(campo).to_python(getattr(instancia, campo))
+        for campo in campos
+    }
+
+
+def sumar_pago(valores, signo=1):
+    """valores: dict con CAMPOS_PAGO; signo -1 para restar"""
+    _sumar(
+        ResumenDiarioPago,
+        {'dia': valores['fecha_pago'], 'metodo_pago': valores['metodo_pago'], 'concepto': valores['concepto']},
+        signo * valores['monto'],
+        signo
+    )
+
+
+def sumar_pagos(pagos):
+    """
+    Suma pagos creados con bulk_create: agrupa en memoria y hace un UPDATE
+    por día/método/concepto en lugar de uno por pago.
+    """
+    grupos = {}
+    for pago in pagos:
+        clave = (pago.fecha_pago, pago.metodo_pago, pago.concepto)
+        monto, cantidad = grupos.get(clave, (0, 0))
+        grupos[clave] = (monto + pago.monto, cantidad + 1)
+
+    for (dia, metodo_pago, concepto), (monto, cantidad) in grupos.items():
+        _sumar(ResumenDiarioPago, {'dia': dia, 'metodo_pago': metodo_pago, 'concepto': concepto}, monto, cantidad)
+
+
+def sumar_egreso(valores, signo=1):
+    """valores: dict con CAMPOS_EGRESO; signo -1 para restar"""
+    _sumar(
+        ResumenDiarioEgreso,
+        {'dia': valores['fecha'], 'categoria': valores['categoria']},
+        signo * valores['monto'],
+        signo
+    )
+
+
+def reconstruir(desde=None, hasta=None):
+    """
+    Recalcula los resúmenes desde los movimientos (todo o un rango de días).
+
+    Devuelve (filas de pagos, filas de egresos).
+    """
+    with transaction.atomic():
+        filas = _reconstruir(desde, hasta)
+    incrementar_version('finanzas')
+    return filas
+
+
+def _reconstruir(desde, hasta):
+    pagos = Pago.objects.all()
+    egresos = Egreso.objects.all()
+    resumenes_pago = ResumenDiarioPago.objects.all()
+    resumenes_egreso = ResumenDiarioEgreso.objects.all()
+    if desde:
+        pagos = pagos.filter(fecha_pago__gte=desde)
+        egresos = egresos.filter(fecha__gte=desde)
+        resumenes_pago = resumenes_pago.filter(dia__gte=desde)
+        resumenes_egreso = resumenes_egreso.filter(dia__gte=desde)
+    if hasta:
+        pagos = pagos.filter(fecha_pago__lte=hasta)
+        egresos = egresos.filter(fecha__lte=hasta)
+        resumenes_pago = resumenes_pago.filter(dia__lte=hasta)
+        resumenes_egreso = resumenes_egreso.filter(dia__lte=hasta)
+
+    filas_pago = [
+        ResumenDiarioPago(
+            dia=fila['fecha_pago'],
+            metodo_pago=fila['metodo_pago'],
+            concepto=fila['concepto'],
+            cantidad=fila['cantidad'],
+            total=fila['total']
+        )
+        for fila in pagos.order_by().values('fecha_pago', 'metodo_pago', 'concepto')
+        .annotate(cantidad=Count('id'), total=Sum('monto'))
+    ]
+    filas_egreso = [
+        ResumenDiarioEgreso(
+            dia=fila['fecha'],
+            categoria=fila['categoria'],
+            cantidad=fila['cantidad'],
+            total=fila['total']
+        )
+        for fila in egresos.order_by().values('fecha', 'categoria')
+        .annotate(cantidad=Count('id'), total=Sum('monto'))
+    ]
+
+    resumenes_pago.delete()
+    resumenes_egreso.delete()
+    ResumenDiarioPago.objects.bulk_create(filas_pago, batch_size=1000)
+    ResumenDiarioEgreso.objects.bulk_create(filas_egreso, batch_size=1000)
+
+    return len(filas_pago), len(filas_egreso)
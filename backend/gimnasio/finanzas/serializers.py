@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Pago, GastoFijo, Egreso, EstadoCuenta
+from clientes.models import Cliente
+from membresias.models import Membresia
+from .models import Pago, GastoFijo, Egreso, EstadoCuenta, MovimientoConciliacion
 
 
 # ============================================
@@ -211,9 +213,32 @@ class EstadoCuentaCreateSerializer(serializers.ModelSerializer):
             'estado',
             'observaciones'
         ]
+        # Derivados de pagos y membresías (finanzas/cuentas.py)
+        read_only_fields = ['saldo_pendiente', 'ultimo_pago']
+
+
+# ============================================
+# SERIALIZERS PARA CONCILIACIÓN
+# ============================================
+
+class MovimientoConciliacionSerializer(serializers.ModelSerializer):
+    """Línea del extracto en la cola de revisión"""
+    motivo_display = serializers.CharField(source='get_motivo_display', read_only=True)
+    
+    class Meta:
+        model = MovimientoConciliacion
+        fields = '__all__'
+
+
+class ConfirmarMovimientoSerializer(serializers.Serializer):
+    """Cliente (y opcionalmente membresía) al que se asigna una línea del extracto"""
+    cliente = serializers.PrimaryKeyRelatedField(queryset=Cliente.objects.all())
+    membresia = serializers.PrimaryKeyRelatedField(queryset=Membresia.objects.all(), required=False, allow_null=True)
+    concepto = serializers.ChoiceField(choices=Pago.CONCEPTO_CHOICES, default='membresia')
     
-    def validate_saldo_pendiente(self, value):
-        """Validar que el saldo sea mayor o igual a 0"""
-        if value < 0:
-            raise serializers.ValidationError("El saldo pendiente no puede ser negativo")
-        return value
\ No newline at end of file
+    def validate(self, data):
+        """La membresía tiene que ser del cliente elegido"""
+        membresia = data.get('membresia')
+        if membresia and membresia.cliente_id != data['cliente'].id:
+            raise serializers.ValidationError({'membresia': 'La membresía no es de este cliente'})
+        return data
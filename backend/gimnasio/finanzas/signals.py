@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from gimnasio.cache import invalidar_al_guardar
+from membresias.models import Membresia
+from .cuentas import CAMPOS_MEMBRESIA_CUENTA, CAMPOS_PAGO_CUENTA, aplicar_cambio, aporte_membresia, aporte_pago
+from .models import Egreso, GastoFijo, Pago
+from .resumenes import CAMPOS_EGRESO, CAMPOS_PAGO, sumar_egreso, sumar_pago, valores_actuales
+
+
+# ============================================
+# SEÑALES: restar las bajas de los resúmenes diarios
+# ============================================
+# post_delete corre dentro de la transacción del borrado y también se
+# dispara en QuerySet.delete() (las altas y ediciones van por save()).
+
+@receiver(post_delete, sender=Pago)
+def restar_pago(sender, instance, **kwargs):
+    sumar_pago(valores_actuales(instance, CAMPOS_PAGO), -1)
+
+
+@receiver(post_delete, sender=Pago)
+def restar_pago_de_cuenta(sender, instance, **kwargs):
+    aplicar_cambio(valores_actuales(instance, CAMPOS_PAGO_CUENTA), None, aporte_pago, recalcular_ultimo_pago=True)
+
+
+@receiver(post_delete, sender=Egreso)
+def restar_egreso(sender, instance, **kwargs):
+    sumar_egreso(valores_actuales(instance, CAMPOS_EGRESO), -1)
+
+
+# ============================================
+# SEÑALES: membresías en el estado de cuenta (finanzas/cuentas.py)
+# ============================================
+# Membresia.save() envuelve pre_save, el guardado y post_save en una
+# transacción: pre_save lee la versión anterior con SELECT ... FOR UPDATE
+# y post_save aplica la diferencia, como Pago.save(). Las bajas van por
+# post_delete. Las transiciones masivas de membresias/estados.py no pasan
+# por save() pero no cambian el saldo (activa/vencida/suspendida cuentan igual).
+
+@receiver(pre_save, sender=Membresia)
+def leer_membresia_anterior(sender, instance, raw=False, **kwargs):
+    instance._cuenta_anterior = None
+    if instance.pk and not raw:
+        instance._cuenta_anterior = (
+            Membresia.objects.select_for_update().filter(pk=instance.pk)
+            .values(*CAMPOS_MEMBRESIA_CUENTA).first()
+        )
+
+
+@receiver(post_save, sender=Membresia)
+def sumar_membresia_a_cuenta(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = instance.__dict__.pop('_cuenta_anterior', None)
+    actual = valores_actuales(instance, CAMPOS_MEMBRESIA_CUENTA)
+    if anterior != actual:
+        aplicar_cambio(anterior, actual, aporte_membresia)
+
+
+@receiver(post_delete, sender=Membresia)
+def restar_membresia_de_cuenta(sender, instance, **kwargs):
+    aplicar_cambio(valores_actuales(instance, CAMPOS_MEMBRESIA_CUENTA), None, aporte_membresia)
+
+
+# ============================================
+# SEÑALES: invalidar los reportes cacheados (finanzas/reportes.py)
+# ============================================
+
+@receiver([post_save, post_delete], sender=Pago)
+@receiver([post_save, post_delete], sender=Egreso)
+@receiver([post_save, post_delete], sender=GastoFijo)
+def invalidar_reportes(sender, **kwargs):
+    invalidar_al_guardar('finanzas')
@@ -1,3 +1,676 @@
+import csv
+import gzip
+import io
+import json
+from base64 import urlsafe_b64encode
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.db.models import Count, Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from gimnasio.testing import ConsultasConstantesMixin, PlanDeConsultaMixin, crear_cliente
+from membresias.models import Membresia, Plan
+from .conciliacion import _fecha, _monto, conciliar, dnis_en, leer_csv, leer_ofx
+from .cuentas import recalcular_cuentas
+from .models import (
+    Egreso, EstadoCuenta, GastoFijo, MovimientoConciliacion, Pago, ResumenDiarioEgreso, ResumenDiarioPago
+)
+from .proyeccion import proyectar_flujo
+from .resumenes import reconstruir
+from .reportes import estado_resultados
+
+
+class ListadosSinNMasUnoTest(ConsultasConstantesMixin, TestCase):
+    """Los listados de finanzas traen el cliente en el mismo JOIN"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def crear_pagos(self, cantidad):
+        for _ in range(cantidad):
+            Pago.objects.create(
+                cliente=crear_cliente(),
+                fecha_pago=date.today(),
+                monto=1000,
+                metodo_pago='efectivo',
+            )
+
+    def crear_morosos(self, cantidad):
+        for _ in range(cantidad):
+            EstadoCuenta.objects.create(cliente=crear_cliente(), estado='debe', saldo_pendiente=500)
+
+    def test_pagos(self):
+        for url in ['/api/finanzas/pagos/', '/api/finanzas/pagos/hoy/', '/api/finanzas/pagos/mes_actual/']:
+            with self.subTest(url=url):
+                self.assertConsultasConstantes(url, self.crear_pagos)
+
+    def test_estados_de_cuenta(self):
+        for url in ['/api/finanzas/estado/', '/api/finanzas/estado/morosos/']:
+            with self.subTest(url=url):
+                self.assertConsultasConstantes(url, self.crear_morosos)
+
+
+class FiltrosDeFechaTest(PlanDeConsultaMixin, TestCase):
+    """Los filtros de fecha de pagos y egresos son rangos que usan los índices compuestos"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente()
+
+    def test_rangos_sin_funciones_sobre_la_columna(self):
+        consultas = {
+            'fecha_pago': [
+                '/api/finanzas/pagos/mes_actual/',
+                '/api/finanzas/pagos/?fecha_desde=2026-01-01&fecha_hasta=2026-01-31',
+            ],
+            'fecha': [
+                '/api/finanzas/egresos/mes_actual/',
+                '/api/finanzas/egresos/?fecha_desde=2026-01-01&fecha_hasta=2026-01-31',
+            ],
+        }
+        for columna, urls in consultas.items():
+            for url in urls:
+                with self.subTest(url=url), CaptureQueriesContext(connection) as capturadas:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                    for consulta in capturadas.captured_queries:
+                        self.assertNotRegex(consulta['sql'], rf'\w+\([^()]*"{columna}"')
+
+    def test_fecha_hasta_incluye_el_dia(self):
+        for dia in [date(2026, 1, 31), date(2026, 2, 1)]:
+            Pago.objects.create(cliente=self.cliente, fecha_pago=dia, monto=1000, metodo_pago='efectivo')
+
+        respuesta = self.client.get('/api/finanzas/pagos/?fecha_desde=2026-01-01&fecha_hasta=2026-01-31')
+
+        self.assertEqual([p['fecha_pago'] for p in respuesta.data['results']], ['2026-01-31'])
+
+    def test_pagos_usan_indice_fecha_metodo(self):
+        for url in [
+            '/api/finanzas/pagos/mes_actual/',
+            '/api/finanzas/pagos/?fecha_desde=2026-01-01&fecha_hasta=2026-01-31',
+            '/api/finanzas/pagos/?fecha_desde=2026-01-01&metodo_pago=efectivo',
+        ]:
+            with self.subTest(url=url):
+                self.assertEndpointUsaIndice(url, 'finanzas_pago', 'pago_fecha_metodo_idx')
+
+    def test_pagos_de_un_cliente_usan_indice_cliente_fecha(self):
+        for url in [
+            f'/api/finanzas/pagos/?cliente={self.cliente.id}',
+            f'/api/finanzas/pagos/?cliente={self.cliente.id}&fecha_desde=2026-01-01',
+        ]:
+            with self.subTest(url=url):
+                self.assertEndpointUsaIndice(url, 'finanzas_pago', 'pago_cliente_fecha_idx')
+
+    def test_egresos_usan_indice_fecha_categoria(self):
+        for url in [
+            '/api/finanzas/egresos/mes_actual/',
+            '/api/finanzas/egresos/?fecha_desde=2026-01-01&fecha_hasta=2026-01-31',
+            '/api/finanzas/egresos/?fecha_desde=2026-01-01&categoria=mantenimiento',
+        ]:
+            with self.subTest(url=url):
+                self.assertEndpointUsaIndice(url, 'finanzas_egreso', 'egreso_fecha_categoria_idx')
+
+
+class PaginacionPorCursorTest(TestCase):
+    """El cursor guarda (fecha_pago, id): muchas filas con la misma fecha no repiten ni cortan páginas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        cliente = crear_cliente()
+        for numero in range(130):
+            Pago.objects.create(
+                cliente=cliente,
+                fecha_pago=date(2026, 1, 1 if numero < 100 else 2),
+                monto=1000,
+                metodo_pago='efectivo',
+            )
+
+    def recorrer(self, url):
+        paginas = []
+        while url:
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            for consulta in consultas.captured_queries:
+                self.assertNotIn('OFFSET', consulta['sql'])
+            paginas.append(respuesta.data)
+            url = respuesta.data['next']
+        return paginas
+
+    def test_recorre_todo_sin_repetir(self):
+        paginas = self.recorrer('/api/finanzas/pagos/?page_size=40')
+
+        ids = [pago['id'] for pagina in paginas for pago in pagina['results']]
+        esperados = list(Pago.objects.order_by('-fecha_pago', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperados)
+
+    def test_previous_devuelve_la_pagina_anterior(self):
+        paginas = self.recorrer('/api/finanzas/pagos/?page_size=40')
+
+        respuesta = self.client.get(paginas[2]['previous'])
+
+        self.assertEqual(respuesta.data['results'], paginas[1]['results'])
+        self.assertIsNone(paginas[0]['previous'])
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/finanzas/pagos/?cursor=no-es-un-cursor').status_code, 404)
+
+    def test_cursor_con_valores_de_otro_tipo(self):
+        # JSON válido con la cantidad de columnas correcta, pero tipos que no van
+        for valores in (['no-es-fecha', 10], ['2026-01-01', 'diez'], [[1], 10], ['2026-13-01', 10]):
+            with self.subTest(valores=valores):
+                cursor = urlsafe_b64encode(json.dumps({'v': valores, 'a': 0}).encode()).decode()
+                self.assertEqual(self.client.get(f'/api/finanzas/pagos/?cursor={cursor}').status_code, 404)
+
+    def test_cursor_armado_a_mano_con_tipos_correctos(self):
+        ultimo = Pago.objects.filter(fecha_pago=date(2026, 1, 2)).order_by('id').first()
+        cursor = urlsafe_b64encode(json.dumps({'v': ['2026-01-02', ultimo.id], 'a': 0}).encode()).decode()
+
+        respuesta = self.client.get(f'/api/finanzas/pagos/?cursor={cursor}&page_size=500')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data['results']), 100)
+
+
+class EstadoResultadosCacheTest(TestCase):
+    """El reporte cacheado se invalida con cada pago nuevo"""
+
+    def test_pago_nuevo_invalida_el_reporte(self):
+        hoy = date.today()
+        self.assertEqual(estado_resultados(hoy, hoy)['total_ingresos'], 0)
+
+        Pago.objects.create(
+            cliente=crear_cliente(), fecha_pago=hoy, monto=1500, metodo_pago='efectivo', concepto='membresia'
+        )
+
+        self.assertEqual(estado_resultados(hoy, hoy)['total_ingresos'], 1500)
+
+
+class CuentasIncrementalesTest(TestCase):
+    """Cada alta, edición o baja deja las cuentas igual que recalcular_cuentas()"""
+
+    def setUp(self):
+        self.hoy = date.today()
+        self.plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        self.ana = crear_cliente()
+        self.beto = crear_cliente()
+
+    def cuentas(self):
+        return list(
+            EstadoCuenta.objects.order_by('cliente_id')
+            .values_list('cliente_id', 'saldo_pendiente', 'estado', 'ultimo_pago')
+        )
+
+    def assertIgualARecalcular(self):
+        incrementales = self.cuentas()
+        self.assertEqual(recalcular_cuentas(), (0, 0))
+        self.assertEqual(self.cuentas(), incrementales)
+
+    def test_membresia(self):
+        membresia = Membresia.objects.create(
+            cliente=self.ana, plan=self.plan, fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30), precio_contratado=1000
+        )
+        self.assertIgualARecalcular()
+
+        pasos = [
+            ('precio', {'precio_contratado': 1200}),
+            ('cancelada', {'estado': 'cancelada'}),
+            ('reactivada', {'estado': 'activa'}),
+            ('cambio de cliente', {'cliente': self.beto}),
+        ]
+        for nombre, cambios in pasos:
+            with self.subTest(paso=nombre):
+                for campo, valor in cambios.items():
+                    setattr(membresia, campo, valor)
+                membresia.save()
+                self.assertIgualARecalcular()
+
+        membresia.delete()
+        self.assertIgualARecalcular()
+
+    def test_error_en_la_cuenta_revierte_la_membresia(self):
+        membresia = Membresia.objects.create(
+            cliente=self.ana, plan=self.plan, fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30), precio_contratado=1000
+        )
+
+        membresia.precio_contratado = 1500
+        with mock.patch('finanzas.signals.aplicar_cambio', side_effect=IntegrityError('falla')):
+            with self.assertRaises(IntegrityError):
+                membresia.save()
+
+        # El receptor corre en la transacción de save(): no queda a medias
+        self.assertEqual(Membresia.objects.get(pk=membresia.pk).precio_contratado, 1000)
+        self.assertIgualARecalcular()
+
+    def test_pago(self):
+        Membresia.objects.create(
+            cliente=self.ana, plan=self.plan, fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30), precio_contratado=1000
+        )
+        pago = Pago.objects.create(
+            cliente=self.ana, fecha_pago=self.hoy - timedelta(days=1), monto=400,
+            metodo_pago='efectivo', concepto='membresia'
+        )
+        self.assertIgualARecalcular()
+
+        pasos = [
+            ('monto', {'monto': 1000}),
+            ('fecha', {'fecha_pago': self.hoy}),
+            ('concepto', {'concepto': 'otro'}),
+            ('membresía otra vez', {'concepto': 'membresia'}),
+            ('cambio de cliente', {'cliente': self.beto}),
+        ]
+        for nombre, cambios in pasos:
+            with self.subTest(paso=nombre):
+                for campo, valor in cambios.items():
+                    setattr(pago, campo, valor)
+                pago.save()
+                self.assertIgualARecalcular()
+
+        pago.delete()
+        self.assertIgualARecalcular()
+
+
+class ExportacionTest(TestCase):
+    """GET /pagos/exportar/ en streaming, por lotes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        cliente = crear_cliente()
+        self.pagos = [
+            Pago.objects.create(
+                cliente=cliente, fecha_pago=date(2026, 3, dia), monto=100 * dia,
+                metodo_pago='efectivo' if dia % 2 else 'transferencia', concepto='membresia'
+            )
+            for dia in range(1, 6)
+        ]
+
+    def exportar(self, parametros=''):
+        respuesta = self.client.get(f'/api/finanzas/pagos/exportar/{parametros}')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, b''.join(respuesta.streaming_content)
+
+    def test_csv(self):
+        respuesta, contenido = self.exportar()
+
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="pagos.csv"', respuesta['Content-Disposition'])
+        filas = list(csv.DictReader(io.StringIO(contenido.decode('utf-8'))))
+        self.assertEqual([int(fila['id']) for fila in filas], [pago.pk for pago in self.pagos])
+        self.assertEqual(filas[0]['monto'], '100.00')
+        self.assertEqual(filas[0]['fecha_pago'], '2026-03-01')
+
+    def test_jsonl(self):
+        respuesta, contenido = self.exportar('?formato=jsonl')
+
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+        filas = [json.loads(linea) for linea in contenido.decode('utf-8').splitlines()]
+        self.assertEqual([fila['id'] for fila in filas], [pago.pk for pago in self.pagos])
+        self.assertEqual(filas[1]['metodo_pago'], 'transferencia')
+
+    def test_filtros_del_listado(self):
+        _, contenido = self.exportar('?formato=jsonl&metodo_pago=transferencia')
+
+        filas = [json.loads(linea) for linea in contenido.decode('utf-8').splitlines()]
+        self.assertEqual([fila['id'] for fila in filas], [self.pagos[1].pk, self.pagos[3].pk])
+
+    def test_gzip(self):
+        _, plano = self.exportar()
+        respuesta, comprimido = self.exportar('?gzip=1')
+
+        self.assertEqual(respuesta['Content-Type'], 'application/gzip')
+        self.assertIn('filename="pagos.csv.gz"', respuesta['Content-Disposition'])
+        self.assertEqual(gzip.decompress(comprimido), plano)
+
+    def test_formato_invalido(self):
+        respuesta = self.client.get('/api/finanzas/pagos/exportar/?formato=xml')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('error', respuesta.data)
+
+    def test_varios_lotes(self):
+        with mock.patch('gimnasio.exportacion.TAMANO_LOTE', 2):
+            respuesta = self.client.get('/api/finanzas/pagos/exportar/?formato=jsonl')
+            with CaptureQueriesContext(connection) as consultas:
+                contenido = b''.join(respuesta.streaming_content)
+
+        filas = [json.loads(linea) for linea in contenido.decode('utf-8').splitlines()]
+        self.assertEqual([fila['id'] for fila in filas], [pago.pk for pago in self.pagos])
+        # 5 filas de a 2: tres consultas por keyset, sin OFFSET
+        self.assertEqual(len(consultas), 3)
+        self.assertFalse(any('OFFSET' in consulta['sql'] for consulta in consultas))
+
+
+class ConciliacionLecturaTest(TestCase):
+    """Lectores de extractos y parseo de cada campo"""
+
+    def test_monto(self):
+        casos = {
+            '1234.56': '1234.56',
+            '1234,56': '1234.56',
+            '1.234,56': '1234.56',
+            '1,234.56': '1234.56',
+            '15.000': '15000.00',
+            '$ 1.500': '1500.00',
+            '1,234,567.89': '1234567.89',
+            '-200,00': '-200.00',
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto=texto):
+                self.assertEqual(_monto(texto), Decimal(esperado))
+
+        for texto in ['1.5', '1234.567', '1.234.56', '12,34.56', '1.234,567', 'abc', '']:
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    _monto(texto)
+
+    def test_fecha(self):
+        for texto in ['2026-03-05', '05/03/2026', '05-03-2026', '05/03/26', '20260305120000[-3:ART]']:
+            with self.subTest(texto=texto):
+                self.assertEqual(_fecha(texto), date(2026, 3, 5))
+        with self.assertRaises(ValueError):
+            _fecha('5 de marzo')
+
+    def test_dni_sale_de_la_columna_o_de_un_cuit(self):
+        self.assertEqual(dnis_en('38.280.942', ''), {'38280942'})
+        self.assertEqual(dnis_en('20-38280942-3', ''), {'38280942'})
+        self.assertEqual(dnis_en('', 'Transferencia de 27-01234567-3'), {'1234567'})
+        # Un número suelto en la descripción puede ser cualquier cosa
+        self.assertEqual(dnis_en('', 'Cuenta 38280942 cuota'), set())
+
+    def test_leer_csv(self):
+        archivo = io.BytesIO(
+            'Fecha de operación,Importe,Nro. operación,Concepto,CUIT\n'
+            '05/03/2026,"1.500,00",A1,Cuota marzo,20-38280942-3\n'.encode('utf-8-sig')
+        )
+
+        self.assertEqual(list(leer_csv(archivo)), [{
+            'fecha': '05/03/2026',
+            'monto': '1.500,00',
+            'referencia': 'A1',
+            'descripcion': 'Cuota marzo',
+            'dni': '20-38280942-3',
+        }])
+
+    def test_leer_ofx(self):
+        archivo = io.BytesIO(
+            b'OFXHEADER:100\n<OFX><BANKTRANLIST>\n'
+            b'<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20260305\n<TRNAMT>1500.5\n'
+            b'<FITID>F1\n<NAME>Juan Perez\n<MEMO>Cuota\n</STMTTRN>\n'
+            b'</BANKTRANLIST></OFX>\n'
+        )
+
+        self.assertEqual(list(leer_ofx(archivo)), [{
+            'fecha': '20260305',
+            'monto': Decimal('1500.5'),
+            'referencia': 'F1',
+            'descripcion': 'Juan Perez Cuota',
+        }])
+
+
+class ConciliacionTest(TestCase):
+    """Conciliación de extractos contra clientes, membresías y cuentas"""
+
+    ENCABEZADO = 'fecha,monto,referencia,descripcion,dni\n'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.hoy = date.today()
+        plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        self.ana = crear_cliente(dni='38280942')
+        self.beto = crear_cliente()
+        self.membresia = Membresia.objects.create(
+            cliente=self.ana, plan=plan, fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30), precio_contratado=1000
+        )
+        Membresia.objects.create(
+            cliente=self.beto, plan=plan, fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30), precio_contratado=750
+        )
+
+    def extracto(self, *lineas):
+        return io.BytesIO((self.ENCABEZADO + ''.join(linea + '\n' for linea in lineas)).encode('utf-8'))
+
+    def conciliar(self, *lineas, **kwargs):
+        return conciliar(leer_csv(self.extracto(*lineas)), 'transferencia', **kwargs)
+
+    def test_confirma_solo_dni_y_monto_de_membresia(self):
+        reporte = self.conciliar(f'{self.hoy},"1.000,00",OP1,Cuota,38.280.942')
+
+        self.assertEqual(reporte['pagos'], 1)
+        pago = Pago.objects.get()
+        self.assertEqual(
+            (pago.cliente_id, pago.membresia_id, pago.monto, pago.referencia),
+            (self.ana.pk, self.membresia.pk, Decimal('1000.00'), 'OP1')
+        )
+        self.assertEqual(EstadoCuenta.objects.get(cliente=self.ana).saldo_pendiente, 0)
+        self.assertEqual(recalcular_cuentas(), (0, 0))
+
+    def test_lineas_dudosas_quedan_para_revisar(self):
+        reporte = self.conciliar(
+            f'{self.hoy},900,OP1,Cuota,38280942',
+            f'{self.hoy},750,OP2,Cuenta 38280942,',
+            f'{self.hoy},-500,OP3,Comision,',
+        )
+
+        self.assertEqual((reporte['pagos'], reporte['a_revisar'], reporte['ignorados']), (0, 2, 1))
+        movimientos = {m.referencia: m for m in MovimientoConciliacion.objects.all()}
+        self.assertEqual(movimientos['OP1'].motivo, 'monto_distinto')
+        self.assertEqual(movimientos['OP1'].candidatos, [self.ana.pk])
+        # Sin DNI: candidatos por saldo igual al monto
+        self.assertEqual(movimientos['OP2'].motivo, 'sin_cliente')
+        self.assertEqual(movimientos['OP2'].candidatos, [self.beto.pk])
+
+    def test_referencias_repetidas(self):
+        lineas = [
+            f'{self.hoy},1000,OP1,Cuota,38280942',
+            f'{self.hoy},1000,OP1,Cuota,38280942',
+            f'{self.hoy},900,OP2,Cuota,38280942',
+        ]
+        primera = self.conciliar(*lineas)
+        segunda = self.conciliar(*lineas)
+
+        self.assertEqual((primera['pagos'], primera['a_revisar'], primera['duplicados']), (1, 1, 1))
+        self.assertEqual((segunda['pagos'], segunda['a_revisar'], segunda['duplicados']), (0, 0, 3))
+        self.assertEqual(Pago.objects.count(), 1)
+        self.assertEqual(MovimientoConciliacion.objects.count(), 1)
+
+    def test_errores_por_linea(self):
+        archivo = io.BytesIO(
+            self.extracto(
+                f'{self.hoy},1000,OP1,Cuota,38280942',
+                f'{self.hoy},1.5,OP2,Cuota,',
+                'ayer,900,OP3,Cuota,',
+            ).getvalue()
+            + b'2026-03-05,900,OP4,Cuota \xff,\n'
+        )
+
+        # Un lote por línea: los primeros ya se guardaron cuando falla el último
+        reporte = conciliar(leer_csv(archivo), 'transferencia', tamano_lote=1)
+
+        self.assertEqual(reporte['pagos'], 1)
+        self.assertEqual([error['linea'] for error in reporte['errores']], [2, 3, 4])
+        self.assertIn('UTF-8', reporte['errores'][-1]['error'])
+
+    def test_conflicto_sigue_cargando_lo_demas(self):
+        with mock.patch('finanzas.conciliacion.Pago.objects.bulk_create', side_effect=IntegrityError):
+            reporte = self.conciliar(
+                f'{self.hoy},1000,OP1,Cuota,38280942',
+                f'{self.hoy},900,OP2,Cuota,38280942',
+            )
+
+        self.assertEqual(reporte['errores'], [{'linea': 1, 'error': 'Conflicto con otra conciliación, reintentar'}])
+        self.assertEqual(reporte['a_revisar'], 1)
+        self.assertTrue(MovimientoConciliacion.objects.filter(referencia='OP2').exists())
+
+    def test_cola_cuenta_solo_los_movimientos_insertados(self):
+        MovimientoConciliacion.objects.create(
+            metodo_pago='transferencia', referencia='OP2', fecha=self.hoy, monto=900, motivo='sin_cliente'
+        )
+        # Otra conciliación encoló OP2 después del SELECT de referencias cargadas
+        sin_cola = MovimientoConciliacion.objects.none()
+        with mock.patch.object(MovimientoConciliacion.objects, 'filter', return_value=sin_cola):
+            reporte = self.conciliar(
+                f'{self.hoy},800,OP1,Cuota,',
+                f'{self.hoy},900,OP2,Cuota,',
+            )
+
+        self.assertEqual((reporte['a_revisar'], reporte['duplicados']), (1, 1))
+        self.assertEqual(
+            sorted(MovimientoConciliacion.objects.values_list('referencia', flat=True)), ['OP1', 'OP2']
+        )
+
+    def test_endpoint_devuelve_el_reporte_parcial(self):
+        archivo = io.BytesIO(self.extracto(f'{self.hoy},1000,OP1,Cuota,38280942').getvalue() + b'\xff\xfe\n')
+        archivo.name = 'extracto.csv'
+
+        respuesta = self.client.post('/api/finanzas/pagos/conciliar/', {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['pagos'], 1)
+        self.assertEqual(len(respuesta.data['errores']), 1)
+
+
+class ProyeccionFlujoTest(TestCase):
+    """Renovaciones y gastos fijos caen en los días y meses esperados"""
+
+    def test_renovacion_y_gasto_fijo(self):
+        hoy = date(2026, 1, 20)
+        plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        Membresia.objects.create(
+            cliente=crear_cliente(), plan=plan, fecha_inicio=date(2026, 1, 1),
+            fecha_fin=date(2026, 1, 30), precio_contratado=800
+        )
+        # La renovación se cobra al precio actual del plan
+        Plan.objects.filter(pk=plan.pk).update(precio=1200)
+        GastoFijo.objects.create(nombre='Alquiler', categoria='alquiler', monto_mensual=500, dia_vencimiento=31)
+
+        escenario, = proyectar_flujo(hoy, meses=3, tasas=(0.5,))['escenarios']
+
+        # Renovaciones cada 29 días: 30/1 (x0.5), 28/2 (x0.25) y 29/3 (x0.125);
+        # el alquiler vence el 31/1, el 28/2 (mes corto) y el 31/3
+        self.assertEqual(escenario['meses'], [
+            {'mes': '2026-01', 'ingresos': 600.0, 'egresos': 500.0, 'neto': 100.0, 'acumulado': 100.0},
+            {'mes': '2026-02', 'ingresos': 300.0, 'egresos': 500.0, 'neto': -200.0, 'acumulado': -100.0},
+            {'mes': '2026-03', 'ingresos': 150.0, 'egresos': 500.0, 'neto': -350.0, 'acumulado': -450.0},
+        ])
+        self.assertEqual(escenario['dia_minimo'], '2026-03-31')
+
+        # Serie diaria: un día por fila desde hoy y la caja acumulada cierra
+        # con el acumulado del último mes
+        dias = {fila['dia']: fila for fila in escenario['dias']}
+        self.assertEqual(len(escenario['dias']), (date(2026, 4, 1) - hoy).days)
+        self.assertEqual(escenario['dias'][0]['dia'], '2026-01-20')
+        self.assertEqual(escenario['dias'][-1]['dia'], '2026-03-31')
+        self.assertEqual(dias['2026-01-30'], {'dia': '2026-01-30', 'ingresos': 600.0, 'egresos': 0.0, 'acumulado': 600.0})
+        self.assertEqual(dias['2026-01-31']['acumulado'], 100.0)
+        self.assertEqual(dias['2026-02-28'], {'dia': '2026-02-28', 'ingresos': 300.0, 'egresos': 500.0, 'acumulado': -100.0})
+        self.assertEqual(escenario['dias'][-1]['acumulado'], escenario['meses'][-1]['acumulado'])
+
+
+class ResumenesDiariosTest(TestCase):
+    """Los resúmenes diarios siguen cada alta, edición y baja de pagos y egresos"""
+
+    def setUp(self):
+        self.cliente = crear_cliente()
+
+    def pagos_por_dia(self):
+        """{(dia, método, concepto): (cantidad, total)} sin las filas que quedaron en cero"""
+        return {
+            (fila.dia, fila.metodo_pago, fila.concepto): (fila.cantidad, fila.total)
+            for fila in ResumenDiarioPago.objects.exclude(cantidad=0)
+        }
+
+    def egresos_por_dia(self):
+        return {
+            (fila.dia, fila.categoria): (fila.cantidad, fila.total)
+            for fila in ResumenDiarioEgreso.objects.exclude(cantidad=0)
+        }
+
+    def pagar(self, dia, monto, metodo_pago='efectivo'):
+        return Pago.objects.create(
+            cliente=self.cliente, fecha_pago=date(2026, 3, dia), monto=monto,
+            metodo_pago=metodo_pago, concepto='membresia'
+        )
+
+    def test_alta_edicion_y_baja_de_pago(self):
+        pago = self.pagar(1, 100)
+        self.pagar(1, 50)
+        self.assertEqual(self.pagos_por_dia(), {
+            (date(2026, 3, 1), 'efectivo', 'membresia'): (2, Decimal('150.00')),
+        })
+
+        # Cambia monto, día y método: baja el balde viejo y sube el nuevo
+        pago.monto = 300
+        pago.fecha_pago = date(2026, 3, 2)
+        pago.metodo_pago = 'transferencia'
+        pago.save()
+        self.assertEqual(self.pagos_por_dia(), {
+            (date(2026, 3, 1), 'efectivo', 'membresia'): (1, Decimal('50.00')),
+            (date(2026, 3, 2), 'transferencia', 'membresia'): (1, Decimal('300.00')),
+        })
+
+        pago.delete()
+        self.assertEqual(self.pagos_por_dia(), {
+            (date(2026, 3, 1), 'efectivo', 'membresia'): (1, Decimal('50.00')),
+        })
+
+    def test_alta_edicion_y_baja_de_egreso(self):
+        egreso = Egreso.objects.create(
+            fecha=date(2026, 3, 1), categoria='insumos', descripcion='Lavandina',
+            monto=80, metodo_pago='efectivo'
+        )
+        self.assertEqual(self.egresos_por_dia(), {(date(2026, 3, 1), 'insumos'): (1, Decimal('80.00'))})
+
+        egreso.monto = 90
+        egreso.fecha = date(2026, 3, 3)
+        egreso.categoria = 'mantenimiento'
+        egreso.save()
+        self.assertEqual(self.egresos_por_dia(), {(date(2026, 3, 3), 'mantenimiento'): (1, Decimal('90.00'))})
+
+        egreso.delete()
+        self.assertEqual(self.egresos_por_dia(), {})
+
+    def test_update_y_delete_de_queryset(self):
+        self.pagar(1, 100)
+        self.pagar(1, 200)
+        self.pagar(2, 50)
+
+        Pago.objects.filter(fecha_pago=date(2026, 3, 1)).update(fecha_pago=date(2026, 3, 5), monto=10)
+        self.assertEqual(self.pagos_por_dia(), {
+            (date(2026, 3, 2), 'efectivo', 'membresia'): (1, Decimal('50.00')),
+            (date(2026, 3, 5), 'efectivo', 'membresia'): (2, Decimal('20.00')),
+        })
+        self.assertEqual(recalcular_cuentas(), (0, 0))
+
+        Pago.objects.filter(fecha_pago=date(2026, 3, 2)).delete()
+        self.assertEqual(self.pagos_por_dia(), {
+            (date(2026, 3, 5), 'efectivo', 'membresia'): (2, Decimal('20.00')),
+        })
+        self.assertEqual(recalcular_cuentas(), (0, 0))
+
+    def test_reconstruir_coincide_con_los_movimientos(self):
+        for dia, monto, metodo_pago in [(1, 100, 'efectivo'), (1, 40, 'efectivo'), (1, 70, 'transferencia'), (4, 30, 'efectivo')]:
+            self.pagar(dia, monto, metodo_pago)
+        Egreso.objects.create(
+            fecha=date(2026, 3, 2), categoria='insumos', descripcion='Papel', monto=15, metodo_pago='efectivo'
+        )
+        incrementales = (self.pagos_por_dia(), self.egresos_por_dia())
+
+        # Se rompen a mano y se reconstruyen desde los movimientos
+        ResumenDiarioPago.objects.update(total=0, cantidad=99)
+        ResumenDiarioEgreso.objects.all().delete()
+        self.assertEqual(reconstruir(), (3, 1))
 
-# Create your tests here.
+        self.assertEqual((self.pagos_por_dia(), self.egresos_por_dia()), incrementales)
+        self.assertEqual(self.pagos_por_dia(), {
+            (fila['fecha_pago'], fila['metodo_pago'], fila['concepto']): (fila['cantidad'], fila['total'])
+            for fila in Pago.objects.order_by().values('fecha_pago', 'metodo_pago', 'concepto')
+            .annotate(cantidad=Count('id'), total=Sum('monto'))
+        })
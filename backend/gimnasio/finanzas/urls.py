@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PagoViewSet, GastoFijoViewSet, EgresoViewSet, EstadoCuentaViewSet
+from .views import (
+    PagoViewSet, GastoFijoViewSet, EgresoViewSet, EstadoCuentaViewSet, MovimientoConciliacionViewSet, ReporteViewSet
+)
 
 # ============================================
 # ROUTER: Registra los ViewSets automáticamente
@@ -13,6 +15,8 @@ router.register(r'pagos', PagoViewSet, basename='pagos')
 router.register(r'gastos', GastoFijoViewSet, basename='gastos')
 router.register(r'egresos', EgresoViewSet, basename='egresos')
 router.register(r'estado', EstadoCuentaViewSet, basename='estado')
+router.register(r'conciliacion', MovimientoConciliacionViewSet, basename='conciliacion')
+router.register(r'reportes', ReporteViewSet, basename='reportes')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,9 +1,20 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from datetime import date, timedelta
+from django.db import IntegrityError, transaction
 from django.db.models import Sum
-from .models import Pago, GastoFijo, Egreso, EstadoCuenta
+from django.utils.dateparse import parse_date
+from gimnasio.exportacion import ExportacionMixin
+from gimnasio.fechas import rango_mes
+from gimnasio.paginacion import PaginacionAccionesMixin
+from .conciliacion import LECTORES, METODOS_CONCILIABLES, conciliar
+from .proyeccion import MAX_MESES as MAX_MESES_PROYECCION, RENOVACION_POR_DEFECTO, proyectar_flujo
+from .reportes import estado_resultados
+from .models import (
+    Pago, GastoFijo, Egreso, EstadoCuenta, MovimientoConciliacion, ResumenDiarioPago, ResumenDiarioEgreso
+)
 from .serializers import (
     PagoSerializer,
     PagoListSerializer,
@@ -16,13 +27,77 @@ from .serializers import (
     EgresoCreateSerializer,
     EstadoCuentaSerializer,
     EstadoCuentaListSerializer,
-    EstadoCuentaCreateSerializer
+    EstadoCuentaCreateSerializer,
+    MovimientoConciliacionSerializer,
+    ConfirmarMovimientoSerializer
 )
 
 
-class PagoViewSet(viewsets.ModelViewSet):
+def _rango_pedido(request):
+    """
+    (inicio, fin) semiabierto a partir de ?desde=&hasta= (días, inclusive).
+    Sin parámetros: el mes actual. Lanza ValueError si las fechas no son válidas.
+    """
+    inicio, fin = rango_mes(date.today())
+    desde = request.query_params.get('desde', None)
+    hasta = request.query_params.get('hasta', None)
+    if desde:
+        inicio = parse_date(desde)
+    if hasta:
+        fin = parse_date(hasta)
+        fin = fin + timedelta(days=1) if fin else None
+    if not inicio or not fin or fin <= inicio:
+        raise ValueError('Rango de fechas inválido')
+    return inicio, fin
+
+
+def _filtrar_fechas(queryset, request, campo):
+    """
+    Aplica ?fecha_desde=&fecha_hasta= (días, inclusive) como rango semiabierto
+    campo >= desde AND campo < hasta + 1 día. Fechas inválidas se ignoran,
+    igual que el resto de los filtros del listado.
+    """
+    desde = _parsear_fecha(request.query_params.get('fecha_desde', None))
+    hasta = _parsear_fecha(request.query_params.get('fecha_hasta', None))
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': desde})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': hasta + timedelta(days=1)})
+    return queryset
+
+
+def _parsear_fecha(valor):
+    try:
+        return parse_date(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _totales(resumenes, *agrupaciones):
+    """Total, cantidad y subtotales por cada campo de `agrupaciones`, leyendo los resúmenes diarios"""
+    general = resumenes.aggregate(total=Sum('total'), cantidad=Sum('cantidad'))
+    datos = {
+        'total': float(general['total'] or 0),
+        'cantidad': general['cantidad'] or 0,
+    }
+    for campo in agrupaciones:
+        datos[f'por_{campo}'] = {
+            fila[campo]: float(fila['subtotal'])
+            for fila in resumenes.order_by().values(campo).annotate(subtotal=Sum('total'))
+            if fila['subtotal']
+        }
+    return datos
+
+
+class PagoViewSet(ExportacionMixin, PaginacionAccionesMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar pagos"""
     queryset = Pago.objects.all()
+    ordering = ('-fecha_pago', '-id')
+    nombre_exportacion = 'pagos'
+    campos_exportacion = (
+        'id', 'fecha_pago', 'cliente_id', 'cliente__dni', 'cliente__apellido', 'cliente__nombre',
+        'membresia_id', 'concepto', 'metodo_pago', 'monto', 'observaciones'
+    )
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -34,6 +109,9 @@ class PagoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Pago.objects.all()
         
+        if self.action == 'list':
+            queryset = queryset.para_listado()
+        
         cliente_id = self.request.query_params.get('cliente', None)
         if cliente_id:
             queryset = queryset.filter(cliente_id=cliente_id)
@@ -50,51 +128,92 @@ class PagoViewSet(viewsets.ModelViewSet):
         if concepto:
             queryset = queryset.filter(concepto=concepto)
         
-        fecha_desde = self.request.query_params.get('fecha_desde', None)
-        fecha_hasta = self.request.query_params.get('fecha_hasta', None)
-        
-        if fecha_desde:
-            queryset = queryset.filter(fecha_pago__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_pago__lte=fecha_hasta)
-        
-        return queryset
+        return _filtrar_fechas(queryset, self.request, 'fecha_pago')
     
     @action(detail=False, methods=['get'])
     def hoy(self, request):
         hoy = date.today()
-        pagos = Pago.objects.filter(fecha_pago=hoy)
-        serializer = PagoListSerializer(pagos, many=True)
-        return Response(serializer.data)
+        pagos = Pago.objects.para_listado().filter(fecha_pago=hoy)
+        return self.listar_paginado(pagos, PagoListSerializer)
     
     @action(detail=False, methods=['get'])
     def mes_actual(self, request):
-        hoy = date.today()
-        pagos = Pago.objects.filter(
-            fecha_pago__year=hoy.year,
-            fecha_pago__month=hoy.month
+        inicio, fin = rango_mes(date.today())
+        pagos = Pago.objects.para_listado().filter(
+            fecha_pago__gte=inicio,
+            fecha_pago__lt=fin
         )
-        serializer = PagoListSerializer(pagos, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(pagos, PagoListSerializer)
     
     @action(detail=False, methods=['get'])
     def total_mes(self, request):
         hoy = date.today()
-        total = Pago.objects.filter(
-            fecha_pago__year=hoy.year,
-            fecha_pago__month=hoy.month
-        ).aggregate(total=Sum('monto'))['total'] or 0
+        inicio, fin = rango_mes(hoy)
+        total = ResumenDiarioPago.objects.filter(
+            dia__gte=inicio,
+            dia__lt=fin
+        ).aggregate(total=Sum('total'))['total'] or 0
         
         return Response({
             "mes": hoy.strftime("%B %Y"),
             "total": float(total),
             "total_formateado": f"${total:,.2f}"
         })
+    
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Endpoint: GET /pagos/resumen/?desde=2026-01-01&hasta=2026-12-31
+        Total cobrado en el rango, por método de pago y por concepto
+        (desde los resúmenes diarios; sin parámetros, el mes actual)
+        """
+        try:
+            inicio, fin = _rango_pedido(request)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resumenes = ResumenDiarioPago.objects.filter(dia__gte=inicio, dia__lt=fin)
+        datos = {"desde": inicio, "hasta": fin - timedelta(days=1)}
+        datos.update(_totales(resumenes, 'metodo_pago', 'concepto'))
+        return Response(datos)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def conciliar(self, request):
+        """
+        Endpoint: POST /pagos/conciliar/
+        Carga los créditos de un extracto del banco o de Mercado Pago.
+        
+        Campos del form: archivo, formato (csv | ofx; por defecto según la extensión),
+        metodo_pago (transferencia | mercadopago; por defecto transferencia)
+        Las líneas que no se pueden asignar solas quedan en /conciliacion/.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({"error": "Falta el archivo"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        formato = request.data.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        if formato not in LECTORES:
+            return Response(
+                {"error": f"Formato no soportado: {formato} (usar csv u ofx)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        metodo_pago = request.data.get('metodo_pago') or 'transferencia'
+        if metodo_pago not in METODOS_CONCILIABLES:
+            return Response(
+                {"error": f"Método de pago inválido. Opciones: {', '.join(METODOS_CONCILIABLES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Las líneas ilegibles quedan en reporte['errores'] con su número
+        reporte = conciliar(LECTORES[formato](archivo), metodo_pago)
+        return Response(reporte)
 
 
-class GastoFijoViewSet(viewsets.ModelViewSet):
+class GastoFijoViewSet(PaginacionAccionesMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar gastos fijos"""
     queryset = GastoFijo.objects.all()
+    ordering = ('dia_vencimiento', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -121,8 +240,7 @@ class GastoFijoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def activos(self, request):
         gastos = GastoFijo.objects.filter(activo=True)
-        serializer = GastoFijoListSerializer(gastos, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(gastos, GastoFijoListSerializer)
     
     @action(detail=False, methods=['get'])
     def total_mensual(self, request):
@@ -157,13 +275,18 @@ class GastoFijoViewSet(viewsets.ModelViewSet):
                 dia_vencimiento__lte=dia_limite
             )
         
-        serializer = GastoFijoListSerializer(gastos, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(gastos, GastoFijoListSerializer)
 
 
-class EgresoViewSet(viewsets.ModelViewSet):
+class EgresoViewSet(ExportacionMixin, PaginacionAccionesMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar egresos"""
     queryset = Egreso.objects.all()
+    ordering = ('-fecha', '-id')
+    nombre_exportacion = 'egresos'
+    campos_exportacion = (
+        'id', 'fecha', 'categoria', 'descripcion', 'monto', 'metodo_pago',
+        'proveedor', 'comprobante', 'observaciones'
+    )
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -183,44 +306,53 @@ class EgresoViewSet(viewsets.ModelViewSet):
         if metodo_pago:
             queryset = queryset.filter(metodo_pago=metodo_pago)
         
-        fecha_desde = self.request.query_params.get('fecha_desde', None)
-        fecha_hasta = self.request.query_params.get('fecha_hasta', None)
-        
-        if fecha_desde:
-            queryset = queryset.filter(fecha__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha__lte=fecha_hasta)
-        
-        return queryset
+        return _filtrar_fechas(queryset, self.request, 'fecha')
     
     @action(detail=False, methods=['get'])
     def mes_actual(self, request):
-        hoy = date.today()
+        inicio, fin = rango_mes(date.today())
         egresos = Egreso.objects.filter(
-            fecha__year=hoy.year,
-            fecha__month=hoy.month
+            fecha__gte=inicio,
+            fecha__lt=fin
         )
-        serializer = EgresoListSerializer(egresos, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(egresos, EgresoListSerializer)
     
     @action(detail=False, methods=['get'])
     def total_mes(self, request):
         hoy = date.today()
-        total = Egreso.objects.filter(
-            fecha__year=hoy.year,
-            fecha__month=hoy.month
-        ).aggregate(total=Sum('monto'))['total'] or 0
+        inicio, fin = rango_mes(hoy)
+        total = ResumenDiarioEgreso.objects.filter(
+            dia__gte=inicio,
+            dia__lt=fin
+        ).aggregate(total=Sum('total'))['total'] or 0
         
         return Response({
             "mes": hoy.strftime("%B %Y"),
             "total": float(total),
             "total_formateado": f"${total:,.2f}"
         })
+    
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Endpoint: GET /egresos/resumen/?desde=2026-01-01&hasta=2026-12-31
+        Total gastado en el rango y por categoría (desde los resúmenes diarios)
+        """
+        try:
+            inicio, fin = _rango_pedido(request)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resumenes = ResumenDiarioEgreso.objects.filter(dia__gte=inicio, dia__lt=fin)
+        datos = {"desde": inicio, "hasta": fin - timedelta(days=1)}
+        datos.update(_totales(resumenes, 'categoria'))
+        return Response(datos)
 
 
-class EstadoCuentaViewSet(viewsets.ModelViewSet):
+class EstadoCuentaViewSet(PaginacionAccionesMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar estados de cuenta"""
     queryset = EstadoCuenta.objects.all()
+    ordering = ('-id',)
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -232,6 +364,9 @@ class EstadoCuentaViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = EstadoCuenta.objects.all()
         
+        if self.action == 'list':
+            queryset = queryset.para_listado()
+        
         estado = self.request.query_params.get('estado', None)
         if estado:
             queryset = queryset.filter(estado=estado)
@@ -244,31 +379,174 @@ class EstadoCuentaViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def morosos(self, request):
-        estados = EstadoCuenta.objects.filter(estado='debe')
-        serializer = EstadoCuentaListSerializer(estados, many=True)
-        return Response(serializer.data)
+        estados = EstadoCuenta.objects.para_listado().filter(estado='debe')
+        return self.listar_paginado(estados, EstadoCuentaListSerializer)
     
     @action(detail=False, methods=['get'])
     def al_dia(self, request):
-        estados = EstadoCuenta.objects.filter(estado='al_dia')
-        serializer = EstadoCuentaListSerializer(estados, many=True)
-        return Response(serializer.data)
+        estados = EstadoCuenta.objects.para_listado().filter(estado='al_dia')
+        return self.listar_paginado(estados, EstadoCuentaListSerializer)
     
     @action(detail=False, methods=['get'])
     def suspendidos(self, request):
-        estados = EstadoCuenta.objects.filter(estado='suspendido')
-        serializer = EstadoCuentaListSerializer(estados, many=True)
-        return Response(serializer.data)
+        estados = EstadoCuenta.objects.para_listado().filter(estado='suspendido')
+        return self.listar_paginado(estados, EstadoCuentaListSerializer)
     
     @action(detail=False, methods=['get'])
     def proximos_vencimientos(self, request):
         hoy = date.today()
-        fecha_limite = hoy + timedelta(days=7)
+        # Los próximos 7 días inclusive: [hoy, hoy + 8)
+        fecha_limite = hoy + timedelta(days=8)
         
-        estados = EstadoCuenta.objects.filter(
+        estados = EstadoCuenta.objects.para_listado().filter(
             proximo_vencimiento__gte=hoy,
-            proximo_vencimiento__lte=fecha_limite
+            proximo_vencimiento__lt=fecha_limite
         )
         
-        serializer = EstadoCuentaListSerializer(estados, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return self.listar_paginado(estados, EstadoCuentaListSerializer)
+
+
+class MovimientoConciliacionViewSet(PaginacionAccionesMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Cola de revisión de la conciliación: líneas del extracto que no se
+    pudieron asignar solas (ver finanzas/conciliacion.py).
+    """
+    queryset = MovimientoConciliacion.objects.all()
+    serializer_class = MovimientoConciliacionSerializer
+    ordering = ('fecha', 'id')
+    
+    def get_queryset(self):
+        queryset = MovimientoConciliacion.objects.all()
+        
+        estado = self.request.query_params.get('estado', None)
+        if estado:
+            queryset = queryset.filter(estado=estado)
+        
+        motivo = self.request.query_params.get('motivo', None)
+        if motivo:
+            queryset = queryset.filter(motivo=motivo)
+        
+        return queryset
+    
+    @action(detail=True, methods=['post'])
+    def confirmar(self, request, pk=None):
+        """
+        Endpoint: POST /conciliacion/{id}/confirmar/
+        Body: {"cliente": 1, "membresia": 5, "concepto": "membresia"}
+        Crea el pago con la fecha, monto y referencia de la línea
+        """
+        movimiento = self.get_object()
+        if movimiento.estado != 'pendiente':
+            return Response({"error": "El movimiento ya fue revisado"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = ConfirmarMovimientoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        try:
+            with transaction.atomic():
+                pago = Pago.objects.create(
+                    cliente=datos['cliente'],
+                    membresia=datos.get('membresia'),
+                    fecha_pago=movimiento.fecha,
+                    monto=movimiento.monto,
+                    metodo_pago=movimiento.metodo_pago,
+                    concepto=datos['concepto'],
+                    referencia=movimiento.referencia,
+                    observaciones=movimiento.descripcion
+                )
+                movimiento.estado = 'confirmado'
+                movimiento.pago = pago
+                movimiento.save(update_fields=['estado', 'pago'])
+        except IntegrityError:
+            return Response(
+                {"error": "Ya existe un pago con esta referencia"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(PagoSerializer(pago).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def descartar(self, request, pk=None):
+        """
+        Endpoint: POST /conciliacion/{id}/descartar/
+        Marca la línea como revisada sin cargar un pago
+        """
+        movimiento = self.get_object()
+        if movimiento.estado != 'pendiente':
+            return Response({"error": "El movimiento ya fue revisado"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        movimiento.estado = 'descartado'
+        movimiento.save(update_fields=['estado'])
+        return Response(self.get_serializer(movimiento).data)
+
+
+class ReporteViewSet(viewsets.ViewSet):
+    """Reportes calculados (no hay modelo detrás)"""
+    
+    # Límite del rango pedido (10 años)
+    MAX_MESES = 120
+    
+    @action(detail=False, methods=['get'])
+    def resultados(self, request):
+        """
+        Endpoint: GET /reportes/resultados/?desde=2022-01&hasta=2026-12
+        Estado de resultados mes a mes: ingresos por concepto, egresos por
+        categoría y gastos fijos proyectados. Por defecto, los últimos 12 meses.
+        """
+        hoy = date.today()
+        desde = request.query_params.get('desde', None)
+        hasta = request.query_params.get('hasta', None)
+        
+        try:
+            fin = date.fromisoformat(f'{hasta}-01') if hasta else hoy.replace(day=1)
+            if desde:
+                inicio = date.fromisoformat(f'{desde}-01')
+            else:
+                # 11 meses antes de `fin`
+                indice = fin.year * 12 + fin.month - 1 - 11
+                inicio = date(indice // 12, indice % 12 + 1, 1)
+        except ValueError:
+            return Response({"error": "desde y hasta deben tener el formato AAAA-MM"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cantidad_meses = (fin.year - inicio.year) * 12 + fin.month - inicio.month + 1
+        if cantidad_meses < 1 or cantidad_meses > self.MAX_MESES:
+            return Response(
+                {"error": f"El rango debe tener entre 1 y {self.MAX_MESES} meses"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(estado_resultados(inicio, fin))
+    
+    @action(detail=False, methods=['get'])
+    def flujo_caja(self, request):
+        """
+        Endpoint: GET /reportes/flujo_caja/?meses=12&renovacion=0.6,0.8,0.95
+        Proyección de ingresos y egresos mes a mes desde hoy, un escenario
+        por cada tasa de renovación (entre 0 y 1; por defecto 0.8). Cada
+        escenario trae también la serie diaria con la caja acumulada.
+        """
+        try:
+            meses = int(request.query_params.get('meses', 12))
+            tasas = [
+                float(tasa)
+                for tasa in request.query_params.get('renovacion', str(RENOVACION_POR_DEFECTO)).split(',')
+            ]
+        except ValueError:
+            return Response(
+                {"error": "meses debe ser un entero y renovacion una lista de números"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if meses < 1 or meses > MAX_MESES_PROYECCION:
+            return Response(
+                {"error": f"meses debe estar entre 1 y {MAX_MESES_PROYECCION}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= len(tasas) <= 5 or any(not 0 <= tasa <= 1 for tasa in tasas):
+            return Response(
+                {"error": "renovacion: entre 1 y 5 tasas, cada una entre 0 y 1"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(proyectar_flujo(date.today(), meses, tasas))
@@ -0,0 +1,159 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# ============================================
+# CACHE LOCAL CON VERSIÓN COMPARTIDA
+# ============================================
+#
+# Los datos se guardan en la memoria de cada proceso; lo único compartido
+# es un número de versión por nombre en el cache de Django (CACHES). Cada
+# lectura compara la versión local con la compartida: si alguien la
+# incrementó (en cualquier worker o nodo) se recargan los datos.
+# Por eso el cache de Django no puede ser local al proceso (ver el chequeo).
+
+# Backends que no comparten las versiones entre procesos
+CACHES_LOCALES = [
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+]
+
+
+@checks.register(checks.Tags.caches)
+def verificar_cache_compartido(app_configs, **kwargs):
+    """Falla si el cache por defecto no es compartido entre procesos"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in CACHES_LOCALES:
+        return [checks.Error(
+            f"CACHES['default'] usa {backend}, que no se comparte entre procesos: "
+            "los demás workers no verían las versiones de los catálogos y servirían datos viejos.",
+            hint='Usar RedisCache, PyMemcacheCache o DatabaseCache (ver settings.py).',
+            id='gimnasio.E001',
+        )]
+    return []
+
+def _clave(nombre):
+    return f'version:{nombre}'
+
+
+def obtener_version(nombre):
+    """Versión actual compartida (se inicializa si no existe o fue desalojada)"""
+    version = cache.get(_clave(nombre))
+    if version is None:
+        # Valor inicial basado en la hora: nunca coincide con una versión vieja
+        cache.add(_clave(nombre), time.time_ns(), timeout=None)
+        version = cache.get(_clave(nombre))
+    return version
+
+
+def incrementar_version(nombre):
+    """Invalida los datos de `nombre` en todos los procesos"""
+    try:
+        return cache.incr(_clave(nombre))
+    except ValueError:
+        # La clave no existía (o fue desalojada)
+        version = time.time_ns()
+        cache.set(_clave(nombre), version, timeout=None)
+        return version
+
+
+def invalidar_al_guardar(nombre):
+    """
+    Para señales post_save/post_delete: incrementa la versión en el momento y
+    otra vez al confirmar la transacción. Si otro proceso recargó en el medio
+    (todavía sin el cambio), el segundo incremento lo obliga a recargar.
+    """
+    incrementar_version(nombre)
+    transaction.on_commit(lambda: incrementar_version(nombre))
+
+
+# ============================================
+# REGISTRO DE CAMBIOS POR VERSIÓN
+# ============================================
+#
+# Para datos grandes (el índice de huellas) recargar todo en cada cambio es
+# caro: además de incrementar la versión se guarda qué ids cambiaron en ella,
+# una clave por versión. Un proceso atrasado relee sólo esos ids; si falta
+# alguna versión (desalojada o son demasiadas) recarga todo.
+
+DURACION_CAMBIOS = 60 * 60
+MAX_CAMBIOS = 500
+
+
+def _clave_cambios(nombre, version):
+    return f'cambios:{nombre}:{version}'
+
+
+def registrar_cambios(nombre, ids):
+    """Incrementa la versión de `nombre` anotando los ids que cambiaron en ella"""
+    ids = list(ids)
+    while True:
+        version = incrementar_version(nombre)
+        # add y no set: si dos procesos obtienen la misma versión (incr no es
+        # atómico en todos los backends) el segundo pasa a la siguiente
+        if cache.add(_clave_cambios(nombre, version), ids, DURACION_CAMBIOS):
+            return version
+
+
+def registrar_cambios_al_guardar(nombre, ids):
+    """Como invalidar_al_guardar, pero anotando los ids cambiados"""
+    ids = list(ids)
+    registrar_cambios(nombre, ids)
+    transaction.on_commit(lambda: registrar_cambios(nombre, ids))
+
+
+def cambios_entre(nombre, desde, hasta):
+    """
+    Ids cambiados en las versiones (desde, hasta], o None si no se pueden
+    saber todos (falta alguna versión o son demasiadas): hay que recargar.
+    """
+    if desde is None or not desde < hasta <= desde + MAX_CAMBIOS:
+        return None
+    claves = [_clave_cambios(nombre, version) for version in range(desde + 1, hasta + 1)]
+    registrados = cache.get_many(claves)
+    if len(registrados) != len(claves):
+        return None
+    return set().union(*registrados.values())
+
+
+class CacheVersionada:
+    """Resultado de `cargar()` guardado en el proceso mientras no cambie la versión"""
+
+    def __init__(self, nombre, cargar):
+        self.nombre = nombre
+        self._cargar = cargar
+        self._lock = threading.Lock()
+        self._version = None
+        self._valor = None
+
+    def obtener(self):
+        """Devuelve (valor, version)"""
+        version = obtener_version(self.nombre)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # La versión se lee antes de cargar: si cambia mientras
+                    # tanto, la próxima lectura vuelve a cargar
+                    self._valor = self._cargar()
+                    self._version = version
+        return self._valor, version
+
+
+def respuesta_con_etag(request, etag, obtener_datos):
+    """
+    GET condicional: 304 si el cliente ya tiene la versión `etag`;
+    si no, la respuesta con obtener_datos() y el ETag.
+    """
+    if request.headers.get('If-None-Match') == etag:
+        respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        respuesta = Response(obtener_datos())
+    respuesta['ETag'] = etag
+    return respuesta
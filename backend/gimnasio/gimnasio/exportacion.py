@@ -0,0 +1,126 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+# ============================================
+# EXPORTACIONES EN STREAMING (CSV / JSONL)
+# ============================================
+#
+# El listado paginado arma todo el JSON en memoria; para bajar un año de
+# pagos se usa GET /<recurso>/exportar/, que manda las filas a medida que
+# las lee. La memoria del worker queda fija en un lote:
+#   - Las filas se leen por keyset (pk > último, LIMIT lote) con
+#     values_list, sin instanciar modelos. No se usa iterator(): el driver
+#     de MySQL trae el resultado completo a memoria igual.
+#   - Cada lote se escribe y se manda antes de pedir el siguiente; la
+#     cabecera sale antes de la primera consulta.
+#   - Con ?gzip=1 el mismo flujo pasa por zlib con un flush por lote.
+
+TAMANO_LOTE = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Eco:
+    """Archivo falso para csv.writer: devuelve lo escrito en vez de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def lotes_de_filas(queryset, campos, tamano=None):
+    """Tuplas de `campos` en lotes de `tamano` (TAMANO_LOTE si no se pasa), recorriendo por pk"""
+    tamano = tamano or TAMANO_LOTE
+    filas = queryset.order_by('pk').values_list('pk', *campos)
+    ultimo = None
+    while True:
+        lote = list((filas.filter(pk__gt=ultimo) if ultimo is not None else filas)[:tamano])
+        if not lote:
+            return
+        ultimo = lote[-1][0]
+        yield [fila[1:] for fila in lote]
+        if len(lote) < tamano:
+            return
+
+
+def _csv(lotes, campos):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(campos)
+    for lote in lotes:
+        yield ''.join(escritor.writerow(fila) for fila in lote)
+
+
+def _jsonl(lotes, campos):
+    for lote in lotes:
+        yield ''.join(
+            json.dumps(dict(zip(campos, fila)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+            for fila in lote
+        )
+
+
+def _gzip(partes):
+    compresor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for parte in partes:
+        yield compresor.compress(parte) + compresor.flush(zlib.Z_SYNC_FLUSH)
+    yield compresor.flush()
+
+
+def respuesta_exportacion(queryset, campos, nombre, formato='csv', comprimir=False):
+    """StreamingHttpResponse con las filas de `queryset` como adjunto `nombre`.`formato`"""
+    escribir = _csv if formato == 'csv' else _jsonl
+    partes = (texto.encode('utf-8') for texto in escribir(lotes_de_filas(queryset, campos), campos))
+
+    archivo = f'{nombre}.{formato}'
+    tipo = FORMATOS[formato]
+    if comprimir:
+        partes = _gzip(partes)
+        archivo += '.gz'
+        tipo = 'application/gzip'
+
+    respuesta = StreamingHttpResponse(partes, content_type=tipo)
+    respuesta['Content-Disposition'] = f'attachment; filename="{archivo}"'
+    return respuesta
+
+
+class ExportacionMixin:
+    """
+    Agrega GET /<recurso>/exportar/ a un ViewSet.
+
+    El ViewSet define `campos_exportacion` (nombres para values_list, se
+    admiten relaciones como 'cliente__dni') y `nombre_exportacion`.
+    Se exporta get_queryset(), así que valen los mismos filtros del listado.
+    """
+    campos_exportacion = ()
+    nombre_exportacion = 'exportacion'
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Endpoint: GET /<recurso>/exportar/?formato=csv|jsonl&gzip=1
+        Acepta los mismos filtros que el listado
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {"error": f"Formato inválido. Opciones: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        comprimir = request.query_params.get('gzip', None) in ('1', 'true')
+        return respuesta_exportacion(
+            self.get_queryset(),
+            self.campos_exportacion,
+            self.nombre_exportacion,
+            formato,
+            comprimir
+        )
@@ -0,0 +1,31 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+# ============================================
+# RANGOS DE FECHAS PARA CAMPOS DATETIME
+# ============================================
+#
+# Filtrar un DateTimeField con __date aplica una función sobre la columna
+# (CONVERT_TZ + DATE en MySQL) y no puede usar índices. Estos helpers
+# convierten días locales (TIME_ZONE) en rangos semiabiertos [inicio, fin)
+# que sí usan el índice: fecha_hora__gte=inicio, fecha_hora__lt=fin.
+
+
+def inicio_dia(fecha):
+    """Medianoche local de `fecha` como datetime aware"""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def rango_dias(desde, hasta):
+    """(inicio, fin) semiabierto que cubre los días locales desde..hasta inclusive"""
+    return inicio_dia(desde), inicio_dia(hasta + timedelta(days=1))
+
+
+def rango_mes(fecha):
+    """(primer día del mes, primer día del mes siguiente) para filtros dia >= inicio, dia < fin"""
+    inicio = fecha.replace(day=1)
+    if inicio.month == 12:
+        return inicio, inicio.replace(year=inicio.year + 1, month=1)
+    return inicio, inicio.replace(month=inicio.month + 1)
@@ -0,0 +1,185 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ============================================
+# PAGINACIÓN POR CURSOR
+# ============================================
+
+class CursorPaginacion(BasePagination):
+    """
+    Paginación por cursor (keyset) para todos los listados.
+
+    El cursor es opaco (base64) y guarda los valores de TODAS las columnas
+    de orden de la última fila (p. ej. fecha_pago e id). La página siguiente
+    es un WHERE (fecha_pago, id) < (f, i) sobre el índice, sin OFFSET: pedir
+    la página 1000 cuesta lo mismo que la primera aunque muchas filas
+    compartan la fecha. Cada ViewSet define su orden estable con el atributo
+    `ordering`, siempre terminando en 'id' para desempatar.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        """Usa el orden declarado en el ViewSet, o '-id' por defecto"""
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            pedido = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(pedido, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.orden = self.get_ordering(request, queryset, view)
+        tamano = self.get_page_size(request)
+
+        cursor = self.decodificar_cursor(request, queryset)
+        hacia_atras = bool(cursor and cursor['atras'])
+        orden = _invertir(self.orden) if hacia_atras else self.orden
+
+        queryset = queryset.order_by(*orden)
+        if cursor:
+            queryset = queryset.filter(_despues_de(orden, cursor['valores']))
+
+        filas = list(queryset[:tamano + 1])
+        hay_mas = len(filas) > tamano
+        filas = filas[:tamano]
+        if hacia_atras:
+            filas.reverse()
+
+        self.filas = filas
+        self.hay_siguiente = hay_mas if not hacia_atras else True
+        self.hay_anterior = hay_mas if hacia_atras else cursor is not None
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.filas:
+            return None
+        return self._enlace(self.filas[-1], atras=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior:
+            return None
+        if not self.filas:
+            # Página vacía después de un cursor: volver al principio
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._enlace(self.filas[0], atras=True)
+
+    def _enlace(self, fila, atras):
+        valores = [_valor(fila, campo.lstrip('-')) for campo in self.orden]
+        datos = json.dumps({'v': valores, 'a': int(atras)}, cls=DjangoJSONEncoder)
+        cursor = urlsafe_b64encode(datos.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decodificar_cursor(self, request, queryset):
+        crudo = request.query_params.get(self.cursor_query_param)
+        if not crudo:
+            return None
+        try:
+            datos = json.loads(urlsafe_b64decode(crudo.encode()).decode())
+            valores = datos['v']
+            if not isinstance(valores, list) or len(valores) != len(self.orden):
+                raise ValueError
+            # Cada valor con el tipo de su columna: un cursor armado a mano
+            # falla acá (404) y no en la query (500)
+            valores = [
+                _campo_de_orden(queryset, campo.lstrip('-')).to_python(valor)
+                for campo, valor in zip(self.orden, valores)
+            ]
+            return {'valores': valores, 'atras': bool(datos.get('a'))}
+        except (ValueError, TypeError, KeyError, UnicodeDecodeError, ValidationError):
+            raise NotFound('Cursor inválido')
+
+
+def _campo_de_orden(queryset, campo):
+    """Field de la columna de orden (anotación, campo del modelo o relación con __)"""
+    if campo in queryset.query.annotations:
+        return queryset.query.annotations[campo].output_field
+    modelo = queryset.model
+    *relaciones, nombre = campo.split('__')
+    for relacion in relaciones:
+        modelo = modelo._meta.get_field(relacion).related_model
+    return modelo._meta.get_field(nombre)
+
+
+def _valor(fila, campo):
+    """Valor de la columna de orden (campo del modelo, anotación o relación con __)"""
+    for parte in campo.split('__'):
+        fila = getattr(fila, parte)
+    return fila
+
+
+def _invertir(orden):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden)
+
+
+def _despues_de(orden, valores):
+    """
+    Filas que van después de `valores` en `orden` (comparación de tuplas):
+    a > x OR (a = x AND b > y) OR ..., con < en las columnas descendentes.
+    Se agrega a >= x (o <=) para que el motor recorra el índice por rango.
+    """
+    alternativas = []
+    for posicion, campo in enumerate(orden):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        iguales = {orden_previo.lstrip('-'): valor for orden_previo, valor in zip(orden[:posicion], valores)}
+        alternativas.append(Q(**iguales, **{f'{nombre}__{operador}': valores[posicion]}))
+
+    primero = orden[0].lstrip('-')
+    rango = Q(**{f"{primero}__{'lte' if orden[0].startswith('-') else 'gte'}": valores[0]})
+    return rango & reduce(lambda a, b: a | b, alternativas)
+
+
+class PaginacionAccionesMixin:
+    """
+    Para las acciones custom (@action) que devuelven listados:
+    pagina el queryset igual que el list() estándar.
+    """
+
+    def listar_paginado(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+
+        serializer = serializer_class(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
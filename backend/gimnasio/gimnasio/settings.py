@@ -57,6 +57,12 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'gimnasio.urls'
 
+REST_FRAMEWORK = {
+    # Todos los listados se paginan por cursor (ver gimnasio/paginacion.py)
+    'DEFAULT_PAGINATION_CLASS': 'gimnasio.paginacion.CursorPaginacion',
+    'PAGE_SIZE': 50,
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -127,3 +133,34 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Cache
+# Guarda las versiones de los catálogos cacheados (gimnasio/cache.py) y tiene
+# que ser compartido por todos los workers y nodos: un cache en memoria del
+# proceso (LocMemCache) o DummyCache hace fallar el chequeo gimnasio.E001.
+# Por defecto se usa la misma base de datos; crear la tabla con
+#   python manage.py createcachetable
+# Con Redis disponible conviene usarlo:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'gimnasio_cache',
+    }
+}
+
+
+# Huellas digitales
+# Guardar los templates comprimidos con zlib (los ya guardados se siguen leyendo igual)
+HUELLAS_COMPRIMIR = False
+
+
+# Recordatorios
+# Backend de envío por canal (ver clientes/canales.py). Los de consola/archivo
+# sirven para desarrollo y pruebas; en producción usar WhatsAppCanal/EmailCanal.
+RECORDATORIOS_CANALES = {
+    'whatsapp': 'clientes.canales.ConsolaCanal',
+    'email': 'clientes.canales.ConsolaCanal',
+}
@@ -0,0 +1,110 @@
+from datetime import date
+from itertools import count
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# ============================================
+# HELPERS DE TESTS
+# ============================================
+
+_numeros_cliente = count()
+
+
+def crear_cliente(**campos):
+    """Cliente válido con DNI y email únicos; `campos` pisa los valores por defecto"""
+    from clientes.models import Cliente
+
+    numero = next(_numeros_cliente)
+    datos = {
+        'nombre': f'Cliente{numero}',
+        'apellido': 'Prueba',
+        'dni': f'{40000000 + numero}',
+        'email': f'cliente{numero}@example.com',
+        'telefono': '3580000000',
+        'contacto_emergencia': '3580000000',
+        'fecha_nacimiento': date(1990, 1, 1),
+    }
+    datos.update(campos)
+    return Cliente.objects.create(**datos)
+
+
+class ConsultasConstantesMixin:
+    """
+    Para TestCase: verifica que un endpoint no haga una query por fila (N+1).
+
+    Uso:
+        self.assertConsultasConstantes('/api/finanzas/pagos/', self.crear_pagos)
+
+    donde crear_pagos(n) agrega n filas que el endpoint tiene que devolver.
+    """
+
+    def contar_consultas(self, url, **extra):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, **extra)
+        self.assertEqual(respuesta.status_code, 200, f'GET {url} -> {respuesta.status_code}')
+        return len(consultas), consultas
+
+    def assertConsultasConstantes(self, url, crear, cantidades=(2, 20), **extra):
+        """La cantidad de queries de GET url no puede crecer con la cantidad de filas"""
+        crear(cantidades[0])
+        esperadas, _ = self.contar_consultas(url, **extra)
+
+        creadas = cantidades[0]
+        for cantidad in cantidades[1:]:
+            crear(cantidad - creadas)
+            creadas = cantidad
+            obtenidas, consultas = self.contar_consultas(url, **extra)
+            if obtenidas != esperadas:
+                detalle = '\n'.join(consulta['sql'] for consulta in consultas.captured_queries)
+                self.fail(
+                    f'GET {url}: {esperadas} queries con {cantidades[0]} filas y '
+                    f'{obtenidas} con {cantidad}\n{detalle}'
+                )
+        return esperadas
+
+
+class PlanDeConsultaMixin:
+    """
+    Para TestCase: verifica con EXPLAIN que una consulta use un índice.
+
+    Uso:
+        self.assertUsaIndice(Pago.objects.filter(...), 'pago_fecha_metodo_idx')
+        self.assertEndpointUsaIndice('/api/finanzas/pagos/?cliente=1', 'finanzas_pago', 'pago_cliente_fecha_idx')
+
+    Sólo SQLite y MySQL nombran el índice elegido en el EXPLAIN; en otros
+    motores el test se saltea.
+    """
+
+    def explicar(self, sql):
+        if connection.vendor == 'sqlite':
+            sql = f'EXPLAIN QUERY PLAN {sql}'
+        elif connection.vendor == 'mysql':
+            sql = f'EXPLAIN {sql}'
+        else:
+            self.skipTest('EXPLAIN sin nombre de índice en este motor')
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return '\n'.join(' '.join(str(valor) for valor in fila) for fila in cursor.fetchall())
+
+    def assertUsaIndice(self, consulta, indice):
+        """`consulta` puede ser un QuerySet o el SQL ya armado"""
+        if connection.vendor not in ('sqlite', 'mysql'):
+            self.skipTest('EXPLAIN sin nombre de índice en este motor')
+        plan = consulta.explain() if hasattr(consulta, 'explain') else self.explicar(consulta)
+        self.assertIn(indice, plan, f'{consulta}\n{plan}')
+
+    def assertEndpointUsaIndice(self, url, tabla, indice, **extra):
+        """Cada SELECT sobre `tabla` que hace GET url usa `indice`"""
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, **extra)
+        self.assertEqual(respuesta.status_code, 200, f'GET {url} -> {respuesta.status_code}')
+
+        selects = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('SELECT') and f'FROM "{tabla}"' in consulta['sql'].replace('`', '"')
+        ]
+        self.assertTrue(selects, f'GET {url} no consultó {tabla}')
+        for sql in selects:
+            self.assertUsaIndice(sql, indice)
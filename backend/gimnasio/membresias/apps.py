@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MembresiasConfig(AppConfig):
     name = 'membresias'
+
+    def ready(self):
+        from . import signals  # noqa: F401
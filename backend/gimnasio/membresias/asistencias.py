@@ -0,0 +1,198 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from clientes.models import Cliente
+from .models import Asistencia, AsistenciaSemanal, Membresia
+
+
+# ============================================
+# REGISTRO DE ASISTENCIAS (CHECK-IN)
+# ============================================
+#
+# El cupo semanal se controla con un contador por cliente y semana:
+#   UPDATE ... SET cantidad = cantidad + 1 WHERE ... AND cantidad < limite
+# Si la fila se actualizó, hay cupo; si no, se agotó. Es atómico en la
+# base, así que dos ingresos simultáneos no pueden pasarse del límite.
+
+FILAS_POR_UPDATE = 500
+
+
+def inicio_semana(fecha):
+    """Lunes de la semana de `fecha`"""
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def _membresia_vigente(cliente_id, dia):
+    return (
+        Membresia.objects
+        .filter(cliente_id=cliente_id, estado='activa', fecha_inicio__lte=dia, fecha_fin__gte=dia)
+        .select_related('plan')
+        .only('id', 'plan__frecuencia_semanal')
+        .order_by('-fecha_fin')
+        .first()
+    )
+
+
+def registrar_asistencia(cliente_id, fecha_hora=None, origen='recepcion'):
+    """
+    Valida la membresía y el cupo semanal, y registra el ingreso.
+
+    Devuelve un dict con 'permitido' y, si corresponde, el 'motivo' del rechazo.
+    """
+    fecha_hora = fecha_hora or timezone.now()
+    dia = timezone.localdate(fecha_hora)
+
+    membresia = _membresia_vigente(cliente_id, dia)
+    if membresia is None:
+        return {'permitido': False, 'motivo': 'El cliente no tiene una membresía activa'}
+
+    limite = membresia.plan.frecuencia_semanal
+    semana = inicio_semana(dia)
+    contador = AsistenciaSemanal.objects.filter(cliente_id=cliente_id, semana=semana, cantidad__lt=limite)
+
+    with transaction.atomic():
+        # Caso común: la fila de la semana ya existe -> un solo UPDATE
+        actualizados = contador.update(cantidad=F('cantidad') + 1)
+        if not actualizados:
+            # Primer ingreso de la semana (o cupo agotado): crear la fila si falta
+            AsistenciaSemanal.objects.bulk_create(
+                [AsistenciaSemanal(cliente_id=cliente_id, semana=semana, cantidad=0)],
+                ignore_conflicts=True
+            )
+            actualizados = contador.update(cantidad=F('cantidad') + 1)
+
+        if not actualizados:
+            return {
+                'permitido': False,
+                'motivo': f'Ya usó las {limite} asistencias de esta semana',
+                'limite_semanal': limite,
+            }
+
+        asistencia = Asistencia.objects.create(
+            cliente_id=cliente_id,
+            membresia_id=membresia.id,
+            fecha_hora=fecha_hora,
+            origen=origen
+        )
+
+    usadas = AsistenciaSemanal.objects.filter(
+        cliente_id=cliente_id, semana=semana
+    ).values_list('cantidad', flat=True).first()
+
+    return {
+        'permitido': True,
+        'asistencia': asistencia.id,
+        'limite_semanal': limite,
+        'restantes': max(limite - (usadas or 0), 0),
+    }
+
+
+def registrar_lote(eventos, origen='molinete'):
+    """
+    Ingesta de eventos ya ocurridos (por ejemplo, el buffer del molinete).
+
+    eventos: lista de dicts con 'cliente' (id) y 'fecha_hora' (opcional,
+    por defecto ahora). Los ingresos ya pasaron, así que se registran y se
+    suman a los contadores igual, pero el cupo se controla como en
+    registrar_asistencia (en orden cronológico, contando lo ya usado en la
+    semana y los eventos anteriores del mismo lote): las posiciones que lo
+    superan vuelven en 'excedidos' y las que no tenían membresía activa en
+    'sin_membresia', para que recepción las revise. Todo en pocas queries,
+    sin importar la cantidad de eventos.
+    """
+    if not eventos:
+        return {'registrados': 0, 'ignorados': [], 'excedidos': [], 'sin_membresia': []}
+
+    ahora = timezone.now()
+    fechas = [evento.get('fecha_hora') or ahora for evento in eventos]
+    dias = [timezone.localdate(fecha) for fecha in fechas]
+    clientes = {evento['cliente'] for evento in eventos}
+    desde = min(dias)
+    hasta = max(dias)
+
+    # Membresías activas de todos los clientes del lote, en una sola query
+    membresias = defaultdict(list)
+    for membresia_id, cliente_id, inicio, fin, limite in Membresia.objects.filter(
+        cliente_id__in=clientes,
+        estado='activa',
+        fecha_inicio__lte=hasta,
+        fecha_fin__gte=desde
+    ).values_list('id', 'cliente_id', 'fecha_inicio', 'fecha_fin', 'plan__frecuencia_semanal'):
+        membresias[cliente_id].append((inicio, fin, membresia_id, limite))
+
+    # Asistencias ya usadas en las semanas del lote
+    usadas = Counter({
+        (cliente_id, semana): cantidad
+        for cliente_id, semana, cantidad in AsistenciaSemanal.objects.filter(
+            cliente_id__in=clientes,
+            semana__gte=inicio_semana(desde),
+            semana__lte=inicio_semana(hasta)
+        ).values_list('cliente_id', 'semana', 'cantidad')
+    })
+
+    existentes = set(Cliente.objects.filter(id__in=clientes).values_list('id', flat=True))
+
+    asistencias = []
+    por_semana = Counter()
+    ignorados = []
+    excedidos = []
+    sin_membresia = []
+    for posicion in sorted(range(len(eventos)), key=lambda posicion: fechas[posicion]):
+        evento = eventos[posicion]
+        cliente_id = evento['cliente']
+        if cliente_id not in existentes:
+            ignorados.append(posicion)
+            continue
+
+        dia = dias[posicion]
+        clave = (cliente_id, inicio_semana(dia))
+        membresia_id, limite = next(
+            ((m_id, limite) for inicio, fin, m_id, limite in membresias[cliente_id] if inicio <= dia <= fin),
+            (None, None)
+        )
+        if membresia_id is None:
+            sin_membresia.append(posicion)
+        elif usadas[clave] >= limite:
+            excedidos.append(posicion)
+
+        asistencias.append(Asistencia(
+            cliente_id=cliente_id,
+            membresia_id=membresia_id,
+            fecha_hora=fechas[posicion],
+            origen=evento.get('origen', origen)
+        ))
+        usadas[clave] += 1
+        por_semana[clave] += 1
+
+    with transaction.atomic():
+        Asistencia.objects.bulk_create(asistencias, batch_size=1000)
+
+        AsistenciaSemanal.objects.bulk_create(
+            [AsistenciaSemanal(cliente_id=c, semana=s, cantidad=0) for c, s in por_semana],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+
+        # Un UPDATE por cada cantidad distinta (casi siempre +1), de a bloques
+        por_cantidad = defaultdict(list)
+        for (cliente_id, semana), cantidad in por_semana.items():
+            por_cantidad[cantidad].append(Q(cliente_id=cliente_id, semana=semana))
+        for cantidad, condiciones in por_cantidad.items():
+            for inicio in range(0, len(condiciones), FILAS_POR_UPDATE):
+                bloque = condiciones[inicio:inicio + FILAS_POR_UPDATE]
+                AsistenciaSemanal.objects.filter(reduce(or_, bloque)).update(
+                    cantidad=F('cantidad') + cantidad
+                )
+
+    return {
+        'registrados': len(asistencias),
+        'ignorados': sorted(ignorados),
+        'excedidos': sorted(excedidos),
+        'sin_membresia': sorted(sin_membresia),
+    }
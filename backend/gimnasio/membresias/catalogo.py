@@ -0,0 +1,27 @@
+from gimnasio.cache import CacheVersionada
+from .models import Ejercicio, Plan
+
+
+# ============================================
+# CATÁLOGOS EN MEMORIA (PLANES Y EJERCICIOS)
+# ============================================
+#
+# Cambian muy de vez en cuando y se leen en cada listado de planes y en
+# cada pantalla de rutinas: se cargan enteros una vez por proceso y se
+# invalidan con las señales de membresias/signals.py.
+# Sólo para lecturas: las altas y ediciones buscan el plan en la base (el
+# precio contratado sale de ahí y no puede ser el de una copia vieja).
+# Ojo: QuerySet.update() no dispara señales; después de un update masivo
+# llamar a gimnasio.cache.incrementar_version('planes' / 'ejercicios').
+
+def _cargar_planes():
+    return list(Plan.objects.order_by('frecuencia_semanal', 'id'))
+
+
+def _cargar_ejercicios():
+    return list(Ejercicio.objects.order_by('nombre', 'id'))
+
+
+planes = CacheVersionada('planes', _cargar_planes)
+ejercicios = CacheVersionada('ejercicios', _cargar_ejercicios)
+
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Membresia, TransicionMembresia
+
+
+# ============================================
+# MOTOR DE ESTADOS DE MEMBRESÍAS
+# ============================================
+#
+# Cada transición es un UPDATE por conjunto (WHERE estado = X AND ...),
+# de a bloques de ids, más un bulk_create del log. Como el WHERE incluye
+# el estado de origen, volver a correrlo no cambia nada ni duplica el log.
+#
+#   activa / suspendida  -> vencida     fecha_fin < hoy
+#   activa               -> suspendida  cuenta del cliente 'suspendido'
+#   suspendida           -> activa      la cuenta se regularizó (solo si la
+#                                       suspensión la hizo este motor)
+
+FILAS_POR_BLOQUE = 5000
+
+
+def _aplicar(queryset, estado_anterior, estado_nuevo, ahora):
+    """Pasa las membresías de `queryset` (en `estado_anterior`) a `estado_nuevo`"""
+    queryset = queryset.filter(estado=estado_anterior)
+    total = 0
+
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                queryset.filter(id__gt=ultimo_id)
+                .order_by('id')
+                .select_for_update()
+                .values_list('id', flat=True)[:FILAS_POR_BLOQUE]
+            )
+            if not ids:
+                break
+
+            total += Membresia.objects.filter(id__in=ids, estado=estado_anterior).update(estado=estado_nuevo)
+            TransicionMembresia.objects.bulk_create([
+                TransicionMembresia(
+                    membresia_id=membresia_id,
+                    estado_anterior=estado_anterior,
+                    estado_nuevo=estado_nuevo,
+                    fecha=ahora
+                )
+                for membresia_id in ids
+            ], batch_size=FILAS_POR_BLOQUE)
+        ultimo_id = ids[-1]
+
+    return total
+
+
+def actualizar_estados(hoy=None):
+    """
+    Aplica todas las transiciones y recalcula los estados de cuenta.
+
+    Devuelve un dict con la cantidad de membresías por transición y las
+    cuentas actualizadas.
+    """
+    from finanzas.models import EstadoCuenta
+
+    hoy = hoy or timezone.localdate()
+    ahora = timezone.now()
+    cuentas_suspendidas = EstadoCuenta.objects.filter(estado='suspendido').values('cliente_id')
+    # Último cambio hecho por el motor (los cambios manuales no dejan log)
+    ultima_transicion = TransicionMembresia.objects.filter(
+        membresia_id=OuterRef('id')
+    ).order_by('-fecha', '-id').values('estado_nuevo')[:1]
+
+    resultado = {
+        'vencidas': (
+            _aplicar(Membresia.objects.filter(fecha_fin__lt=hoy), 'activa', 'vencida', ahora)
+            + _aplicar(Membresia.objects.filter(fecha_fin__lt=hoy), 'suspendida', 'vencida', ahora)
+        ),
+        'suspendidas': _aplicar(
+            Membresia.objects.filter(cliente_id__in=cuentas_suspendidas),
+            'activa', 'suspendida', ahora
+        ),
+        'reactivadas': _aplicar(
+            Membresia.objects.filter(estado='suspendida', fecha_fin__gte=hoy)
+            .annotate(ultima_transicion=Subquery(ultima_transicion))
+            .filter(ultima_transicion='suspendida')
+            .exclude(cliente_id__in=cuentas_suspendidas),
+            'suspendida', 'activa', ahora
+        ),
+    }
+    resultado['cuentas'] = recalcular_estados_cuenta()
+    return resultado
+
+
+def recalcular_estados_cuenta():
+    """
+    membresia_activa y proximo_vencimiento de todas las cuentas, en un
+    solo UPDATE con subconsultas correlacionadas (índice cliente, estado, ...).
+    """
+    from finanzas.models import EstadoCuenta
+
+    vigente = Membresia.objects.filter(
+        cliente_id=OuterRef('cliente_id'),
+        estado='activa'
+    ).order_by('-fecha_fin', '-id')
+
+    return EstadoCuenta.objects.update(
+        membresia_activa_id=Subquery(vigente.values('id')[:1]),
+        proximo_vencimiento=Subquery(vigente.values('fecha_fin')[:1])
+    )
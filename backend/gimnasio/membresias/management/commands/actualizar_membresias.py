@@ -0,0 +1,30 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from membresias.estados import actualizar_estados
+
+
+class Command(BaseCommand):
+    """
+    Motor nocturno de estados: vence, suspende/reactiva y recalcula
+    los estados de cuenta. Se puede correr las veces que haga falta.
+
+    Uso: python manage.py actualizar_membresias [--fecha 2026-10-17]
+    """
+    help = 'Aplica las transiciones de estado de las membresías'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None, help='Fecha de referencia (por defecto hoy)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = actualizar_estados(hoy=options['fecha'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['vencidas']} vencidas, {resultado['suspendidas']} suspendidas, "
+            f"{resultado['reactivadas']} reactivadas, {resultado['cuentas']} cuentas recalculadas "
+            f"en {duracion:.2f}s"
+        ))
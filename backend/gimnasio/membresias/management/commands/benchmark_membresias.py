@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from rest_framework import serializers
+
+from clientes.models import Cliente
+from membresias.models import Membresia, Plan
+from membresias.serializers import MembresiaCreateSerializer
+
+
+class Command(BaseCommand):
+    """
+    Mide el alta de membresías con control de superposición bajo escritores
+    concurrentes: varios hilos intentan dar de alta la misma membresía a los
+    mismos clientes. Por cliente tiene que quedar exactamente una.
+
+    Corre contra una base descartable (la de tests: test_<NAME>), creada y
+    migrada al empezar y borrada al terminar; no toca los datos reales.
+    Los hilos usan conexiones propias, así que los datos de prueba tienen
+    que estar confirmados y no alcanza con una transacción que se revierte.
+    Pensado para MySQL (SQLite serializa todas las escrituras).
+
+    Uso: python manage.py benchmark_membresias [--clientes 200] [--hilos 8]
+    """
+    help = 'Benchmark del alta de membresías con escritores concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=200)
+        parser.add_argument('--hilos', type=int, default=8)
+
+    def handle(self, *args, **options):
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.medir(options['clientes'], options['hilos'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+    def medir(self, cantidad, hilos):
+        hoy = date.today()
+
+        plan = Plan.objects.create(nombre='Benchmark', frecuencia_semanal=3, precio=1000)
+        Cliente.objects.bulk_create([
+            Cliente(
+                nombre='Benchmark', apellido=str(i), dni=f'99{i:06d}', email=f'benchmark{i}@example.com',
+                telefono='0', contacto_emergencia='0', fecha_nacimiento=date(1990, 1, 1),
+                cumpleanos_clave=101
+            )
+            for i in range(cantidad)
+        ])
+        # La base es nueva: todos los clientes son los del benchmark
+        clientes = list(Cliente.objects.values_list('id', flat=True))
+
+        creadas = [0] * hilos
+        rechazadas = [0] * hilos
+        errores = [0] * hilos
+
+        def escritor(numero):
+            try:
+                for cliente_id in clientes:
+                    serializer = MembresiaCreateSerializer(data={
+                        'cliente': cliente_id,
+                        'plan': plan.id,
+                        # Cada hilo pide un rango distinto, pero todos se superponen
+                        'fecha_inicio': hoy + timedelta(days=numero),
+                        'fecha_fin': hoy + timedelta(days=30 + numero),
+                        'estado': 'activa',
+                    })
+                    if not serializer.is_valid():
+                        rechazadas[numero] += 1
+                        continue
+                    try:
+                        serializer.save()
+                        creadas[numero] += 1
+                    except serializers.ValidationError:
+                        # Superposición detectada: el resultado esperado
+                        rechazadas[numero] += 1
+                    except DatabaseError:
+                        # Deadlock o timeout de lock: se informa aparte
+                        errores[numero] += 1
+            finally:
+                connection.close()
+
+        inicio = time.perf_counter()
+        trabajadores = [threading.Thread(target=escritor, args=(i,)) for i in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        duracion = time.perf_counter() - inicio
+
+        intentos = hilos * len(clientes)
+        duplicadas = (
+            Membresia.objects.values('cliente_id')
+            .order_by()
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .count()
+        )
+
+        self.stdout.write(
+            f'{intentos} altas en {duracion:.2f}s ({intentos / duracion:.0f}/s) con {hilos} hilos: '
+            f'{sum(creadas)} creadas, {sum(rechazadas)} rechazadas, {sum(errores)} errores de base, '
+            f'{duplicadas} clientes con superposición'
+        )
+
+        if duplicadas:
+            self.stderr.write(self.style.ERROR('Se crearon membresías superpuestas'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin superposiciones'))
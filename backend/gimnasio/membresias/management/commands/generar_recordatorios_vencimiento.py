@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from membresias.vencimientos import DIAS_AVISO, generar_recordatorios_vencimiento
+
+
+class Command(BaseCommand):
+    """
+    Crea los recordatorios de vencimiento de las membresías por vencer.
+    Se puede correr varias veces (por ejemplo, con cron diario): no duplica avisos.
+
+    Uso: python manage.py generar_recordatorios_vencimiento [--dias 7] [--canal whatsapp]
+    """
+    help = 'Genera recordatorios de vencimiento para membresías por vencer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=DIAS_AVISO, help='Ventana de vencimiento en días')
+        parser.add_argument('--canal', choices=['whatsapp', 'email'], default='whatsapp')
+
+    def handle(self, *args, **options):
+        creados = generar_recordatorios_vencimiento(dias=options['dias'], canal=options['canal'])
+        self.stdout.write(self.style.SUCCESS(f'{creados} recordatorios de vencimiento creados'))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+        ('membresias', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(fields=['fecha_inicio'], name='membresia_fecha_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_huella_metadatos'),
+        ('membresias', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Asistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_hora', models.DateTimeField()),
+                ('origen', models.CharField(choices=[('molinete', 'Molinete'), ('recepcion', 'Recepción')], default='recepcion', max_length=20)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias', to='clientes.cliente')),
+                ('membresia', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='asistencias', to='membresias.membresia')),
+            ],
+            options={
+                'verbose_name': 'Asistencia',
+                'verbose_name_plural': 'Asistencias',
+                'ordering': ['-fecha_hora'],
+                'indexes': [models.Index(fields=['fecha_hora'], name='asistencia_fecha_idx'), models.Index(fields=['cliente', 'fecha_hora'], name='asistencia_cliente_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AsistenciaSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField(help_text='Lunes de la semana')),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias_semanales', to='clientes.cliente')),
+            ],
+            options={
+                'verbose_name': 'Asistencia Semanal',
+                'verbose_name_plural': 'Asistencias Semanales',
+                'unique_together': {('cliente', 'semana')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_indices_recordatorio'),
+        ('membresias', '0003_asistencias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionMembresia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(choices=[('activa', 'Activa'), ('suspendida', 'Suspendida'), ('cancelada', 'Cancelada'), ('vencida', 'Vencida')], max_length=20)),
+                ('estado_nuevo', models.CharField(choices=[('activa', 'Activa'), ('suspendida', 'Suspendida'), ('cancelada', 'Cancelada'), ('vencida', 'Vencida')], max_length=20)),
+                ('fecha', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Transición de Membresía',
+                'verbose_name_plural': 'Transiciones de Membresías',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(fields=['estado', 'fecha_fin'], name='membresia_estado_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(fields=['cliente', 'estado', 'fecha_fin'], name='membresia_cliente_estado_idx'),
+        ),
+        migrations.AddField(
+            model_name='transicionmembresia',
+            name='membresia',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='membresias.membresia'),
+        ),
+        migrations.AddIndex(
+            model_name='transicionmembresia',
+            index=models.Index(fields=['fecha'], name='transicion_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_indices_recordatorio'),
+        ('membresias', '0004_estados_membresia'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='membresia',
+            name='membresia_cliente_estado_idx',
+        ),
+        migrations.AddIndex(
+            model_name='membresia',
+            index=models.Index(fields=['cliente', 'estado', 'fecha_inicio', 'fecha_fin'], name='membresia_cliente_rango_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from datetime import timedelta
 from clientes.models import Cliente
 
@@ -137,6 +139,29 @@ class EjercicioDia(models.Model):
         return f"{self.ejercicio.nombre} - {self.series}x{self.repeticiones}"
 
 
+class PlanQuerySet(models.QuerySet):
+    """Estadísticas de membresías activas por plan, en una sola query agrupada"""
+    
+    def con_estadisticas(self):
+        """Anota cantidad_membresias, ingresos y descuento_promedio"""
+        activas = Q(membresias__estado='activa')
+        dinero = DecimalField(max_digits=12, decimal_places=2)
+        return self.annotate(
+            cantidad_membresias=Count('membresias', filter=activas),
+            ingresos=Coalesce(
+                Sum('membresias__precio_contratado', filter=activas),
+                Value(0),
+                output_field=dinero
+            ),
+            # Precio actual menos el contratado: positivo = pagan menos que la lista
+            descuento_promedio=Avg(
+                F('precio') - F('membresias__precio_contratado'),
+                filter=activas,
+                output_field=dinero
+            ),
+        )
+
+
 class Plan(models.Model):
     """Planes disponibles según frecuencia semanal"""
     nombre = models.CharField(max_length=100, help_text="Ej: Plan 2x Semana, Plan Premium")
@@ -146,6 +171,8 @@ class Plan(models.Model):
     activo = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     
+    objects = PlanQuerySet.as_manager()
+    
     class Meta:
         ordering = ['frecuencia_semanal']
         verbose_name = 'Plan'
@@ -155,6 +182,16 @@ class Plan(models.Model):
         return f"{self.nombre} - {self.frecuencia_semanal}x semana - ${self.precio}"
 
 
+class MembresiaQuerySet(models.QuerySet):
+    
+    def para_listado(self):
+        """Columnas de MembresiaListSerializer, con cliente y plan en el mismo JOIN"""
+        return self.select_related('cliente', 'plan').only(
+            'id', 'estado', 'fecha_inicio', 'fecha_fin',
+            'cliente__nombre', 'cliente__apellido', 'plan__nombre'
+        )
+
+
 class Membresia(models.Model):
     """Membresía activa de un cliente"""
     ESTADO_CHOICES = [
@@ -180,10 +217,99 @@ class Membresia(models.Model):
     observaciones = models.TextField(blank=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     
+    objects = MembresiaQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Orden de la paginación por cursor
+            models.Index(fields=['fecha_inicio'], name='membresia_fecha_inicio_idx'),
+            # Barrido nocturno de vencimientos (membresias/estados.py)
+            models.Index(fields=['estado', 'fecha_fin'], name='membresia_estado_fin_idx'),
+            # Membresía vigente de un cliente y control de superposición
+            models.Index(
+                fields=['cliente', 'estado', 'fecha_inicio', 'fecha_fin'],
+                name='membresia_cliente_rango_idx'
+            ),
+        ]
         verbose_name = 'Membresía'
         verbose_name_plural = 'Membresías'
     
     def __str__(self):
-        return f"{self.cliente} - {self.plan.nombre} ({self.estado})"
\ No newline at end of file
+        return f"{self.cliente} - {self.plan.nombre} ({self.estado})"
+    
+    def save(self, *args, **kwargs):
+        # pre_save, el guardado y post_save en una sola transacción: los
+        # receptores que mantienen datos derivados (p. ej. el estado de
+        # cuenta) bloquean la versión anterior y aplican la diferencia acá adentro
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TransicionMembresia(models.Model):
+    """Cambio de estado aplicado automáticamente (una fila corta por cambio)"""
+    membresia = models.ForeignKey(Membresia, on_delete=models.CASCADE, related_name='transiciones')
+    estado_anterior = models.CharField(max_length=20, choices=Membresia.ESTADO_CHOICES)
+    estado_nuevo = models.CharField(max_length=20, choices=Membresia.ESTADO_CHOICES)
+    fecha = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha'], name='transicion_fecha_idx'),
+        ]
+        verbose_name = 'Transición de Membresía'
+        verbose_name_plural = 'Transiciones de Membresías'
+    
+    def __str__(self):
+        return f"{self.membresia_id}: {self.estado_anterior} -> {self.estado_nuevo}"
+
+class Asistencia(models.Model):
+    """Ingreso de un cliente al gimnasio (registro histórico: solo se agregan filas)"""
+    ORIGEN_CHOICES = [
+        ('molinete', 'Molinete'),
+        ('recepcion', 'Recepción'),
+    ]
+    
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='asistencias')
+    membresia = models.ForeignKey(
+        Membresia,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='asistencias'
+    )
+    fecha_hora = models.DateTimeField()
+    origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, default='recepcion')
+    
+    class Meta:
+        ordering = ['-fecha_hora']
+        indexes = [
+            models.Index(fields=['fecha_hora'], name='asistencia_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_hora'], name='asistencia_cliente_fecha_idx'),
+        ]
+        verbose_name = 'Asistencia'
+        verbose_name_plural = 'Asistencias'
+    
+    def __str__(self):
+        return f"{self.cliente} - {self.fecha_hora}"
+
+
+class AsistenciaSemanal(models.Model):
+    """
+    Contador de asistencias por cliente y semana.
+    
+    Se incrementa con F() en cada ingreso, así validar el cupo de
+    Plan.frecuencia_semanal no necesita contar el historial.
+    """
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='asistencias_semanales')
+    semana = models.DateField(help_text="Lunes de la semana")
+    cantidad = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['cliente', 'semana']
+        verbose_name = 'Asistencia Semanal'
+        verbose_name_plural = 'Asistencias Semanales'
+    
+    def __str__(self):
+        return f"{self.cliente} - semana {self.semana}: {self.cantidad}"
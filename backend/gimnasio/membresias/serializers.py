@@ -1,4 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
+from clientes.models import Cliente
 from .models import (
     Ejercicio, 
     Rutina, 
@@ -6,7 +8,8 @@ from .models import (
     DiaEntrenamiento, 
     EjercicioDia, 
     Plan, 
-    Membresia
+    Membresia,
+    Asistencia
 )
 
 # ============================================
@@ -54,9 +57,14 @@ class PlanCreateSerializer(serializers.ModelSerializer):
         return value
 
 class PlanDetalleSerializer(serializers.ModelSerializer):
-    """Con información adicional y campos calculados"""
+    """
+    Con información adicional y campos calculados.
+    Las estadísticas vienen de Plan.objects.con_estadisticas().
+    """
     precio_formateado = serializers.SerializerMethodField()
-    cantidad_membresias = serializers.SerializerMethodField()
+    cantidad_membresias = serializers.IntegerField(read_only=True)
+    ingresos = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    descuento_promedio = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
     class Meta:
         model = Plan
@@ -64,9 +72,26 @@ class PlanDetalleSerializer(serializers.ModelSerializer):
     
     def get_precio_formateado(self, obj):
         return f"${obj.precio:,.2f}"
+
+
+class PlanEstadisticasSerializer(serializers.ModelSerializer):
+    """Resumen por plan para el tablero (anotaciones de con_estadisticas)"""
+    cantidad_membresias = serializers.IntegerField(read_only=True)
+    ingresos = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    descuento_promedio = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
-    def get_cantidad_membresias(self, obj):
-        return obj.membresias.filter(estado='activa').count()
+    class Meta:
+        model = Plan
+        fields = [
+            'id',
+            'nombre',
+            'frecuencia_semanal',
+            'precio',
+            'activo',
+            'cantidad_membresias',
+            'ingresos',
+            'descuento_promedio'
+        ]
 
 # ============================================
 # SERIALIZERS PARA MEMBRESÍA
@@ -109,6 +134,7 @@ class MembresiaListSerializer(serializers.ModelSerializer):
     
 class MembresiaCreateSerializer(serializers.ModelSerializer):
     """Para crear o editar membresías"""
+    
     class Meta:
         model = Membresia
         fields = [
@@ -121,18 +147,63 @@ class MembresiaCreateSerializer(serializers.ModelSerializer):
         ]
         
     
+    # Estados que ocupan el período (no puede haber dos a la vez)
+    ESTADOS_VIGENTES = ['activa', 'suspendida']
+    
     def create(self, validated_data):
         """Sobrescribir create para asignar el precio automáticamente"""
         plan = validated_data.get('plan')
         validated_data['precio_contratado'] = plan.precio
-        return super().create(validated_data)
+        with transaction.atomic():
+            self._verificar_solapamiento(validated_data)
+            return super().create(validated_data)
     
     def update(self, instance, validated_data):
         """Si cambia el plan, actualizar el precio"""
         plan = validated_data.get('plan', instance.plan)
         if plan != instance.plan:
             validated_data['precio_contratado'] = plan.precio
-        return super().update(instance, validated_data)
+        with transaction.atomic():
+            self._verificar_solapamiento(validated_data, instance)
+            return super().update(instance, validated_data)
+    
+    def _verificar_solapamiento(self, data, instance=None):
+        """
+        Rechaza otra membresía vigente del cliente que se superponga en fechas.
+        
+        Se bloquea la fila del cliente (SELECT ... FOR UPDATE) para que dos
+        cajas no puedan crear membresías superpuestas al mismo tiempo; la
+        búsqueda es una sola query sobre el índice (cliente, estado, fecha_inicio, fecha_fin).
+        """
+        def valor(campo):
+            if campo in data:
+                return data[campo]
+            if instance is not None:
+                return getattr(instance, campo)
+            # Alta sin el campo: vale el default del modelo
+            return Membresia._meta.get_field(campo).get_default()
+        
+        if valor('estado') not in self.ESTADOS_VIGENTES:
+            return
+        
+        cliente = valor('cliente')
+        Cliente.objects.select_for_update().filter(pk=cliente.pk).values_list('pk').first()
+        
+        superpuestas = Membresia.objects.filter(
+            cliente=cliente,
+            estado__in=self.ESTADOS_VIGENTES,
+            fecha_inicio__lte=valor('fecha_fin'),
+            fecha_fin__gte=valor('fecha_inicio')
+        )
+        if instance is not None:
+            superpuestas = superpuestas.exclude(pk=instance.pk)
+        
+        otra = superpuestas.values('id', 'fecha_inicio', 'fecha_fin').first()
+        if otra:
+            raise serializers.ValidationError({'non_field_errors': [
+                f"El cliente ya tiene una membresía vigente entre "
+                f"{otra['fecha_inicio']:%d/%m/%Y} y {otra['fecha_fin']:%d/%m/%Y} (#{otra['id']})"
+            ]})
     
     def validate(self, data):
         """Validaciones generales"""
@@ -213,8 +284,8 @@ class SemanaListSerializer(serializers.ModelSerializer):
         return f"{obj.rutina.cliente.nombre} {obj.rutina.cliente.apellido}"
     
     def get_cantidad_dias(self, obj):
-        """Contar cuántos días tiene programados"""
-        return obj.dias.count()
+        """Contar cuántos días tiene programados (usa el prefetch de la vista)"""
+        return len(obj.dias.all())
 
 
 class SemanaDetalleSerializer(serializers.ModelSerializer):
@@ -242,13 +313,13 @@ class SemanaDetalleSerializer(serializers.ModelSerializer):
     
     def get_cantidad_dias(self, obj):
         """Cantidad de días programados"""
-        return obj.dias.count()
+        return len(obj.dias.all())
     
     def get_total_ejercicios(self, obj):
         """Total de ejercicios en toda la semana"""
         total = 0
         for dia in obj.dias.all():
-            total += dia.ejercicios.count()
+            total += len(dia.ejercicios.all())
         return total
 
 
@@ -334,7 +405,7 @@ class RutinaListSerializer(serializers.ModelSerializer):
     
     def get_cantidad_semanas(self, obj):
         """Cantidad de semanas programadas"""
-        return obj.semanas.count()
+        return len(obj.semanas.all())
 
 
 class RutinaDetalleSerializer(serializers.ModelSerializer):
@@ -369,13 +440,13 @@ class RutinaDetalleSerializer(serializers.ModelSerializer):
     
     def get_total_semanas(self, obj):
         """Total de semanas programadas"""
-        return obj.semanas.count()
+        return len(obj.semanas.all())
     
     def get_total_dias_entrenamiento(self, obj):
         """Total de días de entrenamiento en todas las semanas"""
         total = 0
         for semana in obj.semanas.all():
-            total += semana.dias.count()
+            total += len(semana.dias.all())
         return total
     
     def get_total_ejercicios(self, obj):
@@ -383,7 +454,7 @@ class RutinaDetalleSerializer(serializers.ModelSerializer):
         total = 0
         for semana in obj.semanas.all():
             for dia in semana.dias.all():
-                total += dia.ejercicios.count()
+                total += len(dia.ejercicios.all())
         return total
     
     def get_progreso(self, obj):
@@ -484,13 +555,13 @@ class RutinaResumenSerializer(serializers.ModelSerializer):
         return f"{obj.cliente.nombre} {obj.cliente.apellido}"
     
     def get_total_semanas(self, obj):
-        return obj.semanas.count()
+        return len(obj.semanas.all())
     
     def get_total_ejercicios(self, obj):
         total = 0
         for semana in obj.semanas.all():
             for dia in semana.dias.all():
-                total += dia.ejercicios.count()
+                total += len(dia.ejercicios.all())
         return total
     
     def get_progreso(self, obj):
@@ -523,4 +594,37 @@ class RutinaResumenSerializer(serializers.ModelSerializer):
         elif hoy > obj.fecha_fin:
             return "Finalizada"
         else:
-            return "En curso"
\ No newline at end of file
+            return "En curso"
+
+
+# ============================================
+# SERIALIZERS PARA ASISTENCIA
+# ============================================
+
+class AsistenciaSerializer(serializers.ModelSerializer):
+    """Serializer para listar asistencias"""
+    origen_display = serializers.CharField(source='get_origen_display', read_only=True)
+    
+    class Meta:
+        model = Asistencia
+        fields = ['id', 'cliente', 'membresia', 'fecha_hora', 'origen', 'origen_display']
+
+
+class AsistenciaRegistrarSerializer(serializers.Serializer):
+    """
+    Datos de un ingreso. El cliente va como id (sin SELECT de validación):
+    si no existe, simplemente no tiene membresía activa.
+    """
+    cliente = serializers.IntegerField(min_value=1)
+    fecha_hora = serializers.DateTimeField(required=False)
+    origen = serializers.ChoiceField(choices=Asistencia.ORIGEN_CHOICES, default='recepcion')
+
+
+class AsistenciaEventoSerializer(AsistenciaRegistrarSerializer):
+    """Un evento del lote: salvo que diga otra cosa, viene del molinete"""
+    origen = serializers.ChoiceField(choices=Asistencia.ORIGEN_CHOICES, default='molinete')
+
+
+class AsistenciaLoteSerializer(serializers.Serializer):
+    """Lote de eventos enviados por el molinete"""
+    eventos = AsistenciaEventoSerializer(many=True, allow_empty=False, max_length=5000)
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gimnasio.cache import invalidar_al_guardar
+from .models import Ejercicio, Plan
+
+
+# ============================================
+# SEÑALES: invalidar los catálogos cacheados
+# ============================================
+
+@receiver([post_save, post_delete], sender=Plan)
+def invalidar_planes(sender, **kwargs):
+    invalidar_al_guardar('planes')
+
+
+@receiver([post_save, post_delete], sender=Ejercicio)
+def invalidar_ejercicios(sender, **kwargs):
+    invalidar_al_guardar('ejercicios')
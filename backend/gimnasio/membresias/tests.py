@@ -1,3 +1,468 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clientes.models import Recordatorio
+from finanzas.models import EstadoCuenta
+from gimnasio.cache import verificar_cache_compartido
+from gimnasio.testing import ConsultasConstantesMixin, crear_cliente
+from .estados import actualizar_estados, recalcular_estados_cuenta
+from .vencimientos import generar_recordatorios_vencimiento
+from .models import Asistencia, AsistenciaSemanal, Ejercicio, Rutina, Semana, DiaEntrenamiento, EjercicioDia, Plan, Membresia, TransicionMembresia
+
+
+class RutinaDetalleQueriesTest(TestCase):
+    """El detalle de una rutina tiene que costar siempre la misma cantidad de queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente(nombre='Lautaro', apellido='Piacenza')
+        self.ejercicios = [
+            Ejercicio.objects.create(nombre=f'Ejercicio {i}', categoria='fuerza', grupo_muscular='piernas')
+            for i in range(5)
+        ]
+
+    def crear_rutina(self, dias_por_semana, ejercicios_por_dia):
+        rutina = Rutina.objects.create(
+            cliente=self.cliente,
+            nombre='Rutina',
+            objetivo='Fuerza',
+            fecha_inicio=date.today(),
+        )
+        for numero in range(1, 5):
+            semana = Semana.objects.create(rutina=rutina, numero=numero)
+            for dia_semana in range(1, dias_por_semana + 1):
+                dia = DiaEntrenamiento.objects.create(semana=semana, dia_semana=dia_semana, nombre='Día')
+                for orden in range(ejercicios_por_dia):
+                    EjercicioDia.objects.create(
+                        dia=dia,
+                        ejercicio=self.ejercicios[orden % len(self.ejercicios)],
+                        orden=orden,
+                        repeticiones='10',
+                    )
+        return rutina
+
+    def contar_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(queries), respuesta.data
+
+    def test_detalle_rutina_queries_constantes(self):
+        chica = self.crear_rutina(dias_por_semana=1, ejercicios_por_dia=1)
+        grande = self.crear_rutina(dias_por_semana=5, ejercicios_por_dia=8)
+
+        queries_chica, _ = self.contar_queries(f'/api/membresias/rutinas/{chica.id}/')
+        queries_grande, data = self.contar_queries(f'/api/membresias/rutinas/{grande.id}/')
+
+        # rutina + cliente, semanas, días, ejercicios + ejercicio
+        self.assertEqual(queries_grande, 4)
+        self.assertEqual(queries_chica, queries_grande)
+        self.assertEqual(data['total_semanas'], 4)
+        self.assertEqual(data['total_dias_entrenamiento'], 20)
+        self.assertEqual(data['total_ejercicios'], 160)
+        self.assertEqual(data['semanas'][0]['total_ejercicios'], 40)
+
+    def test_detalle_semana_queries_constantes(self):
+        chica = self.crear_rutina(dias_por_semana=1, ejercicios_por_dia=1)
+        grande = self.crear_rutina(dias_por_semana=5, ejercicios_por_dia=8)
+
+        queries_chica, _ = self.contar_queries(f'/api/membresias/semanas/{chica.semanas.first().id}/')
+        queries_grande, data = self.contar_queries(f'/api/membresias/semanas/{grande.semanas.first().id}/')
+
+        self.assertEqual(queries_chica, queries_grande)
+        self.assertEqual(data['cantidad_dias'], 5)
+        self.assertEqual(data['total_ejercicios'], 40)
+
+
+class MembresiaListadosTest(ConsultasConstantesMixin, TestCase):
+    """Los listados de membresías traen cliente y plan en el mismo JOIN"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+
+    def crear_membresias(self, cantidad):
+        hoy = date.today()
+        for _ in range(cantidad):
+            cliente = crear_cliente()
+            Membresia.objects.create(
+                cliente=cliente,
+                plan=self.plan,
+                fecha_inicio=hoy - timedelta(days=25),
+                fecha_fin=hoy + timedelta(days=5),
+                precio_contratado=1000,
+            )
+
+    def test_listados(self):
+        urls = [
+            '/api/membresias/membresia/',
+            '/api/membresias/membresia/activas/',
+            '/api/membresias/membresia/por_vencer/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertConsultasConstantes(url, self.crear_membresias)
+
+
+class PlanEstadisticasTest(ConsultasConstantesMixin, TestCase):
+    """/planes/estadisticas/: una query agrupada, solo membresías activas"""
+
+    url = '/api/membresias/planes/estadisticas/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.hoy = date.today()
+
+    def membresia(self, plan, precio, estado='activa'):
+        desplazamiento = timedelta(days=0 if estado == 'activa' else -60)
+        return Membresia.objects.create(
+            cliente=crear_cliente(), plan=plan, precio_contratado=precio, estado=estado,
+            fecha_inicio=self.hoy - timedelta(days=10) + desplazamiento,
+            fecha_fin=self.hoy + timedelta(days=20) + desplazamiento,
+        )
+
+    def crear_planes(self, cantidad):
+        for _ in range(cantidad):
+            plan = Plan.objects.create(nombre='Plan', frecuencia_semanal=3, precio=1000)
+            self.membresia(plan, 1000)
+
+    def test_consultas_constantes(self):
+        self.assertConsultasConstantes(self.url, self.crear_planes)
+
+    def test_cantidades_ingresos_y_descuento(self):
+        con_socios = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        self.membresia(con_socios, 900)
+        self.membresia(con_socios, 1000)
+        self.membresia(con_socios, 500, estado='vencida')
+        sin_socios = Plan.objects.create(nombre='Plan 2x', frecuencia_semanal=2, precio=800)
+
+        respuesta = self.client.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            [
+                (plan['id'], plan['cantidad_membresias'], plan['ingresos'], plan['descuento_promedio'])
+                for plan in respuesta.data
+            ],
+            [(sin_socios.id, 0, '0.00', None), (con_socios.id, 2, '1900.00', '50.00')]
+        )
+
+
+class MembresiaAltaTest(TestCase):
+    """Alta de membresías por la API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente()
+        self.plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        self.hoy = date.today()
+
+    def crear(self, **datos):
+        return self.client.post('/api/membresias/membresia/', {
+            'cliente': self.cliente.pk,
+            'plan': self.plan.pk,
+            'fecha_inicio': self.hoy,
+            'fecha_fin': self.hoy + timedelta(days=30),
+            'estado': 'activa',
+            **datos,
+        }, format='json')
+
+    def test_precio_sale_de_la_base_y_no_del_catalogo(self):
+        # Carga el catálogo en memoria y después cambia el precio sin señales
+        self.client.get('/api/membresias/planes/')
+        Plan.objects.filter(pk=self.plan.pk).update(precio=1500)
+
+        respuesta = self.crear()
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(Membresia.objects.get().precio_contratado, 1500)
+
+    def test_sin_estado_usa_el_default_y_controla_superposicion(self):
+        primera = self.client.post('/api/membresias/membresia/', {
+            'cliente': self.cliente.pk,
+            'plan': self.plan.pk,
+            'fecha_inicio': self.hoy,
+            'fecha_fin': self.hoy + timedelta(days=30),
+        }, format='json')
+        self.assertEqual(primera.status_code, 201, primera.data)
+        self.assertEqual(Membresia.objects.get().estado, 'activa')
+
+        superpuesta = self.client.post('/api/membresias/membresia/', {
+            'cliente': self.cliente.pk,
+            'plan': self.plan.pk,
+            'fecha_inicio': self.hoy + timedelta(days=10),
+            'fecha_fin': self.hoy + timedelta(days=40),
+        }, format='json')
+        self.assertEqual(superpuesta.status_code, 400)
+        self.assertIn('non_field_errors', superpuesta.data)
+
+    def test_plan_inexistente(self):
+        respuesta = self.crear(plan=self.plan.pk + 1)
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('plan', respuesta.data)
+
+
+class CacheCompartidoTest(TestCase):
+    """Las versiones de los catálogos necesitan un cache compartido entre procesos"""
+
+    def test_cache_local_falla(self):
+        for backend in ['locmem.LocMemCache', 'dummy.DummyCache']:
+            with self.subTest(backend=backend):
+                caches = {'default': {'BACKEND': f'django.core.cache.backends.{backend}'}}
+                with override_settings(CACHES=caches):
+                    errores = verificar_cache_compartido(None)
+                self.assertEqual([error.id for error in errores], ['gimnasio.E001'])
+
+    def test_cache_compartido_pasa(self):
+        self.assertEqual(verificar_cache_compartido(None), [])
+
+
+class AsistenciaCupoTest(TestCase):
+    """Cupo semanal del plan con el contador AsistenciaSemanal"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente = crear_cliente()
+        plan = Plan.objects.create(nombre='Plan 2x', frecuencia_semanal=2, precio=1000)
+        Membresia.objects.create(
+            cliente=self.cliente, plan=plan, fecha_inicio=date(2026, 3, 1),
+            fecha_fin=date(2026, 4, 30), precio_contratado=1000
+        )
+
+    def registrar(self, fecha_hora, cliente=None):
+        return self.client.post('/api/membresias/asistencias/registrar/', {
+            'cliente': (cliente or self.cliente).pk,
+            'fecha_hora': fecha_hora,
+        }, format='json')
+
+    def lote(self, *eventos):
+        respuesta = self.client.post('/api/membresias/asistencias/lote/', {'eventos': list(eventos)}, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return respuesta.data
+
+    def test_supera_el_cupo_de_la_semana(self):
+        # Lunes y martes de la misma semana: pasan; el miércoles ya no
+        self.assertEqual(self.registrar('2026-03-02T10:00:00Z').status_code, 201)
+        segunda = self.registrar('2026-03-03T10:00:00Z')
+        self.assertEqual(segunda.status_code, 201)
+        self.assertEqual(segunda.data['restantes'], 0)
+
+        tercera = self.registrar('2026-03-04T10:00:00Z')
+
+        self.assertEqual(tercera.status_code, 403)
+        self.assertEqual(tercera.data['limite_semanal'], 2)
+        self.assertEqual(Asistencia.objects.count(), 2)
+
+    def test_sin_membresia_activa(self):
+        respuesta = self.registrar('2026-03-02T10:00:00Z', cliente=crear_cliente())
+
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertIn('membresía activa', respuesta.data['motivo'])
+        self.assertFalse(Asistencia.objects.exists())
+
+    def test_la_semana_nueva_empieza_de_cero(self):
+        self.registrar('2026-03-02T10:00:00Z')
+        self.registrar('2026-03-03T10:00:00Z')
+
+        # Domingo todavía es la misma semana; el lunes siguiente no
+        self.assertEqual(self.registrar('2026-03-08T10:00:00Z').status_code, 403)
+        respuesta = self.registrar('2026-03-09T10:00:00Z')
+
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['restantes'], 1)
+
+    def test_lote_controla_el_cupo_entre_eventos_del_mismo_cliente(self):
+        self.registrar('2026-03-02T10:00:00Z')
+        sin_plan = crear_cliente()
+
+        resultado = self.lote(
+            {'cliente': self.cliente.pk, 'fecha_hora': '2026-03-05T10:00:00Z'},
+            {'cliente': self.cliente.pk, 'fecha_hora': '2026-03-04T10:00:00Z'},
+            {'cliente': sin_plan.pk, 'fecha_hora': '2026-03-04T10:00:00Z'},
+            {'cliente': self.cliente.pk, 'fecha_hora': '2026-03-10T10:00:00Z'},
+            {'cliente': 999999},
+        )
+
+        # Ya había usado 1 de 2: el miércoles entra y el jueves (primero en
+        # el lote, pero posterior) excede; el martes siguiente es otra semana
+        self.assertEqual(resultado['registrados'], 4)
+        self.assertEqual(resultado['excedidos'], [0])
+        self.assertEqual(resultado['sin_membresia'], [2])
+        self.assertEqual(resultado['ignorados'], [4])
+        self.assertEqual(
+            AsistenciaSemanal.objects.get(cliente=self.cliente, semana=date(2026, 3, 2)).cantidad, 3
+        )
+        # El contador queda lleno: un ingreso más esa semana se rechaza
+        self.assertEqual(self.registrar('2026-03-06T10:00:00Z').status_code, 403)
+
+    def test_origen_por_defecto_es_molinete(self):
+        self.lote(
+            {'cliente': self.cliente.pk},
+            {'cliente': self.cliente.pk, 'origen': 'recepcion'},
+        )
+
+        self.assertEqual(
+            sorted(Asistencia.objects.values_list('origen', flat=True)),
+            ['molinete', 'recepcion']
+        )
+
+
+class MotorEstadosTest(TestCase):
+    """Transiciones nocturnas de membresías (membresias/estados.py)"""
+
+    def setUp(self):
+        self.hoy = date(2026, 3, 15)
+        self.plan = Plan.objects.create(nombre='Plan 3x', frecuencia_semanal=3, precio=1000)
+        self.vencida = self.crear(date(2026, 3, 10))
+        self.suspendida_vencida = self.crear(date(2026, 3, 1), estado='suspendida')
+        self.por_suspender = self.crear(date(2026, 4, 10))
+        self.vigente = self.crear(date(2026, 4, 14))
+        EstadoCuenta.objects.filter(cliente_id=self.por_suspender.cliente_id).update(estado='suspendido')
+
+    def crear(self, fecha_fin, estado='activa'):
+        return Membresia.objects.create(
+            cliente=crear_cliente(), plan=self.plan, fecha_inicio=fecha_fin - timedelta(days=30),
+            fecha_fin=fecha_fin, precio_contratado=1000, estado=estado
+        )
+
+    def estado(self, membresia):
+        return Membresia.objects.values_list('estado', flat=True).get(pk=membresia.pk)
+
+    def test_transiciones(self):
+        resultado = actualizar_estados(self.hoy)
+
+        self.assertEqual(
+            (resultado['vencidas'], resultado['suspendidas'], resultado['reactivadas']),
+            (2, 1, 0)
+        )
+        self.assertEqual(self.estado(self.vencida), 'vencida')
+        self.assertEqual(self.estado(self.suspendida_vencida), 'vencida')
+        self.assertEqual(self.estado(self.por_suspender), 'suspendida')
+        self.assertEqual(self.estado(self.vigente), 'activa')
+        self.assertEqual(
+            sorted(TransicionMembresia.objects.values_list('membresia_id', 'estado_anterior', 'estado_nuevo')),
+            sorted([
+                (self.vencida.pk, 'activa', 'vencida'),
+                (self.suspendida_vencida.pk, 'suspendida', 'vencida'),
+                (self.por_suspender.pk, 'activa', 'suspendida'),
+            ])
+        )
+
+    def test_segunda_corrida_no_cambia_nada(self):
+        primera = actualizar_estados(self.hoy)
+        transiciones = TransicionMembresia.objects.count()
+
+        segunda = actualizar_estados(self.hoy)
+
+        self.assertEqual(segunda, {'vencidas': 0, 'suspendidas': 0, 'reactivadas': 0, 'cuentas': primera['cuentas']})
+        self.assertEqual(TransicionMembresia.objects.count(), transiciones)
+
+    def test_reactiva_solo_lo_que_suspendio_el_motor(self):
+        actualizar_estados(self.hoy)
+        suspendida_a_mano = self.crear(date(2026, 4, 20), estado='suspendida')
+        EstadoCuenta.objects.filter(cliente_id=self.por_suspender.cliente_id).update(estado='debe')
+
+        resultado = actualizar_estados(self.hoy)
+
+        self.assertEqual(resultado['reactivadas'], 1)
+        self.assertEqual(self.estado(self.por_suspender), 'activa')
+        self.assertEqual(self.estado(suspendida_a_mano), 'suspendida')
+
+    def test_estados_de_cuenta(self):
+        # Una membresía más nueva del mismo cliente pasa a ser la activa
+        nueva = Membresia.objects.create(
+            cliente=self.vigente.cliente, plan=self.plan, fecha_inicio=date(2026, 4, 15),
+            fecha_fin=date(2026, 5, 14), precio_contratado=1000
+        )
+        actualizar_estados(self.hoy)
+
+        self.assertEqual(recalcular_estados_cuenta(), 4)
+        cuentas = {
+            cuenta.cliente_id: (cuenta.membresia_activa_id, cuenta.proximo_vencimiento)
+            for cuenta in EstadoCuenta.objects.all()
+        }
+        self.assertEqual(cuentas[self.vigente.cliente_id], (nueva.pk, date(2026, 5, 14)))
+        self.assertEqual(cuentas[self.vencida.cliente_id], (None, None))
+        self.assertEqual(cuentas[self.por_suspender.cliente_id], (None, None))
+
+    def test_comando(self):
+        salida = io.StringIO()
+
+        call_command('actualizar_membresias', '--fecha', '2026-03-15', stdout=salida)
+
+        self.assertIn('2 vencidas, 1 suspendidas, 0 reactivadas, 4 cuentas recalculadas', salida.getvalue())
+
+
+class RecordatoriosVencimientoTest(TestCase):
+    """Avisos de vencimiento en lote: anti-join, corridas repetidas e índice único"""
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.plan = Plan.objects.create(nombre='Pase libre', frecuencia_semanal=7, precio=1000)
+
+    def membresia(self, cliente, dias_para_vencer):
+        fecha_fin = self.hoy + timedelta(days=dias_para_vencer)
+        return Membresia.objects.create(
+            cliente=cliente, plan=self.plan, fecha_inicio=fecha_fin - timedelta(days=29),
+            fecha_fin=fecha_fin, precio_contratado=1000, estado='activa'
+        )
+
+    def generar(self, **parametros):
+        respuesta = APIClient().post('/api/membresias/membresia/generar_recordatorios/', parametros, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return respuesta.data['creados']
+
+    def test_un_aviso_por_cliente_sin_los_ya_avisados(self):
+        por_vencer = self.membresia(crear_cliente(), 3)
+        self.membresia(crear_cliente(), 30)
+        ya_avisado = crear_cliente()
+        Recordatorio.objects.create(
+            cliente=ya_avisado, tipo='vencimiento', canal='whatsapp', mensaje='Aviso',
+            fecha_programada=timezone.now()
+        )
+        self.membresia(ya_avisado, 2)
+        con_dos = crear_cliente()
+        primera = self.membresia(con_dos, 1)
+        self.membresia(con_dos, 5)
+
+        self.assertEqual(self.generar(dias=7), 2)
+
+        self.assertEqual(
+            set(Recordatorio.objects.filter(membresia__isnull=False).values_list('cliente_id', 'membresia_id')),
+            {(por_vencer.cliente_id, por_vencer.id), (con_dos.id, primera.id)}
+        )
+
+    def test_segunda_corrida_no_crea_nada(self):
+        for dias in (1, 4, 6):
+            self.membresia(crear_cliente(), dias)
+        self.assertEqual(self.generar(), 3)
+
+        self.assertEqual(self.generar(), 0)
+        self.assertEqual(Recordatorio.objects.count(), 3)
+
+    def test_aviso_cancelado_no_se_repite_para_la_misma_membresia(self):
+        self.membresia(crear_cliente(), 3)
+        self.generar()
+        Recordatorio.objects.update(estado='cancelado')
+
+        self.assertEqual(self.generar(), 0)
+        self.assertEqual(Recordatorio.objects.count(), 1)
+
+    def test_corridas_simultaneas_no_duplican(self):
+        membresia = self.membresia(crear_cliente(), 3)
+        # Las dos corridas vieron la membresía sin aviso antes de insertar
+        sin_filtrar = Membresia.objects.filter(pk=membresia.pk)
+        with mock.patch('membresias.vencimientos.membresias_sin_aviso', return_value=sin_filtrar):
+            self.assertEqual(generar_recordatorios_vencimiento(), 1)
+            self.assertEqual(generar_recordatorios_vencimiento(), 0)
+
+        self.assertEqual(Recordatorio.objects.filter(membresia=membresia).count(), 1)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EjercicioViewSet, PlanViewSet, MembresiaViewSet
+from .views import EjercicioViewSet, RutinaViewSet, SemanaViewSet, PlanViewSet, MembresiaViewSet, AsistenciaViewSet
 
 # ============================================
 # ROUTER: Registra los ViewSets automáticamente
@@ -10,8 +10,11 @@ router = DefaultRouter()
 
 # Registrar cada ViewSet con su prefijo de URL
 router.register(r'ejercicio', EjercicioViewSet, basename='ejercicio')
+router.register(r'rutinas', RutinaViewSet, basename='rutinas')
+router.register(r'semanas', SemanaViewSet, basename='semanas')
 router.register(r'planes', PlanViewSet, basename='planes')
 router.register(r'membresia', MembresiaViewSet, basename='membresia')
+router.register(r'asistencias', AsistenciaViewSet, basename='asistencias')
 
 urlpatterns = [
     path('', include(router.urls)),
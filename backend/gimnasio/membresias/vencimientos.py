@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from clientes.models import Recordatorio
+from gimnasio.fechas import inicio_dia
+from .models import Membresia
+
+
+# ============================================
+# RECORDATORIOS DE VENCIMIENTO EN LOTE
+# ============================================
+#
+# Una query trae las membresías por vencer que todavía no tienen aviso
+# (anti-join con NOT EXISTS sobre Recordatorio), se arman los mensajes en
+# memoria y se insertan con bulk_create. Correrlo de nuevo no duplica:
+# los clientes recién avisados quedan excluidos por el mismo NOT EXISTS.
+# Dos corridas simultáneas pueden ver la misma membresía sin aviso; el
+# índice único (membresia, tipo) de Recordatorio descarta la segunda fila
+# (ignore_conflicts). Un aviso cancelado no se vuelve a generar para la
+# misma membresía.
+
+DIAS_AVISO = 7
+MENSAJE_VENCIMIENTO = (
+    'Hola {nombre}! Te recordamos que tu membresía {plan} vence el {fecha_fin:%d/%m/%Y}. '
+    'Acercate a recepción para renovarla.'
+)
+
+
+def membresias_sin_aviso(dias=DIAS_AVISO, hoy=None):
+    """
+    Membresías activas que vencen en los próximos `dias` y cuyo cliente no
+    tiene un recordatorio de vencimiento pendiente ni uno enviado/programado
+    dentro de la misma ventana.
+    """
+    hoy = hoy or timezone.localdate()
+    inicio_ventana = inicio_dia(hoy - timedelta(days=dias))
+
+    avisos = Recordatorio.objects.filter(
+        cliente_id=OuterRef('cliente_id'),
+        tipo='vencimiento'
+    ).filter(
+        Q(estado='pendiente') | Q(fecha_programada__gte=inicio_ventana)
+    ).exclude(estado='cancelado')
+    avisos_membresia = Recordatorio.objects.filter(membresia_id=OuterRef('pk'), tipo='vencimiento')
+
+    return Membresia.objects.filter(
+        estado='activa',
+        fecha_fin__gte=hoy,
+        fecha_fin__lte=hoy + timedelta(days=dias)
+    ).filter(~Exists(avisos), ~Exists(avisos_membresia))
+
+
+def generar_recordatorios_vencimiento(dias=DIAS_AVISO, canal='whatsapp', hoy=None):
+    """
+    Crea un recordatorio de vencimiento por cliente con membresía por vencer.
+
+    Devuelve la cantidad de recordatorios creados.
+    """
+    membresias = (
+        membresias_sin_aviso(dias, hoy)
+        .select_related('cliente', 'plan')
+        .only('id', 'cliente_id', 'fecha_fin', 'cliente__nombre', 'plan__nombre')
+        .order_by('cliente_id', 'fecha_fin')
+    )
+
+    ahora = timezone.now()
+    recordatorios = []
+    avisados = set()
+    for membresia in membresias.iterator(chunk_size=2000):
+        # Un solo aviso por cliente (el de la membresía que vence primero)
+        if membresia.cliente_id in avisados:
+            continue
+        avisados.add(membresia.cliente_id)
+        recordatorios.append(Recordatorio(
+            cliente_id=membresia.cliente_id,
+            membresia_id=membresia.id,
+            tipo='vencimiento',
+            canal=canal,
+            mensaje=MENSAJE_VENCIMIENTO.format(
+                nombre=membresia.cliente.nombre,
+                plan=membresia.plan.nombre,
+                fecha_fin=membresia.fecha_fin
+            ),
+            fecha_programada=ahora
+        ))
+
+    if not recordatorios:
+        return 0
+
+    with transaction.atomic():
+        Recordatorio.objects.bulk_create(recordatorios, batch_size=1000, ignore_conflicts=True)
+
+    # Con ignore_conflicts no se sabe cuáles entraron: se cuentan los de
+    # esta corrida (misma fecha_programada)
+    return Recordatorio.objects.filter(
+        tipo='vencimiento', fecha_programada=ahora, membresia__isnull=False
+    ).count()
@@ -1,24 +1,67 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import date, timedelta
-from .models import Ejercicio, Plan, Membresia
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_date
+from gimnasio.cache import respuesta_con_etag
+from gimnasio.fechas import inicio_dia
+from gimnasio.paginacion import PaginacionAccionesMixin
+from clientes.models import Recordatorio
+from . import catalogo
+from .asistencias import registrar_asistencia, registrar_lote
+from .vencimientos import DIAS_AVISO, generar_recordatorios_vencimiento
+from .models import Ejercicio, Rutina, Semana, DiaEntrenamiento, EjercicioDia, Plan, Membresia, Asistencia
 from .serializers import (
     EjercicioSerializer,
+    RutinaSerializer,
+    RutinaListSerializer,
+    RutinaCreateSerializer,
+    RutinaDetalleSerializer,
+    SemanaSerializer,
+    SemanaListSerializer,
+    SemanaCreateSerializer,
+    SemanaDetalleSerializer,
     PlanSerializer,
     PlanListSerializer,
     PlanCreateSerializer,
     PlanDetalleSerializer,
+    PlanEstadisticasSerializer,
     MembresiaSerializer,
     MembresiaListSerializer,
-    MembresiaCreateSerializer 
+    MembresiaCreateSerializer,
+    AsistenciaSerializer,
+    AsistenciaRegistrarSerializer,
+    AsistenciaLoteSerializer
 )
 
 
 class EjercicioViewSet(viewsets.ModelViewSet):
-    """ViewSet para gestionar ejercicios"""
+    """
+    ViewSet para gestionar ejercicios.
+    
+    El listado sale del catálogo en memoria (membresias/catalogo.py), con
+    ETag por versión. Sin paginación: es un catálogo chico que se pide entero.
+    """
     queryset = Ejercicio.objects.all()
     serializer_class = EjercicioSerializer
+    ordering = ('nombre', 'id')
+    pagination_class = None
+    
+    def list(self, request, *args, **kwargs):
+        ejercicios, version = catalogo.ejercicios.obtener()
+        activo = request.query_params.get('activo', None)
+        categoria = request.query_params.get('categoria', None)
+        
+        def datos():
+            filtrados = [
+                ejercicio for ejercicio in ejercicios
+                if (activo != 'true' or ejercicio.activo)
+                and (not categoria or ejercicio.categoria == categoria)
+            ]
+            return EjercicioSerializer(filtrados, many=True).data
+        
+        return respuesta_con_etag(request, f'"ejercicios-{version}"', datos)
     
     def get_queryset(self):
         queryset = Ejercicio.objects.all()
@@ -34,9 +77,97 @@ class EjercicioViewSet(viewsets.ModelViewSet):
         return queryset
 
 
+def _prefetch_dias():
+    """Prefetch de días con sus ejercicios (y el ejercicio del catálogo en el mismo JOIN)"""
+    return Prefetch(
+        'dias',
+        queryset=DiaEntrenamiento.objects.prefetch_related(
+            Prefetch('ejercicios', queryset=EjercicioDia.objects.select_related('ejercicio'))
+        )
+    )
+
+
+class RutinaViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar rutinas de entrenamiento.
+    
+    El detalle arma todo el árbol (semanas -> días -> ejercicios) con
+    prefetch, así que la cantidad de queries no depende del tamaño de la rutina.
+    """
+    queryset = Rutina.objects.all()
+    ordering = ('-fecha_inicio', '-id')
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return RutinaListSerializer
+        elif self.action in ['create', 'update', 'partial_update']:
+            return RutinaCreateSerializer
+        elif self.action == 'retrieve':
+            return RutinaDetalleSerializer
+        return RutinaSerializer
+    
+    def get_queryset(self):
+        queryset = Rutina.objects.select_related('cliente')
+        
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch('semanas', queryset=Semana.objects.prefetch_related(_prefetch_dias()))
+            )
+        elif self.action == 'list':
+            queryset = queryset.prefetch_related('semanas')
+        
+        cliente_id = self.request.query_params.get('cliente', None)
+        if cliente_id:
+            queryset = queryset.filter(cliente_id=cliente_id)
+        
+        activo = self.request.query_params.get('activo', None)
+        if activo == 'true':
+            queryset = queryset.filter(activo=True)
+        elif activo == 'false':
+            queryset = queryset.filter(activo=False)
+        
+        return queryset
+
+
+class SemanaViewSet(viewsets.ModelViewSet):
+    """ViewSet para gestionar las semanas de una rutina"""
+    queryset = Semana.objects.all()
+    ordering = ('-id',)
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SemanaListSerializer
+        elif self.action in ['create', 'update', 'partial_update']:
+            return SemanaCreateSerializer
+        elif self.action == 'retrieve':
+            return SemanaDetalleSerializer
+        return SemanaSerializer
+    
+    def get_queryset(self):
+        queryset = Semana.objects.select_related('rutina__cliente')
+        
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(_prefetch_dias())
+        elif self.action == 'list':
+            queryset = queryset.prefetch_related('dias')
+        
+        rutina_id = self.request.query_params.get('rutina', None)
+        if rutina_id:
+            queryset = queryset.filter(rutina_id=rutina_id)
+        
+        return queryset
+
+
 class PlanViewSet(viewsets.ModelViewSet):
-    """ViewSet para gestionar planes de membresía"""
+    """
+    ViewSet para gestionar planes de membresía.
+    
+    list y activos salen del catálogo en memoria, con ETag por versión.
+    Sin paginación: son pocos planes y se muestran siempre todos.
+    """
     queryset = Plan.objects.all()
+    ordering = ('frecuencia_semanal', 'id')
+    pagination_class = None
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -50,22 +181,46 @@ class PlanViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Plan.objects.all()
         
+        if self.action == 'retrieve':
+            queryset = queryset.con_estadisticas()
+        
         activo = self.request.query_params.get('activo', None)
         if activo == 'true':
             queryset = queryset.filter(activo=True)
         
         return queryset
     
+    def _listar_catalogo(self, request, solo_activos):
+        planes, version = catalogo.planes.obtener()
+        
+        def datos():
+            filtrados = [plan for plan in planes if plan.activo or not solo_activos]
+            return PlanListSerializer(filtrados, many=True).data
+        
+        return respuesta_con_etag(request, f'"planes-{version}"', datos)
+    
+    def list(self, request, *args, **kwargs):
+        return self._listar_catalogo(request, request.query_params.get('activo') == 'true')
+    
     @action(detail=False, methods=['get'])
     def activos(self, request):
-        planes = Plan.objects.filter(activo=True)
-        serializer = PlanListSerializer(planes, many=True)
-        return Response(serializer.data)
+        return self._listar_catalogo(request, True)
+    
+    @action(detail=False, methods=['get'])
+    def estadisticas(self, request):
+        """
+        Endpoint: GET /planes/estadisticas/
+        Todos los planes con membresías activas, ingresos (precio contratado)
+        y descuento promedio contra el precio actual. Una sola query agrupada.
+        """
+        planes = Plan.objects.con_estadisticas().order_by('frecuencia_semanal', 'id')
+        return Response(PlanEstadisticasSerializer(planes, many=True).data)
 
 
-class MembresiaViewSet(viewsets.ModelViewSet):
+class MembresiaViewSet(PaginacionAccionesMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar membresías"""
     queryset = Membresia.objects.all()
+    ordering = ('-fecha_inicio', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -77,6 +232,11 @@ class MembresiaViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Membresia.objects.all()
         
+        if self.action == 'list':
+            queryset = queryset.para_listado()
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('cliente', 'plan')
+        
         estado = self.request.query_params.get('estado', None)
         if estado:
             queryset = queryset.filter(estado=estado)
@@ -89,20 +249,106 @@ class MembresiaViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def activas(self, request):
-        membresias = Membresia.objects.filter(estado='activa')
-        serializer = MembresiaListSerializer(membresias, many=True)
-        return Response(serializer.data)
+        membresias = Membresia.objects.para_listado().filter(estado='activa')
+        return self.listar_paginado(membresias, MembresiaListSerializer)
     
     @action(detail=False, methods=['get'])
     def por_vencer(self, request):
         hoy = date.today()
         fecha_limite = hoy + timedelta(days=7)
         
-        membresias = Membresia.objects.filter(
+        membresias = Membresia.objects.para_listado().filter(
             estado='activa',
             fecha_fin__gte=hoy,
             fecha_fin__lte=fecha_limite
         )
         
-        serializer = MembresiaListSerializer(membresias, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return self.listar_paginado(membresias, MembresiaListSerializer)
+    
+    @action(detail=False, methods=['post'])
+    def generar_recordatorios(self, request):
+        """
+        Endpoint: POST /membresia/generar_recordatorios/
+        Crea recordatorios de vencimiento para las membresías que vencen en
+        los próximos `dias` (7 por defecto). No duplica avisos ya creados.
+        """
+        try:
+            dias = int(request.data.get('dias', DIAS_AVISO))
+        except (TypeError, ValueError):
+            return Response({"error": "dias debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if dias < 1 or dias > 60:
+            return Response({"error": "dias debe estar entre 1 y 60"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        canal = request.data.get('canal', 'whatsapp')
+        if canal not in dict(Recordatorio.CANAL_CHOICES):
+            return Response({"error": "canal inválido"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        creados = generar_recordatorios_vencimiento(dias=dias, canal=canal)
+        return Response({"creados": creados}, status=status.HTTP_201_CREATED)
+
+
+class AsistenciaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de asistencias (check-in).
+    
+    Las asistencias no se editan ni se borran: solo se registran
+    con /registrar/ (un ingreso) o /lote/ (eventos del molinete).
+    """
+    queryset = Asistencia.objects.all()
+    serializer_class = AsistenciaSerializer
+    ordering = ('-fecha_hora', '-id')
+    
+    def get_queryset(self):
+        queryset = Asistencia.objects.all()
+        
+        cliente_id = self.request.query_params.get('cliente', None)
+        if cliente_id:
+            queryset = queryset.filter(cliente_id=cliente_id)
+        
+        # Rango de días locales [fecha_desde, fecha_hasta], como rango semiabierto
+        fecha_desde = parse_date(self.request.query_params.get('fecha_desde', ''))
+        if fecha_desde:
+            queryset = queryset.filter(fecha_hora__gte=inicio_dia(fecha_desde))
+        
+        fecha_hasta = parse_date(self.request.query_params.get('fecha_hasta', ''))
+        if fecha_hasta:
+            queryset = queryset.filter(fecha_hora__lt=inicio_dia(fecha_hasta + timedelta(days=1)))
+        
+        return queryset
+    
+    @action(detail=False, methods=['post'])
+    def registrar(self, request):
+        """
+        Endpoint: POST /asistencias/registrar/
+        Valida membresía activa y cupo semanal del plan, y registra el ingreso.
+        Responde 201 si puede pasar y 403 si no.
+        """
+        serializer = AsistenciaRegistrarSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        resultado = registrar_asistencia(
+            datos['cliente'],
+            fecha_hora=datos.get('fecha_hora'),
+            origen=datos['origen']
+        )
+        
+        if resultado['permitido']:
+            return Response(resultado, status=status.HTTP_201_CREATED)
+        return Response(resultado, status=status.HTTP_403_FORBIDDEN)
+    
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Endpoint: POST /asistencias/lote/
+        Registra en bloque los eventos acumulados por el molinete:
+        {"eventos": [{"cliente": 1, "fecha_hora": "..."}, ...]}
+        Responde con las posiciones ignoradas (cliente inexistente), las que
+        superaron el cupo semanal y las que no tenían membresía activa.
+        """
+        serializer = AsistenciaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        resultado = registrar_lote(serializer.validated_data['eventos'])
+        return Response(resultado, status=status.HTTP_201_CREATED)